@@ -0,0 +1,165 @@
+"""Calibração de threads do torch x workers de inferência na inicialização.
+
+Com vários workers e o número padrão de threads do torch (uma por núcleo),
+cada inferência disputa todos os núcleos com as demais e a latência degrada
+sob carga. Com `AUTOTUNE_ENABLED=true`, depois do aquecimento do modelo,
+cada divisão dos núcleos disponíveis em (lotes concorrentes x threads do
+torch) é medida em uma amostra fixa do corpus, com lotes do tamanho usado em
+produção (`BATCH_MAX_SIZE` com micro-batching, senão um e-mail), e a de maior
+vazão por núcleo é aplicada: `torch.set_num_threads` e o pool de CPU é
+recriado com esse número de workers. O `MicroBatcher` acompanha o tamanho do
+pool e mantém até esse número de lotes no modelo ao mesmo tempo.
+
+`TORCH_THREADS` > 0 dispensa a calibração e aplica o valor diretamente. Os
+dois são aplicados ao fim do aquecimento do modelo ou, com
+`WARMUP_ENABLED=false`, em segundo plano na inicialização. Com
+`INFERENCE_BACKEND=onnx` as threads valem para a sessão do onnxruntime
+(`inference_threads` na criação, `SessionForward.set_threads` na calibração).
+"""
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from .config import Config
+from .executors import cpu_executor
+
+# Resultado da última configuração aplicada (exposto em /health)
+result: Dict = {"source": "default"}
+
+
+def available_cores() -> int:
+    """Núcleos disponíveis para este processo (respeita cpuset e WEB_CONCURRENCY)."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:  # Sem sched_getaffinity (macOS/Windows)
+        cores = os.cpu_count() or 1
+    # Cada worker do uvicorn (--workers / WEB_CONCURRENCY) fica com sua fração dos núcleos
+    processes = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+    return max(1, cores // processes)
+
+
+def candidates(cores: int) -> List[Tuple[int, int]]:
+    """Divisões dos núcleos em (workers, threads) que usam a máquina inteira."""
+    return [(workers, cores // workers) for workers in range(1, cores + 1) if cores % workers == 0]
+
+
+def set_inference_threads(threads: int) -> None:
+    """Threads intra-op do backend em uso: a sessão ONNX do scorer ou o torch."""
+    from . import nlp
+
+    forward = getattr(nlp._scorer, "forward", None)
+    if hasattr(forward, "set_threads"):
+        forward.set_threads(threads)
+        return
+    try:
+        import torch
+    except ImportError:  # Sem torch (ex.: engine stub): nada a ajustar
+        return
+    torch.set_num_threads(threads)
+
+
+def inference_threads() -> int:
+    """Threads intra-op para uma sessão ONNX nova.
+
+    `TORCH_THREADS`, o valor calibrado ou, por padrão, os núcleos divididos
+    pelos workers do pool de CPU (sem isso o onnxruntime usa todos os
+    núcleos em cada lote concorrente).
+    """
+    if Config.TORCH_THREADS > 0:
+        return Config.TORCH_THREADS
+    if result.get("source") == "autotune":
+        return result["torch_threads"]
+    return max(1, available_cores() // cpu_executor.workers)
+
+
+def batch_size() -> int:
+    """Tamanho dos lotes em produção: o do micro-batching ou um e-mail por chamada."""
+    return max(1, Config.BATCH_MAX_SIZE) if Config.BATCHING_ENABLED else 1
+
+
+def make_batches(texts: Sequence[str], size: int, count: int) -> List[List[str]]:
+    """`count` lotes de `size` textos, percorrendo a amostra em ciclo."""
+    return [[texts[(b * size + i) % len(texts)] for i in range(size)] for b in range(count)]
+
+
+def measure(infer: Callable[[List[str]], object], batches: Sequence[List[str]], workers: int, threads: int,
+            set_threads: Callable[[int], None] = set_inference_threads, rounds: int = 1) -> float:
+    """Vazão (e-mails/s) com `workers` lotes concorrentes de `threads` threads cada."""
+    set_threads(threads)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(infer, batches[:workers]))  # aquecimento desta configuração
+        start = time.perf_counter()
+        list(pool.map(infer, list(batches) * rounds))
+        elapsed = time.perf_counter() - start
+    emails = sum(len(batch) for batch in batches) * rounds
+    return emails / elapsed if elapsed > 0 else 0.0
+
+
+def tune(infer: Callable[[List[str]], object], batches: Sequence[List[str]], cores: int,
+         set_threads: Callable[[int], None] = set_inference_threads, rounds: int = 1) -> Dict:
+    """Mede cada candidato e escolhe o de maior vazão por núcleo."""
+    runs = []
+    for workers, threads in candidates(cores):
+        throughput = measure(infer, batches, workers, threads, set_threads, rounds)
+        runs.append({
+            "cpu_workers": workers,
+            "torch_threads": threads,
+            "throughput": round(throughput, 3),
+            "throughput_per_core": round(throughput / (workers * threads), 4),
+        })
+    best = max(runs, key=lambda r: r["throughput_per_core"])
+    return {
+        "source": "autotune",
+        "cores": cores,
+        "batch_size": len(batches[0]) if batches else 0,
+        "cpu_workers": best["cpu_workers"],
+        "torch_threads": best["torch_threads"],
+        "candidates": runs,
+    }
+
+
+def _sample_infer(cores: int) -> Tuple[Callable[[List[str]], object], List[List[str]]]:
+    """Inferência direta no scorer (sem cache) e lotes fixos do corpus embutido.
+
+    Pelo menos um lote por worker do maior candidato, para que todos os
+    workers tenham trabalho durante a medição.
+    """
+    from . import nlp
+    from .corpus import load_corpus
+
+    scorer = nlp.get_scorer()
+    tokenizer = getattr(scorer, "tokenizer", None)
+    texts = [
+        nlp.preprocess(nlp.select_input(item["text"], tokenizer, Config.INPUT_TOKEN_BUDGET))
+        for item in load_corpus()
+    ][:max(1, Config.AUTOTUNE_SAMPLES)]
+    size = batch_size()
+    count = max(cores, math.ceil(len(texts) / size))
+    return (lambda batch: nlp.score_texts(scorer, batch)), make_batches(texts, size, count)
+
+
+def configure(set_threads: Callable[[int], None] = set_inference_threads) -> Dict:
+    """Aplica TORCH_THREADS ou, se habilitado, o resultado da calibração."""
+    global result
+    if Config.TORCH_THREADS > 0:
+        set_threads(Config.TORCH_THREADS)
+        result = {"source": "config", "torch_threads": Config.TORCH_THREADS,
+                  "cpu_workers": cpu_executor.workers}
+    elif Config.AUTOTUNE_ENABLED:
+        cores = available_cores()
+        infer, batches = _sample_infer(cores)
+        tuned = tune(infer, batches, cores, set_threads)
+        set_threads(tuned["torch_threads"])
+        cpu_executor.resize(tuned["cpu_workers"])
+        result = tuned
+    else:
+        torch = sys.modules.get("torch")
+        result = {"source": "default", "cpu_workers": cpu_executor.workers,
+                  "torch_threads": torch.get_num_threads() if torch is not None else None}
+    print(f"Threads de inferência: torch_threads={result['torch_threads']} "
+          f"cpu_workers={result['cpu_workers']} ({result['source']})")
+    return result
+
@@ -0,0 +1,140 @@
+import asyncio
+import contextvars
+from typing import Any, Callable, List, Optional
+
+from .executors import QueueFullError
+
+
+class MicroBatcher:
+    """Agrupa requisições concorrentes em uma única chamada ao modelo.
+
+    Cada `submit` coloca o item em uma fila limitada e aguarda o resultado.
+    Um worker assíncrono coleta itens por até `max_wait_ms` (ou até
+    `max_batch_size` itens), executa `batch_fn` com o lote em uma thread do
+    executor e resolve o future de cada requisição. A janela só é aguardada
+    quando já há lote em execução: com o executor ocioso, o item (e o que já
+    estiver na fila) sai na hora, então uma requisição isolada não paga os
+    `max_wait_ms`. Até `max_concurrency` lotes ficam no executor ao mesmo
+    tempo (padrão: os `workers` do executor, que o autotune ajusta); com todos
+    ocupados, os próximos itens se acumulam na fila, então o tamanho do lote
+    cresce naturalmente sob carga sem bloquear o event loop.
+
+    O lote roda com os contextvars da primeira requisição dele (rastreamento
+    de memória, métricas), como em `BoundedExecutor.run`.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 8,
+                 max_wait_ms: float = 10.0, max_queue: int = 256, executor=None,
+                 max_concurrency: Optional[int] = None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_queue = max_queue
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._filled: Optional[asyncio.Event] = None
+        self._slot_free: Optional[asyncio.Event] = None
+        self._tasks: set = set()
+        self.inflight = 0
+        self.batches = 0
+        self.items = 0
+
+    @property
+    def concurrency(self) -> int:
+        """Lotes simultâneos no executor (lido a cada lote: acompanha o `resize` do pool)."""
+        if self.max_concurrency is not None:
+            return max(1, self.max_concurrency)
+        return max(1, getattr(self.executor, "workers", 1))
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        # Recria fila/worker se o loop mudou (ex.: TestClient cria um loop por requisição)
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self.inflight = 0
+            self._worker = loop.create_task(self._run())
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, item: Any) -> Any:
+        """Enfileira um item e aguarda o resultado do lote."""
+        self._ensure_started()
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((item, future, contextvars.copy_context()))
+        except asyncio.QueueFull:
+            raise QueueFullError("Fila de inferência cheia")
+        if self._filled is not None and self._queue.qsize() + 1 >= self.max_batch_size:
+            self._filled.set()
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        # Nada em execução: esperar a janela só somaria latência (carga baixa)
+        if self.inflight > 0 and self.max_wait > 0 and self._queue.qsize() + 1 < self.max_batch_size:
+            # Espera a janela fechar ou o lote encher (sinalizado por submit)
+            self._filled = asyncio.Event()
+            timer = self._loop.call_later(self.max_wait, self._filled.set)
+            try:
+                await self._filled.wait()
+            finally:
+                timer.cancel()
+                self._filled = None
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            while self.inflight >= self.concurrency:
+                # Todos os slots ocupados: os itens seguem acumulando na fila
+                self._slot_free = asyncio.Event()
+                await self._slot_free.wait()
+            batch = await self._collect()
+            # Requisições canceladas (cliente desconectou) não vão para o modelo
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            self.inflight += 1
+            task = self._loop.create_task(self._dispatch([(item, fut) for item, fut, _ in batch]),
+                                          context=batch[0][2])
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: list) -> None:
+        items = [item for item, _ in batch]
+        try:
+            if hasattr(self.executor, "run"):
+                # BoundedExecutor: limite de fila e contextvars propagados para a thread
+                results = await self.executor.run(self.batch_fn, items)
+            else:
+                results = await self._loop.run_in_executor(self.executor, self.batch_fn, items)
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+        else:
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+        finally:
+            self.inflight -= 1
+            if self._slot_free is not None:
+                self._slot_free.set()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.qsize(),
+            "inflight": self.inflight,
+            "concurrency": self.concurrency,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
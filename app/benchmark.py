@@ -0,0 +1,280 @@
+"""Micro-benchmarks por estágio do caminho de uma requisição.
+
+    python -m app.benchmark --engine stub --output bench.json
+    python -m app.benchmark --engine model --output bench-model.json
+    python -m app.benchmark --engine stub --compare bench.json
+
+Mede separadamente a leitura de arquivos (.txt e .pdf gerado na hora), o
+pré-processamento, as regras de palavras-chave, o preenchimento do template
+de resposta, a classificação e o `/api/process` de ponta a ponta, sem e com
+o micro-batching (casos separados). Com `--engine stub` o modelo é trocado
+pelo `StubScorer` (determinístico, sem download), o que isola o custo do
+restante do código; `--engine model` usa o engine configurado em
+`CLASSIFIER_ENGINE`.
+
+Cada caso reporta p50/p95/p99 (ms) e as alocações por chamada (tracemalloc,
+em uma passada separada para não distorcer os tempos). O JSON de saída pode
+ser comparado entre commits com `--compare`.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+from .config import Config
+from .corpus import ROOT, load_corpus
+
+PERCENTILES = (50, 95, 99)
+
+
+def make_pdf(text: str, lines_per_page: int = 50, width: int = 90) -> bytes:
+    """Gera um PDF mínimo (Helvetica, WinAnsi) com o texto, sem dependências.
+
+    O suficiente para o pdfminer extrair o texto de volta: uma página por
+    `lines_per_page` linhas e a tabela xref com os offsets de cada objeto.
+    """
+    lines: List[str] = []
+    for paragraph in text.splitlines() or [""]:
+        while len(paragraph) > width:
+            cut = paragraph.rfind(" ", 0, width)
+            cut = cut if cut > 0 else width
+            lines.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip()
+        lines.append(paragraph)
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+    def escape(line: str) -> bytes:
+        raw = line.encode("cp1252", errors="replace")
+        return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+    # 1: catálogo, 2: árvore de páginas, 3: fonte, depois (página, conteúdo) por página
+    objects: List[bytes] = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    kids = []
+    for page in pages:
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R".encode())
+        stream = b"BT /F1 10 Tf 14 TL 50 800 Td\n" + b"".join(b"(" + escape(l) + b") Tj T*\n" for l in page) + b"ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+            + f"/Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(kids) + f"] /Count {len(pages)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def summarize(samples_ms: Sequence[float]) -> Dict:
+    """Percentis, média e extremos (ms) de uma série de medições."""
+    arr = np.asarray(samples_ms, dtype=np.float64)
+    summary = {f"p{p}": round(float(np.percentile(arr, p)), 4) for p in PERCENTILES}
+    summary.update(mean=round(float(arr.mean()), 4), min=round(float(arr.min()), 4),
+                   max=round(float(arr.max()), 4), n=int(arr.size))
+    return summary
+
+
+def time_case(fn: Callable[[], object], iterations: int, warmup: int = 3) -> List[float]:
+    """Tempo (ms) de cada uma de `iterations` chamadas, depois de `warmup` chamadas descartadas."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def alloc_case(fn: Callable[[], object], iterations: int) -> Dict:
+    """Pico e saldo de memória alocada (KB) por chamada, medidos com tracemalloc."""
+    peaks, nets = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn()
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            nets.append(after - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_kb": round(max(peaks) / 1024, 2),
+        "alloc_mean_peak_kb": round(sum(peaks) / len(peaks) / 1024, 2),
+        "alloc_net_kb": round(sum(nets) / len(nets) / 1024, 2),
+    }
+
+
+@contextmanager
+def isolated(engine: str):
+    """Configuração do benchmark: sem caches, sem micro-batching, sem OpenAI e com o engine escolhido.
+
+    O caminho com o `MicroBatcher` é medido à parte (`api_process_batched`):
+    a espera da janela dominaria os tempos de `api_process`. Tudo é
+    restaurado na saída (os testes rodam o benchmark no mesmo processo).
+    """
+    from . import nlp, responders
+
+    overrides = {"RESULT_CACHE_ENABLED": False, "PERSISTENT_CACHE_ENABLED": False, "BATCHING_ENABLED": False}
+    if engine == "stub":
+        overrides["CLASSIFIER_ENGINE"] = "stub"
+    saved = {name: getattr(Config, name) for name in overrides}
+    saved_scorer, saved_key = nlp._scorer, responders.OPENAI_API_KEY
+    for name, value in overrides.items():
+        setattr(Config, name, value)
+    # Resposta só por template: a chamada à OpenAI mediria a rede, não o código
+    responders.OPENAI_API_KEY = None
+    if engine == "stub":
+        nlp._scorer = None
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(Config, name, value)
+        responders.OPENAI_API_KEY = saved_key
+        nlp._scorer = saved_scorer
+
+
+def build_cases() -> Dict[str, Callable[[], object]]:
+    """Casos medidos, cada um uma função sem argumentos."""
+    from fastapi.testclient import TestClient
+
+    from . import nlp
+    from .main import app
+    from .responders import TEMPLATES, _fill, suggest_reply
+    from .utils import read_text_from_file
+
+    texts = [s["text"] for s in load_corpus()]
+    email = next(t for t in texts if "status" in t.lower())
+    long_text = "\n\n".join(texts * max(1, 20000 // sum(len(t) for t in texts)))
+    txt_bytes = long_text.encode("utf-8")
+    pdf_bytes = make_pdf(email)
+    long_pdf_bytes = make_pdf(long_text)
+    category, intent = "Produtivo", "Solicitação de status ou acompanhamento"
+    template = TEMPLATES[(category, intent)]
+    context = {"nome": "Ana", "referencia": "#123", "arquivos": "relatorio.pdf"}
+    # Sem o lifespan: o aquecimento em segundo plano disputaria CPU com as medições
+    client = TestClient(app)
+
+    def api_process():
+        response = client.post("/api/process", data={"text": email})
+        response.raise_for_status()
+
+    def api_process_batched():
+        # Mesmo caminho passando pelo MicroBatcher (fila, janela e salto para o pool de CPU)
+        Config.BATCHING_ENABLED = True
+        try:
+            api_process()
+        finally:
+            Config.BATCHING_ENABLED = False
+
+    return {
+        "read_text_txt": lambda: read_text_from_file("email.txt", txt_bytes),
+        "read_text_pdf": lambda: read_text_from_file("email.pdf", pdf_bytes),
+        "read_text_pdf_long": lambda: read_text_from_file("email.pdf", long_pdf_bytes),
+        "preprocess": lambda: nlp.preprocess(email),
+        "preprocess_long": lambda: nlp.preprocess(long_text),
+        "rules": lambda: nlp._refine(email, category, intent),
+        "rules_long": lambda: nlp._refine(long_text, category, intent),
+        "fill_template": lambda: _fill(template, context),
+        "suggest_reply": lambda: suggest_reply(category, intent, context),
+        "classify_email": lambda: nlp.classify_email(email),
+        "api_process": api_process,
+        "api_process_batched": api_process_batched,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(engine: str = "stub", iterations: int = 50, alloc_iterations: int = 10,
+        only: Sequence[str] | None = None) -> Dict:
+    """Executa os casos e retorna o relatório (metadados + resultados por caso)."""
+    with isolated(engine):
+        cases = build_cases()
+        names = [n for n in cases if not only or n in only]
+        results = {}
+        for name in names:
+            results[name] = summarize(time_case(cases[name], iterations))
+            results[name].update(alloc_case(cases[name], alloc_iterations))
+            print(f"{name:<20} p50={results[name]['p50']:.3f}ms p95={results[name]['p95']:.3f}ms "
+                  f"p99={results[name]['p99']:.3f}ms alloc={results[name]['alloc_peak_kb']}KB")
+        meta = {
+            "commit": _git_commit(),
+            "engine": "stub" if engine == "stub" else Config.CLASSIFIER_ENGINE,
+            "model": None if engine == "stub" else Config.ZSL_MODEL,
+            "rules_first": Config.RULES_FIRST,
+            "cascade": Config.CASCADE_ENABLED,
+            "batch_window_ms": Config.BATCH_WINDOW_MS,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+            "alloc_iterations": alloc_iterations,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+    return {"meta": meta, "results": results}
+
+
+def compare(old: Dict, new: Dict, metric: str = "p50") -> List[Dict]:
+    """Variação de `metric` por caso entre dois relatórios (negativo = mais rápido)."""
+    rows = []
+    for name, current in new["results"].items():
+        before = old.get("results", {}).get(name)
+        if before is None:
+            continue
+        delta = (current[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+        rows.append({"case": name, "old": before[metric], "new": current[metric],
+                     "delta_pct": round(delta, 1)})
+    return rows
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks por estágio")
+    parser.add_argument("--engine", choices=["stub", "model"], default="stub",
+                        help="stub: scorer determinístico; model: CLASSIFIER_ENGINE configurado")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--alloc-iterations", type=int, default=10)
+    parser.add_argument("--case", action="append", default=[], help="Só este caso (pode repetir)")
+    parser.add_argument("--output", help="Arquivo JSON com o relatório")
+    parser.add_argument("--compare", help="Relatório anterior para comparar (p50)")
+    args = parser.parse_args(argv)
+
+    report = run(args.engine, args.iterations, args.alloc_iterations, args.case)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Relatório salvo em {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            old = json.load(f)
+        print(f"\nComparação com {args.compare} ({old['meta'].get('commit')}), p50 em ms:")
+        for row in compare(old, report):
+            print(f"{row['case']:<20} {row['old']:>10.3f} -> {row['new']:>10.3f}  ({row['delta_pct']:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,105 @@
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def normalize_text(text: str) -> str:
+    """Normalização usada na chave do cache.
+
+    Só remove diferenças que não alteram a classificação: espaços nas pontas,
+    quebras de linha Windows e formas Unicode equivalentes (NFC).
+    """
+    text = (text or "").replace("\r\n", "\n").strip()
+    return unicodedata.normalize("NFC", text)
+
+
+def content_key(text: str, namespace: str) -> str:
+    """Hash do texto normalizado + namespace (modelo, versão dos labels...)."""
+    digest = hashlib.sha256()
+    digest.update(namespace.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TTLCache:
+    """Cache LRU com expiração por tempo (TTL), seguro entre threads."""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600.0):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, value = entry
+            if self.ttl > 0 and expires < now:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_hit(self, key: str) -> Optional[Any]:
+        """Como `get`, mas só contabiliza acertos.
+
+        Para consultas antecipadas cujo miss segue para o caminho normal, que
+        consulta (e contabiliza) de novo.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (self.ttl > 0 and entry[0] < now):
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def shrink(self, fraction: float = 0.5) -> int:
+        """Remove a fração mais antiga (LRU) das entradas; retorna quantas saíram."""
+        with self._lock:
+            n = int(len(self._data) * fraction)
+            for _ in range(n):
+                self._data.popitem(last=False)
+            self.evictions += n
+            return n
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
@@ -6,10 +6,75 @@ class Config:
     MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 5 * 1024 * 1024))  # 5MB
     MAX_CHARS = int(os.getenv("MAX_CHARS", 10000))  # 10k caracteres
     MAX_PDF_SIZE = int(os.getenv("MAX_PDF_SIZE", 10 * 1024 * 1024))  # 10MB para PDFs
+    # Orçamento de tokens do modelo para o texto do e-mail (assunto + primeiras frases; 0 = sem limite)
+    INPUT_TOKEN_BUDGET = int(os.getenv("INPUT_TOKEN_BUDGET", 384))
+    # E-mails longos: "truncate" (orçamento acima) ou "chunk" (janelas sobrepostas + agregação)
+    LONG_TEXT_MODE = os.getenv("LONG_TEXT_MODE", "truncate")
+    LONG_TEXT_MAX_CHARS = int(os.getenv("LONG_TEXT_MAX_CHARS", 50000))  # Substitui MAX_CHARS no modo "chunk"
+    CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", 400))  # Tokens por janela
+    CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 64))  # Sobreposição entre janelas
+    CHUNK_AGGREGATION = os.getenv("CHUNK_AGGREGATION", "max")  # "max" ou "mean"
+    CHUNK_MAX_WINDOWS = int(os.getenv("CHUNK_MAX_WINDOWS", 16))
     
     # Configurações de modelo NLP
     ZSL_MODEL = os.getenv("ZSL_MODEL", "facebook/bart-large-mnli")
     ZSL_MODEL_FALLBACK = os.getenv("ZSL_MODEL_FALLBACK", "typeform/distilbert-base-uncased-mnli")
+    ZSL_HYPOTHESIS_TEMPLATE = os.getenv("ZSL_HYPOTHESIS_TEMPLATE", "This example is {}.")
+    # Engine de classificação: "fused" (um batch com todas as hipóteses), "pipeline" (HF original),
+    # "embedding" (bi-encoder) ou "stub" (determinístico, sem modelo: benchmarks e testes)
+    CLASSIFIER_ENGINE = os.getenv("CLASSIFIER_ENGINE", "fused")
+    # Precisão do modelo torch: "fp32", "int8" (quantização dinâmica) ou "bf16" (se a CPU suportar)
+    MODEL_PRECISION = os.getenv("MODEL_PRECISION", "fp32")
+    # Backend de inferência do scorer NLI: "torch" ou "onnx" (requer exportação prévia)
+    INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+    ONNX_DIR = os.getenv("ONNX_DIR", "artifacts/onnx")
+    # Snapshots locais em safetensors (python -m app.models.artifacts snapshot), carregados via mmap
+    MODEL_ARTIFACTS_DIR = os.getenv("MODEL_ARTIFACTS_DIR", "artifacts/models")
+    MODEL_VERIFY_CHECKSUM = os.getenv("MODEL_VERIFY_CHECKSUM", "true").lower() == "true"
+    MODEL_OFFLINE = os.getenv("MODEL_OFFLINE", "false").lower() == "true"  # Nunca acessa o hub
+    NLI_BATCH_SIZE = int(os.getenv("NLI_BATCH_SIZE", 32))  # Pares premissa/hipótese por forward
+    # Engine "embedding": bi-encoder com embeddings dos labels pré-computados
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".cache/embeddings")
+    EMBEDDING_TEMPERATURE = float(os.getenv("EMBEDDING_TEMPERATURE", 0.05))
+    # Modo hierárquico: pontua só as intenções da categoria quando a margem for suficiente
+    INTENT_PRUNING = os.getenv("INTENT_PRUNING", "false").lower() == "true"
+    INTENT_PRUNING_MARGIN = float(os.getenv("INTENT_PRUNING_MARGIN", 0.3))
+    # Ajuste da resposta do modelo pelas regras de palavras-chave (app/rules.py)
+    KEYWORD_OVERRIDES = os.getenv("KEYWORD_OVERRIDES", "true").lower() == "true"
+    # Regras decisivas (spam, agradecimento) avaliadas antes do modelo, que é pulado quando disparam
+    RULES_FIRST = os.getenv("RULES_FIRST", "false").lower() == "true"
+    # Cascata: classificador linear (NumPy) responde primeiro e escala para o modelo se a margem for baixa
+    CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "false").lower() == "true"
+    CASCADE_MARGIN = float(os.getenv("CASCADE_MARGIN", 0.3))
+    LINEAR_MODEL_PATH = os.getenv("LINEAR_MODEL_PATH", "artifacts/linear_model.npz")
+    
+    # Micro-batching: agrupa requisições concorrentes em uma chamada ao modelo
+    BATCHING_ENABLED = os.getenv("BATCHING_ENABLED", "true").lower() == "true"
+    BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 8))  # E-mails por lote
+    BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", 10))  # Espera máxima para formar um lote
+    BATCH_QUEUE_SIZE = int(os.getenv("BATCH_QUEUE_SIZE", 256))  # Acima disso responde 503
+    # Endpoint /api/process/batch: e-mails por requisição e por chamada ao classificador
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 500))
+    BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", 32))
+    # Lotes de uma requisição no pool de CPU ao mesmo tempo (0 = um por worker do pool)
+    BATCH_MAX_INFLIGHT_CHUNKS = int(os.getenv("BATCH_MAX_INFLIGHT_CHUNKS", 0))
+    
+    # Executores: etapas bloqueantes rodam fora do event loop
+    CPU_WORKERS = int(os.getenv("CPU_WORKERS", 2))  # Extração de PDF e inferência
+    IO_WORKERS = int(os.getenv("IO_WORKERS", 8))  # Chamadas à OpenAI
+    # Tarefas esperando thread em cada pool; acima disso responde 503 (0 = sem limite)
+    CPU_QUEUE_SIZE = int(os.getenv("CPU_QUEUE_SIZE", 64))
+    IO_QUEUE_SIZE = int(os.getenv("IO_QUEUE_SIZE", 256))
+    # Threads intra-op do torch/onnxruntime (0 = padrão ou resultado do autotune)
+    TORCH_THREADS = int(os.getenv("TORCH_THREADS", 0))
+    # Calibra threads do torch x CPU_WORKERS (lotes simultâneos) na inicialização (após o aquecimento)
+    AUTOTUNE_ENABLED = os.getenv("AUTOTUNE_ENABLED", "false").lower() == "true"
+    AUTOTUNE_SAMPLES = int(os.getenv("AUTOTUNE_SAMPLES", 8))  # E-mails do corpus por configuração
+    
+    # Aquecimento do modelo na inicialização (o /ready só responde 200 depois dele)
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_ROUNDS = int(os.getenv("WARMUP_ROUNDS", 2))  # Inferências de teste
     
     # Configurações de servidor
     HOST = os.getenv("HOST", "0.0.0.0")
@@ -17,10 +82,40 @@ class Config:
     
     # Configurações de memória
     ENABLE_MEMORY_CLEANUP = os.getenv("ENABLE_MEMORY_CLEANUP", "true").lower() == "true"
-    GC_THRESHOLD = int(os.getenv("GC_THRESHOLD", 100))  # Força GC a cada N operações
+    GC_THRESHOLD = int(os.getenv("GC_THRESHOLD", 10))  # Verifica o RSS a cada N operações
+    # Marcas de RSS (MB): acima da alta coleta/esvazia caches; abaixo da baixa volta ao normal (0 = desliga)
+    MEMORY_HIGH_WATERMARK_MB = float(os.getenv("MEMORY_HIGH_WATERMARK_MB", 3072))
+    MEMORY_LOW_WATERMARK_MB = float(os.getenv("MEMORY_LOW_WATERMARK_MB", 2560))
+    GC_FREEZE = os.getenv("GC_FREEZE", "true").lower() == "true"  # gc.freeze() após carregar o modelo
+    GC_GENERATION_THRESHOLDS = os.getenv("GC_GENERATION_THRESHOLDS", "50000,20,20")  # gc.set_threshold
+
+    # Métricas no formato Prometheus em /metrics (latência por etapa, contadores de cache/erros)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Profiling sob demanda: só com esta flag E o header "X-Profile: 1" na requisição
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "artifacts/profiles")
+    PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))  # Intervalo de amostragem
+    PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", 50))
+    # Alocações por etapa (tracemalloc) em uma fração das requisições + endpoints /debug/memory
+    MEMTRACE_ENABLED = os.getenv("MEMTRACE_ENABLED", "false").lower() == "true"
+    MEMTRACE_SAMPLE_RATE = float(os.getenv("MEMTRACE_SAMPLE_RATE", 0.01))  # 0.01 = 1% das requisições
+    MEMTRACE_FRAMES = int(os.getenv("MEMTRACE_FRAMES", 8))  # Profundidade dos tracebacks
+    MEMTRACE_TOP = int(os.getenv("MEMTRACE_TOP", 10))  # Linhas no relatório (retido ao fim da requisição e diffs)
+    MEMTRACE_MAX_REPORTS = int(os.getenv("MEMTRACE_MAX_REPORTS", 50))
+    MEMTRACE_MAX_SNAPSHOTS = int(os.getenv("MEMTRACE_MAX_SNAPSHOTS", 5))
     
     # Configurações de cache
     CACHE_MODEL = os.getenv("CACHE_MODEL", "true").lower() == "true"
+    # Cache de resultados de classificação por conteúdo (LRU + TTL)
+    RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 1024))  # Entradas
+    RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", 3600))  # Segundos (0 = sem expiração)
+    # Cache persistente em SQLite (WAL), compartilhado entre workers e entre deploys
+    PERSISTENT_CACHE_ENABLED = os.getenv("PERSISTENT_CACHE_ENABLED", "false").lower() == "true"
+    PERSISTENT_CACHE_PATH = os.getenv("PERSISTENT_CACHE_PATH", ".cache/autou_cache.sqlite3")
+    PERSISTENT_CACHE_TTL = float(os.getenv("PERSISTENT_CACHE_TTL", 7 * 24 * 3600))  # 7 dias
+    PERSISTENT_CACHE_MAX_ROWS = int(os.getenv("PERSISTENT_CACHE_MAX_ROWS", 100_000))  # Por tabela (0 = sem limite)
+    PERSISTENT_CACHE_PURGE_INTERVAL = float(os.getenv("PERSISTENT_CACHE_PURGE_INTERVAL", 300))  # Segundos
     
     # Configurações de logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
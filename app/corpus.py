@@ -0,0 +1,45 @@
+import codecs
+import os
+from typing import Dict, List
+
+# Raiz do repositório (onde ficam sample_emails/ e exemplos_teste/)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Rótulos esperados do corpus embutido (mesmos de tests/teste_completo.py)
+CORPUS_LABELS = {
+    "sample_emails/improdutivo_felicitacao.txt": ("Improdutivo", "Agradecimento ou felicitação"),
+    "sample_emails/improdutivo_spam.txt": ("Improdutivo", "Spam ou marketing"),
+    "sample_emails/produtivo_anexo.txt": ("Produtivo", "Envio de documentos ou arquivos importantes"),
+    "sample_emails/produtivo_status.txt": ("Produtivo", "Solicitação de status ou acompanhamento"),
+    "exemplos_teste/exemplo_status.txt": ("Produtivo", "Solicitação de status ou acompanhamento"),
+    "exemplos_teste/exemplo_reuniao.txt": ("Produtivo", "Agendamento de reunião ou compromisso"),
+    "exemplos_teste/exemplo_aprovacao.txt": ("Produtivo", "Aprovação ou autorização necessária"),
+    "exemplos_teste/exemplo_orcamento.txt": ("Produtivo", "Solicitação de orçamento ou proposta"),
+    "exemplos_teste/exemplo_convite.txt": ("Improdutivo", "Convite para evento ou treinamento"),
+    "exemplos_teste/exemplo_notificacao.txt": ("Improdutivo", "Notificação automática do sistema"),
+    "exemplos_teste/test_status.txt": ("Produtivo", "Solicitação de status ou acompanhamento"),
+}
+
+
+def _decode(raw: bytes) -> str:
+    """Decodifica respeitando BOM (alguns exemplos foram salvos em UTF-16)."""
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return raw.decode("utf-16")
+    return raw.decode("utf-8-sig", errors="ignore")
+
+
+def load_corpus(root: str = ROOT) -> List[Dict]:
+    """Carrega o corpus rotulado de sample_emails/ e exemplos_teste/.
+
+    Returns:
+        Lista de dicts com id (caminho relativo), text, category e intent
+    """
+    corpus = []
+    for rel, (category, intent) in CORPUS_LABELS.items():
+        path = os.path.join(root, rel)
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            text = _decode(f.read()).strip()
+        corpus.append({"id": rel, "text": text, "category": category, "intent": intent})
+    return corpus
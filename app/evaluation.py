@@ -0,0 +1,303 @@
+"""Avaliação de acurácia x latência entre configurações do classificador.
+
+    python -m app.evaluation --output eval.json --markdown docs/AVALIACAO.md
+    python -m app.evaluation --engine fused --engine embedding --budgets 128,384
+
+Roda o corpus rotulado (`sample_emails/`, `exemplos_teste/`, os mesmos casos
+de `tests/teste_completo.py`, mais JSONL extras com `--data`) em cada
+combinação de engine, modelo (ZSL_MODEL e ZSL_MODEL_FALLBACK), regras de
+palavras-chave ligadas/desligadas (`KEYWORD_OVERRIDES`) e orçamento de tokens
+da entrada (`INPUT_TOKEN_BUDGET`, 0 = sem corte).
+
+Para cada configuração registra acurácia de categoria e intenção, matrizes
+de confusão, latência por e-mail, tempo de carga do modelo e pico de RSS.
+As configurações que nenhuma outra supera ao mesmo tempo em acurácia e
+latência formam a fronteira de Pareto, marcada na tabela Markdown.
+"""
+import argparse
+import gc
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from itertools import product
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+import psutil
+
+from .config import Config
+from .corpus import load_corpus
+
+
+class PeakRSS:
+    """Maior RSS (MB) do processo durante o bloco, amostrado em uma thread."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._process = psutil.Process(os.getpid())
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self) -> None:
+        self.peak_mb = max(self.peak_mb, self._process.memory_info().rss / 1024 / 1024)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "PeakRSS":
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def load_dataset(paths: Sequence[str] = ()) -> List[Dict]:
+    """Corpus embutido + arquivos JSONL opcionais ({"text", "category", "intent"} por linha)."""
+    samples = load_corpus()
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for n, line in enumerate(f, start=1):
+                if line.strip():
+                    samples.append({"id": f"{path}:{n}", **json.loads(line)})
+    return samples
+
+
+def variants(engines: Sequence[str], models: Sequence[str], budgets: Sequence[int],
+             overrides: Sequence[bool]) -> List[Dict]:
+    """Combinações a avaliar, agrupadas por (engine, modelo) para carregar cada modelo uma vez."""
+    out = []
+    for engine in engines:
+        if engine == "embedding":
+            engine_models = [Config.EMBEDDING_MODEL]
+        elif engine == "stub":
+            engine_models = ["stub"]
+        else:
+            engine_models = list(models)
+        for model, budget, keyword in product(engine_models, budgets, overrides):
+            name = f"{engine}/{model.split('/')[-1]}/budget={budget or 'full'}/rules={'on' if keyword else 'off'}"
+            out.append({"name": name, "engine": engine, "model": model,
+                        "budget": budget, "overrides": keyword})
+    return out
+
+
+def _unload() -> None:
+    """Descarta o modelo carregado para que o próximo comece do zero (carga e RSS)."""
+    from . import nlp
+
+    nlp._scorer = None
+    nlp._zsl_cls = None
+    # Objetos congelados (gc.freeze) nunca são coletados: um modelo carregado com
+    # GC_FREEZE antes da avaliação continuaria no RSS das variantes seguintes
+    gc.unfreeze()
+    gc.collect()
+
+
+@contextmanager
+def configured(variant: Dict) -> Iterator[None]:
+    """Aplica a configuração da variante (sem caches) e restaura a anterior na saída."""
+    overrides = {
+        "CLASSIFIER_ENGINE": variant["engine"],
+        "INPUT_TOKEN_BUDGET": variant["budget"],
+        "KEYWORD_OVERRIDES": variant["overrides"],
+        "RESULT_CACHE_ENABLED": False,
+        "PERSISTENT_CACHE_ENABLED": False,
+        # Sem gc.freeze após a carga: o modelo precisa poder ser coletado em _unload
+        "GC_FREEZE": False,
+    }
+    if variant["engine"] == "embedding":
+        overrides["EMBEDDING_MODEL"] = variant["model"]
+    elif variant["engine"] != "stub":
+        # Fallback igual ao modelo: uma falha de carga não pode medir o outro modelo no lugar
+        overrides["ZSL_MODEL"] = overrides["ZSL_MODEL_FALLBACK"] = variant["model"]
+    saved = {name: getattr(Config, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(Config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(Config, name, value)
+
+
+def confusion(expected: Sequence[str], predicted: Sequence[str]) -> Dict[str, Dict[str, int]]:
+    """Matriz de confusão esparsa: rótulo esperado -> rótulo previsto -> contagem."""
+    matrix: Dict[str, Dict[str, int]] = {}
+    for truth, guess in zip(expected, predicted):
+        row = matrix.setdefault(truth, {})
+        row[guess] = row.get(guess, 0) + 1
+    return {truth: dict(sorted(row.items())) for truth, row in sorted(matrix.items())}
+
+
+def evaluate(variant: Dict, samples: Sequence[Dict]) -> Dict:
+    """Classifica o corpus com a variante já carregada/configurada e calcula as métricas."""
+    from . import nlp
+
+    report = dict(variant)
+    with configured(variant), PeakRSS() as rss:
+        start = time.perf_counter()
+        try:
+            nlp.get_scorer()
+        except Exception as e:
+            report["error"] = f"{type(e).__name__}: {e}"
+            return report
+        report["load_s"] = round(time.perf_counter() - start, 3)
+        nlp.classify_email(samples[0]["text"])  # aquecimento (não entra na latência)
+
+        latencies, predictions = [], []
+        for sample in samples:
+            start = time.perf_counter()
+            predictions.append(nlp.classify_email(sample["text"]))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    n = len(samples)
+    categories = [s["category"] for s in samples]
+    intents = [s["intent"] for s in samples]
+    ms = np.asarray(latencies)
+    report.update(
+        emails=n,
+        category_accuracy=round(sum(p["category"] == c for p, c in zip(predictions, categories)) / n, 4),
+        intent_accuracy=round(sum(p["intent"] == i for p, i in zip(predictions, intents)) / n, 4),
+        latency_ms={"mean": round(float(ms.mean()), 3), "p50": round(float(np.percentile(ms, 50)), 3),
+                    "p95": round(float(np.percentile(ms, 95)), 3), "max": round(float(ms.max()), 3)},
+        peak_rss_mb=round(rss.peak_mb, 1),
+        confusion={
+            "category": confusion(categories, [p["category"] for p in predictions]),
+            "intent": confusion(intents, [p["intent"] for p in predictions]),
+        },
+        errors=[s["id"] for s, p in zip(samples, predictions) if p["category"] == "Erro"],
+    )
+    return report
+
+
+def pareto(results: Sequence[Dict]) -> List[str]:
+    """Nomes das variantes não dominadas em (acurácia de categoria, de intenção, latência média).
+
+    Uma variante é dominada se outra é no mínimo tão boa nos três critérios
+    e estritamente melhor em algum.
+    """
+    ok = [r for r in results if "error" not in r]
+
+    def key(r):
+        return r["category_accuracy"], r["intent_accuracy"], -r["latency_ms"]["mean"]
+
+    front = []
+    for r in ok:
+        mine = key(r)
+        dominated = any(
+            all(a >= b for a, b in zip(key(o), mine)) and key(o) != mine
+            for o in ok if o is not r
+        )
+        if not dominated:
+            front.append(r["name"])
+    return front
+
+
+def run(variant_list: Sequence[Dict], samples: Sequence[Dict]) -> Dict:
+    """Avalia todas as variantes e devolve o relatório com a fronteira de Pareto."""
+    from . import nlp
+
+    saved = nlp._scorer, nlp._zsl_cls
+    results = []
+    loaded = None
+    failed: Dict[tuple, str] = {}
+    try:
+        for variant in variant_list:
+            key = variant["engine"], variant["model"]
+            if key in failed:
+                # O modelo já falhou ao carregar: não tenta de novo a cada variante
+                results.append({**variant, "error": failed[key]})
+                continue
+            if key != loaded:
+                _unload()
+                loaded = key
+            print(f"Avaliando {variant['name']}...")
+            results.append(evaluate(variant, samples))
+            if "error" in results[-1]:
+                failed[key] = results[-1]["error"]
+    finally:
+        _unload()
+        nlp._scorer, nlp._zsl_cls = saved
+    front = set(pareto(results))
+    for r in results:
+        r["pareto"] = r["name"] in front
+    meta = {
+        "emails": len(samples),
+        "rules_first": Config.RULES_FIRST,
+        "cascade": Config.CASCADE_ENABLED,
+        "long_text_mode": Config.LONG_TEXT_MODE,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    return {"meta": meta, "results": results}
+
+
+def markdown(report: Dict) -> str:
+    """Tabela Markdown das variantes, da mais rápida para a mais lenta (★ = Pareto)."""
+    lines = [
+        f"Corpus: {report['meta']['emails']} e-mails — {report['meta']['timestamp']}",
+        "",
+        "| Configuração | Categoria | Intenção | Média (ms) | p95 (ms) | Pico RSS (MB) | Carga (s) | Pareto |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    ok = sorted((r for r in report["results"] if "error" not in r), key=lambda r: r["latency_ms"]["mean"])
+    for r in ok:
+        lines.append(
+            f"| {r['name']} | {r['category_accuracy']:.1%} | {r['intent_accuracy']:.1%} "
+            f"| {r['latency_ms']['mean']:.1f} | {r['latency_ms']['p95']:.1f} "
+            f"| {r['peak_rss_mb']:.0f} | {r['load_s']:.1f} | {'★' if r['pareto'] else ''} |"
+        )
+    for r in report["results"]:
+        if "error" in r:
+            lines.append(f"| {r['name']} | — | — | — | — | — | — | erro: {r['error']} |")
+    return "\n".join(lines) + "\n"
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Acurácia x latência por configuração do classificador")
+    parser.add_argument("--engine", action="append", default=[],
+                        help="fused, pipeline, embedding ou stub (pode repetir; padrão: CLASSIFIER_ENGINE)")
+    parser.add_argument("--model", action="append", default=[],
+                        help="Modelo zero-shot (pode repetir; padrão: ZSL_MODEL e ZSL_MODEL_FALLBACK)")
+    parser.add_argument("--budgets", type=_int_list, default=None,
+                        help="Orçamentos de tokens separados por vírgula (0 = sem corte)")
+    parser.add_argument("--overrides", choices=["both", "on", "off"], default="both",
+                        help="Regras de palavras-chave ligadas, desligadas ou ambas")
+    parser.add_argument("--data", action="append", default=[],
+                        help="JSONL extra com e-mails rotulados (pode repetir)")
+    parser.add_argument("--output", help="Relatório JSON completo (com matrizes de confusão)")
+    parser.add_argument("--markdown", help="Tabela Markdown para versionar")
+    args = parser.parse_args(argv)
+
+    budgets = args.budgets or sorted({128, 256, Config.INPUT_TOKEN_BUDGET, 0}, key=lambda b: b or 10 ** 9)
+    overrides = {"both": [True, False], "on": [True], "off": [False]}[args.overrides]
+    variant_list = variants(args.engine or [Config.CLASSIFIER_ENGINE],
+                            args.model or [Config.ZSL_MODEL, Config.ZSL_MODEL_FALLBACK],
+                            budgets, overrides)
+    report = run(variant_list, load_dataset(args.data))
+
+    table = markdown(report)
+    print(table)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Relatório salvo em {args.output}")
+    if args.markdown:
+        with open(args.markdown, "w", encoding="utf-8") as f:
+            f.write(table)
+        print(f"Tabela salva em {args.markdown}")
+
+
+if __name__ == "__main__":
+    main()
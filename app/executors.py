@@ -0,0 +1,101 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from .config import Config
+
+
+class QueueFullError(RuntimeError):
+    """A fila do pool (ou do agendador de lotes) atingiu o limite configurado."""
+
+
+class BoundedExecutor(Executor):
+    """Pool de threads com fila limitada que contabiliza tarefas ativas e na fila.
+
+    Usado para tirar do event loop as etapas bloqueantes (extração de PDF,
+    inferência, chamada à OpenAI). Com `max_queue` > 0, `submit` recusa a
+    tarefa com QueueFullError quando já há `max_queue` tarefas esperando por
+    uma thread (a API responde 503) em vez de acumular trabalho sem limite.
+    A saturação (ativas / workers) e o tamanho da fila ficam disponíveis em
+    `stats()`. As tarefas rodam em um ThreadPoolExecutor interno, recriado
+    por `resize()`.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int = 0):
+        self.name = name
+        self.workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = self._new_pool(self.workers)
+        self._count_lock = threading.Lock()
+        self.active = 0
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _new_pool(self, workers: int) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"autou-{self.name}")
+
+    def submit(self, fn: Callable, /, *args, **kwargs):
+        with self._count_lock:
+            if self.max_queue and self.pending >= self.max_queue:
+                self.rejected += 1
+                raise QueueFullError(f"Fila do pool {self.name} cheia ({self.max_queue} tarefas)")
+            self.pending += 1
+
+        def tracked():
+            with self._count_lock:
+                self.pending -= 1
+                self.active += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._count_lock:
+                    self.active -= 1
+                    self.completed += 1
+
+        return self._pool.submit(tracked)
+
+    def resize(self, max_workers: int) -> None:
+        """Troca o pool por um com `max_workers` threads (usado pelo autotune).
+
+        As tarefas já enviadas terminam no pool antigo, que é encerrado sem
+        bloquear; as novas vão para o novo pool.
+        """
+        workers = max(1, max_workers)
+        if workers == self.workers:
+            return
+        old, self._pool = self._pool, self._new_pool(workers)
+        self.workers = workers
+        old.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Executa `fn` no pool sem bloquear o event loop (propagando contextvars)."""
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self, ctx.run, fn, *args)
+
+    def stats(self) -> Dict:
+        with self._count_lock:
+            return {
+                "workers": self.workers,
+                "active": self.active,
+                "queued": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "saturation": round(self.active / self.workers, 3),
+            }
+
+
+# Pool de CPU: extração de texto e inferência
+cpu_executor = BoundedExecutor("cpu", Config.CPU_WORKERS, Config.CPU_QUEUE_SIZE)
+# Pool de I/O: chamadas externas (OpenAI)
+io_executor = BoundedExecutor("io", Config.IO_WORKERS, Config.IO_QUEUE_SIZE)
+
+
+def executor_stats() -> Dict:
+    return {"cpu": cpu_executor.stats(), "io": io_executor.stats()}
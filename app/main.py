@@ -1,35 +1,104 @@
 import os
-import gc
+import asyncio
+from typing import Dict, List
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, Form, File, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 from app.utils import read_text_from_file
-from app.nlp import classify_email
+from app.nlp import cached_result, classify_email, classify_emails, result_cache, warmup
+from app.batching import MicroBatcher
+from app.executors import QueueFullError, cpu_executor, io_executor, executor_stats
+from app.memory import governor, parse_thresholds
+from app.warmup import ModelWarmup
+from app import autotune, memtrace, metrics, profiling
 from app.responders import suggest_reply
 from app.config import Config
 
-# Contador para limpeza de memória
-_operation_count = 0
+# GC guiado pelo RSS (app/memory.py) em vez de gc.collect() a cada requisição
+governor.tune_gc(parse_thresholds(Config.GC_GENERATION_THRESHOLDS))
 
-def cleanup_memory():
-    """Força limpeza de memória quando necessário"""
-    global _operation_count
-    _operation_count += 1
-    
-    if Config.ENABLE_MEMORY_CLEANUP and _operation_count >= Config.GC_THRESHOLD:
-        gc.collect()
-        _operation_count = 0
-        print(f"Limpeza de memória executada. Memória atual: {Config.get_memory_info()}")
+# Agendador de micro-batches na frente do classificador
+batcher = MicroBatcher(
+    classify_emails,
+    max_batch_size=Config.BATCH_MAX_SIZE,
+    max_wait_ms=Config.BATCH_WINDOW_MS,
+    max_queue=Config.BATCH_QUEUE_SIZE,
+    executor=cpu_executor,
+)
+
+# Gauges lidos na hora do scrape de /metrics
+metrics.registry.register(metrics.Gauge(
+    "process_resident_memory_bytes", "Memória residente do processo",
+    fn=lambda: Config.get_memory_info()["rss"] * 1024 * 1024))
+metrics.registry.register(metrics.Gauge(
+    "email_result_cache_entries", "Entradas no cache de resultados em memória", fn=lambda: len(result_cache)))
+for _pool in (cpu_executor, io_executor):
+    for _field, _help in (("queued", "tarefas aguardando na fila"), ("active", "tarefas em execução"),
+                          ("workers", "threads do pool"), ("saturation", "tarefas ativas / threads")):
+        metrics.registry.register(metrics.Gauge(
+            f"email_executor_{_pool.name}_{_field}", f"Pool {_pool.name}: {_help}",
+            fn=lambda pool=_pool, field=_field: pool.stats()[field]))
 
 PORT = Config.PORT
-MAX_CHARS = Config.MAX_CHARS
+# No modo de documento longo o texto inteiro é classificado em janelas
+MAX_CHARS = Config.LONG_TEXT_MAX_CHARS if Config.LONG_TEXT_MODE == "chunk" else Config.MAX_CHARS
 MAX_FILE_SIZE = Config.MAX_FILE_SIZE
 
-app = FastAPI(title="AutoU Email Classifier", description="Sistema de classificação e resposta automática de e-mails")
+# Extração de texto medida como etapa própria (roda no pool de CPU)
+read_text_timed = metrics.timed("extract", read_text_from_file)
+
+def prepare_model():
+    """Carrega e aquece o modelo e ajusta as threads de inferência (TORCH_THREADS/autotune)."""
+    warmup(Config.WARMUP_ROUNDS)
+    autotune.configure()
+
+
+# Estado do aquecimento do modelo (exposto em /ready)
+model_warmup = ModelWarmup(prepare_model)
+
+
+async def configure_threads():
+    """Sem aquecimento, aplica TORCH_THREADS/autotune em segundo plano (a calibração carrega o modelo)."""
+    try:
+        await cpu_executor.run(autotune.configure)
+    except Exception as e:
+        print(f"Erro ao configurar as threads de inferência: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Dispara o aquecimento do modelo em segundo plano sem atrasar o startup."""
+    task = None
+    if Config.WARMUP_ENABLED:
+        task = asyncio.create_task(model_warmup.run(cpu_executor))
+    else:
+        model_warmup.mark_ready()
+        if Config.TORCH_THREADS > 0 or Config.AUTOTUNE_ENABLED:
+            task = asyncio.create_task(configure_threads())
+    yield
+    if task is not None and not task.done():
+        task.cancel()
+
+
+app = FastAPI(
+    title="AutoU Email Classifier",
+    description="Sistema de classificação e resposta automática de e-mails",
+    lifespan=lifespan,
+)
+
+# Duração e status das requisições da API (/metrics)
+app.add_middleware(metrics.RequestMetrics)
+
+# Profiling sob demanda (PROFILING_ENABLED + header X-Profile)
+app.add_middleware(profiling.ProfilingMiddleware)
+
+# Alocações por etapa em uma amostra das requisições (MEMTRACE_ENABLED)
+app.add_middleware(memtrace.MemtraceMiddleware)
 
 # Configuração CORS
 app.add_middleware(
@@ -55,6 +124,52 @@ class ProcessResponse(BaseModel):
     intent_score: float
     suggested_reply: str
     reply_source: str
+    stage: str = "model"
+
+
+class BatchEmail(BaseModel):
+    """E-mail de uma requisição em lote."""
+    id: str | int
+    text: str
+
+
+class BatchItemResult(BaseModel):
+    """Resultado de um e-mail do lote: classificação e resposta, ou o erro daquele item."""
+    id: str | int
+    category: str | None = None
+    category_score: float | None = None
+    intent: str | None = None
+    intent_score: float | None = None
+    suggested_reply: str | None = None
+    reply_source: str | None = None
+    stage: str | None = None
+    error: str | None = None
+
+
+class BatchResponse(BaseModel):
+    """Resultados na mesma ordem dos e-mails enviados."""
+    results: List[BatchItemResult]
+
+
+def server_busy(e: QueueFullError) -> JSONResponse:
+    """Resposta 503 quando a fila de um pool (ou do batcher) está cheia."""
+    metrics.inc(metrics.ERRORS, kind="queue_full")
+    return JSONResponse(
+        {"detail": f"Servidor ocupado: {str(e)}"},
+        status_code=503
+    )
+
+
+def reply_context(filename: str | None = None) -> Dict:
+    """Contexto para geração de resposta."""
+    return {
+        "nome": "",
+        "referencia": "",
+        "status_atual": "em análise",
+        "sla": "2 dias úteis",
+        "arquivos": filename or "",
+        "perguntas_faltantes": "ambiente, passos para reproduzir, prints/logs",
+    }
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -65,16 +180,115 @@ def index(request: Request):
 
 @app.get("/health")
 def health():
-    """Endpoint de health check."""
-    cleanup_memory()
+    """Endpoint de health check (liveness: o processo está respondendo)."""
     memory_info = Config.get_memory_info()
     return {
         "status": "ok", 
         "service": "AutoU Email Classifier",
-        "memory": memory_info
+        "memory": memory_info,
+        "memory_governor": governor.stats(),
+        "executors": executor_stats(),
+        "batching": batcher.stats(),
+        "cache": result_cache.stats(),
+        "warmup": model_warmup.stats(),
+        "tuning": autotune.result,
+    }
+
+
+@app.get("/ready")
+def ready():
+    """Readiness: 200 só depois que o modelo foi carregado e aquecido."""
+    body = {"ready": model_warmup.ready, **model_warmup.stats()}
+    return JSONResponse(body, status_code=200 if model_warmup.ready else 503)
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Métricas no formato de texto do Prometheus."""
+    if not Config.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas desabilitadas (METRICS_ENABLED=false)")
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+def _profiles_enabled():
+    if not Config.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling desabilitado (PROFILING_ENABLED=false)")
+
+
+@app.get("/debug/profiles")
+def list_profiles():
+    """Perfis salvos, do mais recente para o mais antigo."""
+    _profiles_enabled()
+    return {"profiles": profiling.get_store().list()}
+
+
+@app.get("/debug/profiles/{profile_id}")
+def get_profile(profile_id: str, format: str = "collapsed"):
+    """Perfil de uma requisição: stacks colapsados (flamegraph.pl) ou JSON do speedscope."""
+    _profiles_enabled()
+    store = profiling.get_store()
+    try:
+        meta = store.meta(profile_id)
+        collapsed = store.collapsed(profile_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    if format == "speedscope":
+        return profiling.speedscope(collapsed, f"{meta['path']} {profile_id}", meta["interval_ms"] / 1000)
+    return PlainTextResponse(collapsed)
+
+
+def _memtrace_enabled():
+    if not Config.MEMTRACE_ENABLED:
+        raise HTTPException(status_code=404, detail="Rastreamento desabilitado (MEMTRACE_ENABLED=false)")
+
+
+@app.get("/debug/memory")
+def memory_reports():
+    """Relatórios de alocação das requisições amostradas (mais recentes primeiro)."""
+    _memtrace_enabled()
+    store = memtrace.get_store()
+    return {
+        "tracing": memtrace.is_tracing(),
+        "sample_rate": Config.MEMTRACE_SAMPLE_RATE,
+        "snapshots": [{"id": i, **store.describe(i)} for i in list(store.snapshots)],
+        "reports": store.summaries(),
     }
 
 
+@app.get("/debug/memory/reports/{report_id}")
+def memory_report(report_id: str):
+    """Relatório completo: alocação, pico e linhas que mais alocaram por etapa."""
+    _memtrace_enabled()
+    try:
+        return memtrace.get_store().report(report_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Relatório não encontrado")
+
+
+@app.post("/debug/memory/snapshots")
+def memory_snapshot():
+    """Snapshot das alocações do processo (o tracemalloc fica ligado até o DELETE)."""
+    _memtrace_enabled()
+    return memtrace.get_store().take_snapshot()
+
+
+@app.get("/debug/memory/diff")
+def memory_diff(base: str, target: str = "now", top: int = 20):
+    """Linhas que mais cresceram entre dois snapshots (ou entre um snapshot e agora)."""
+    _memtrace_enabled()
+    try:
+        return memtrace.get_store().diff(base, target, top)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Snapshot não encontrado: {e.args[0]}")
+
+
+@app.delete("/debug/memory/snapshots")
+def memory_clear_snapshots():
+    """Descarta os snapshots e desliga o tracemalloc (se nada mais o usa)."""
+    _memtrace_enabled()
+    return {"dropped": memtrace.get_store().clear_snapshots()}
+
+
 @app.post("/api/process", response_model=ProcessResponse)
 async def process_email(
     file: UploadFile | None = File(default=None), 
@@ -104,11 +318,14 @@ async def process_email(
                 )
             
             filename = file.filename
-            content = await file.read()
+            with metrics.stage("upload_read"), memtrace.stage("upload_read"):
+                content = await file.read()
             
             try:
-                raw, _ = read_text_from_file(filename, content)
+                with memtrace.stage("extract"):
+                    raw, _ = await cpu_executor.run(read_text_timed, filename, content)
             except ValueError as e:
+                metrics.inc(metrics.ERRORS, kind="extraction")
                 return JSONResponse(
                     {"detail": str(e)}, 
                     status_code=400
@@ -116,7 +333,6 @@ async def process_email(
             finally:
                 # Limpar conteúdo do arquivo da memória
                 content = None
-                gc.collect()
                 
         elif text:
             # Verificar tamanho do texto
@@ -124,22 +340,26 @@ async def process_email(
                 text = text[:MAX_CHARS]
             raw = text
         else:
+            metrics.inc(metrics.ERRORS, kind="empty_input")
             return JSONResponse(
                 {"detail": "Envie um arquivo .txt/.pdf ou cole o texto."}, 
                 status_code=400
             )
+    except QueueFullError as e:
+        return server_busy(e)
     except Exception as e:
+        metrics.inc(metrics.ERRORS, kind="input")
         return JSONResponse(
             {"detail": f"Erro no processamento: {str(e)}"}, 
             status_code=500
         )
     finally:
-        # Limpeza final de memória
+        # Liberar o conteúdo do arquivo
         content = None
-        gc.collect()
 
     # Validar conteúdo
     if not raw.strip():
+        metrics.inc(metrics.ERRORS, kind="empty_input")
         return JSONResponse(
             {"detail": "Conteúdo vazio após leitura."}, 
             status_code=400
@@ -151,32 +371,41 @@ async def process_email(
 
     # Classificar e-mail
     try:
-        clf = classify_email(raw)
+        with memtrace.stage("classify"):
+            if Config.BATCHING_ENABLED:
+                # Acerto no cache responde sem esperar a janela do batcher; só os misses entram na fila
+                clf = cached_result(raw)
+                if clf is None:
+                    clf = await batcher.submit(raw)
+            else:
+                clf = await cpu_executor.run(classify_email, raw)
+    except QueueFullError as e:
+        return server_busy(e)
     except Exception as e:
+        metrics.inc(metrics.ERRORS, kind="classification")
         return JSONResponse(
             {"detail": f"Erro na classificação: {str(e)}"}, 
             status_code=500
         )
 
     # Contexto para geração de resposta
-    context = {
-        "nome": "",
-        "referencia": "",
-        "status_atual": "em análise",
-        "sla": "2 dias úteis",
-        "arquivos": filename or "",
-        "perguntas_faltantes": "ambiente, passos para reproduzir, prints/logs",
-    }
+    context = reply_context(filename)
 
     # Gerar resposta sugerida
     try:
-        reply = suggest_reply(clf["category"], clf["intent"], context)
+        with memtrace.stage("reply"):
+            reply = await io_executor.run(suggest_reply, clf["category"], clf["intent"], context)
+    except QueueFullError as e:
+        return server_busy(e)
     except Exception as e:
+        metrics.inc(metrics.ERRORS, kind="reply")
         return JSONResponse(
             {"detail": f"Erro na geração de resposta: {str(e)}"}, 
             status_code=500
         )
 
+    metrics.inc(metrics.REPLY_SOURCE, source=reply["source"])
+
     # Retornar resultado da classificação
     try:
         return ProcessResponse(
@@ -186,21 +415,108 @@ async def process_email(
             intent_score=clf["intent_score"],
             suggested_reply=reply["reply"],
             reply_source=reply["source"],
+            stage=clf.get("stage", "model"),
         )
     except Exception as e:
-        # Log do erro e limpeza de memória
-        gc.collect()
+        metrics.inc(metrics.ERRORS, kind="internal")
         return JSONResponse(
             {"detail": f"Erro interno do servidor: {str(e)}"}, 
             status_code=500
         )
     finally:
-        # Limpeza final de memória
-        cleanup_memory()
+        # O governor coleta só quando o RSS passa da marca alta
+        governor.check()
         raw = None
         content = None
 
 
+
+@app.post("/api/process/batch", response_model=BatchResponse, response_model_exclude_none=True)
+async def process_batch(emails: List[BatchEmail]):
+    """Classifica vários e-mails em uma requisição (JSON: lista de {id, text}).
+
+    Acertos no cache em memória respondem direto; os demais e-mails são
+    ordenados por tamanho e classificados em lotes de BATCH_CHUNK_SIZE (textos
+    de tamanho parecido desperdiçam menos padding). No máximo
+    BATCH_MAX_INFLIGHT_CHUNKS lotes (e IO_WORKERS respostas) ocupam os pools
+    ao mesmo tempo, para que um lote grande não encha a fila dos executores.
+    Um e-mail com erro não derruba os demais: o erro vem no campo `error` do
+    próprio item.
+    """
+    if len(emails) > Config.BATCH_MAX_ITEMS:
+        metrics.inc(metrics.ERRORS, kind="batch_too_large")
+        return JSONResponse(
+            {"detail": f"Lote muito grande. Máximo permitido: {Config.BATCH_MAX_ITEMS} e-mails"},
+            status_code=413
+        )
+
+    results: List[BatchItemResult | None] = [None] * len(emails)
+    classified: Dict[int, Dict] = {}
+    texts: Dict[int, str] = {}
+    for i, email in enumerate(emails):
+        text = email.text[:MAX_CHARS]
+        if not text.strip():
+            metrics.inc(metrics.ERRORS, kind="empty_input")
+            results[i] = BatchItemResult(id=email.id, error="Conteúdo vazio.")
+            continue
+        # Acerto no cache não ocupa o pool de CPU; só os misses viram lotes
+        clf = cached_result(text)
+        if clf is None:
+            texts[i] = text
+        else:
+            classified[i] = clf
+
+    order = sorted(texts, key=lambda i: len(texts[i]))
+    chunks = [order[start:start + Config.BATCH_CHUNK_SIZE]
+              for start in range(0, len(order), max(1, Config.BATCH_CHUNK_SIZE))]
+    cpu_slots = asyncio.Semaphore(Config.BATCH_MAX_INFLIGHT_CHUNKS or cpu_executor.workers)
+
+    async def classify_chunk(chunk: List[int]):
+        async with cpu_slots:
+            return await cpu_executor.run(classify_emails, [texts[i] for i in chunk])
+
+    outcomes = await asyncio.gather(*(classify_chunk(chunk) for chunk in chunks), return_exceptions=True)
+
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, Exception):
+            metrics.inc(metrics.ERRORS, kind="classification")
+            for i in chunk:
+                results[i] = BatchItemResult(id=emails[i].id, error=f"Erro na classificação: {outcome}")
+            continue
+        for i, clf in zip(chunk, outcome):
+            if clf["category"] == "Erro":
+                results[i] = BatchItemResult(id=emails[i].id, error="Erro na classificação")
+            else:
+                classified[i] = clf
+
+    context = reply_context()
+    io_slots = asyncio.Semaphore(io_executor.workers)
+
+    async def reply_for(clf: Dict):
+        async with io_slots:
+            return await io_executor.run(suggest_reply, clf["category"], clf["intent"], context)
+
+    replies = await asyncio.gather(*(reply_for(clf) for clf in classified.values()), return_exceptions=True)
+    for (i, clf), reply in zip(classified.items(), replies):
+        if isinstance(reply, Exception):
+            metrics.inc(metrics.ERRORS, kind="reply")
+            results[i] = BatchItemResult(id=emails[i].id, error=f"Erro na geração de resposta: {reply}")
+            continue
+        metrics.inc(metrics.REPLY_SOURCE, source=reply["source"])
+        results[i] = BatchItemResult(
+            id=emails[i].id,
+            category=clf["category"],
+            category_score=clf["category_score"],
+            intent=clf["intent"],
+            intent_score=clf["intent_score"],
+            suggested_reply=reply["reply"],
+            reply_source=reply["source"],
+            stage=clf.get("stage", "model"),
+        )
+
+    governor.check()
+    return BatchResponse(results=results)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=PORT)
\ No newline at end of file
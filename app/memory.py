@@ -0,0 +1,127 @@
+import ctypes
+import ctypes.util
+import gc
+import threading
+from typing import Callable, Dict, List, Tuple
+
+from .config import Config
+
+
+def parse_thresholds(value: str) -> Tuple[int, ...]:
+    """Converte "50000,20,20" nos limiares das gerações do GC."""
+    return tuple(int(part) for part in value.split(",") if part.strip())
+
+
+def _load_malloc_trim():
+    # glibc: devolve ao sistema as páginas livres do heap após uma coleta
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        return libc.malloc_trim
+    except (OSError, AttributeError):
+        return None
+
+
+class MemoryGovernor:
+    """Controla a coleta de lixo pelo RSS do processo, em vez de a cada requisição.
+
+    Depois que o modelo é carregado, o heap é congelado (`gc.freeze`): os
+    milhões de objetos do torch/transformers saem das gerações do GC e as
+    coletas seguintes não os percorrem mais. O RSS é lido a cada
+    `check_interval` operações; acima de `high_mb` o governor coleta e, se
+    não bastar, esvazia parte dos caches registrados. Ele volta a agir
+    sozinho só depois que o RSS cai abaixo de `low_mb` (ou cresce mais um
+    intervalo entre as marcas, quando a memória restante é do próprio modelo).
+    """
+
+    def __init__(self, high_mb: float, low_mb: float, check_interval: int = 10,
+                 memory_info: Callable[[], Dict] = Config.get_memory_info,
+                 enabled: bool = True):
+        self.high_mb = high_mb
+        self.low_mb = min(low_mb, high_mb)
+        self.check_interval = max(1, check_interval)
+        self.memory_info = memory_info
+        self.enabled = enabled
+        self._caches: List = []
+        self._lock = threading.Lock()
+        self._operations = 0
+        self._floor = 0.0  # RSS após a última ação que não conseguiu descer abaixo da marca alta
+        self._malloc_trim = _load_malloc_trim()
+        self.last_rss = 0.0
+        self.frozen = 0
+        self.actions = {"checks": 0, "collections": 0, "evictions": 0, "freezes": 0}
+
+    def register_cache(self, cache) -> None:
+        """Registra um cache (com `shrink(fração)`) que pode ser esvaziado sob pressão."""
+        self._caches.append(cache)
+
+    def tune_gc(self, thresholds: Tuple[int, ...]) -> None:
+        """Ajusta os limiares das gerações (gen0 maior = menos coletas pequenas)."""
+        if thresholds:
+            gc.set_threshold(*thresholds)
+
+    def freeze(self) -> None:
+        """Congela o heap atual (chamado após carregar o modelo)."""
+        gc.collect()
+        gc.freeze()
+        with self._lock:
+            self.frozen = gc.get_freeze_count()
+            self.actions["freezes"] += 1
+
+    def _collect(self) -> None:
+        gc.collect()
+        if self._malloc_trim is not None:
+            self._malloc_trim(0)
+        self.actions["collections"] += 1
+
+    def check(self) -> bool:
+        """Conta uma operação e, a cada `check_interval`, age conforme o RSS.
+
+        Returns:
+            True se coletou ou esvaziou caches nesta chamada
+        """
+        if not self.enabled or self.high_mb <= 0:
+            return False
+        with self._lock:
+            self._operations += 1
+            if self._operations < self.check_interval:
+                return False
+            self._operations = 0
+            self.actions["checks"] += 1
+            rss = self.last_rss = self.memory_info()["rss"]
+            if rss <= self.low_mb:
+                self._floor = 0.0
+                return False
+            if rss < max(self.high_mb, self._floor + (self.high_mb - self.low_mb)):
+                return False
+
+            self._collect()
+            rss = self.last_rss = self.memory_info()["rss"]
+            if rss >= self.high_mb and self._caches:
+                for cache in self._caches:
+                    cache.shrink(0.5)
+                self.actions["evictions"] += 1
+                self._collect()
+                rss = self.last_rss = self.memory_info()["rss"]
+            # Se nem assim desceu, só age de novo quando o RSS crescer mais um intervalo
+            self._floor = rss if rss >= self.high_mb else 0.0
+            return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled and self.high_mb > 0,
+                "high_watermark_mb": self.high_mb,
+                "low_watermark_mb": self.low_mb,
+                "last_rss_mb": round(self.last_rss, 1),
+                "gc_thresholds": list(gc.get_threshold()),
+                "frozen_objects": self.frozen,
+                **self.actions,
+            }
+
+
+governor = MemoryGovernor(
+    Config.MEMORY_HIGH_WATERMARK_MB,
+    Config.MEMORY_LOW_WATERMARK_MB,
+    check_interval=Config.GC_THRESHOLD,
+    enabled=Config.ENABLE_MEMORY_CLEANUP,
+)
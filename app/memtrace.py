@@ -0,0 +1,289 @@
+"""Rastreamento de alocações por etapa com tracemalloc (`MEMTRACE_ENABLED=true`).
+
+O RSS de `/health` mostra que a memória cresce, mas não de onde vem. Com o
+rastreamento ligado, uma fração `MEMTRACE_SAMPLE_RATE` das requisições a
+`/api/process` roda com o tracemalloc ativo e gera um relatório com, para
+cada etapa (`upload_read`, `extract`, `classify`, `reply`), os bytes
+alocados e o pico, além do que continuou alocado ao fim da requisição e das
+linhas que o seguraram (candidatos a vazamento).
+
+As etapas só leem os contadores do tracemalloc (custo desprezível). Os dois
+snapshots completos (início e fim da requisição) e o diff entre eles rodam
+fora do event loop: pegar um snapshot com o tracemalloc ligado leva centenas
+de milissegundos e travaria as demais requisições.
+
+Endpoints de depuração (só com `MEMTRACE_ENABLED=true`):
+
+    GET    /debug/memory                         relatórios recentes
+    GET    /debug/memory/reports/{id}            relatório completo
+    POST   /debug/memory/snapshots               snapshot do processo (liga o tracemalloc)
+    GET    /debug/memory/diff?base=ID&target=ID  diferença entre snapshots (target=now: agora)
+    DELETE /debug/memory/snapshots               descarta snapshots e desliga o tracemalloc
+
+O tracemalloc é global ao processo: alocações de requisições concorrentes
+entram na mesma medição, e o rastreamento deixa as alocações mais lentas
+enquanto está ativo. Fora das requisições amostradas (e sem snapshots) ele
+fica desligado.
+"""
+import asyncio
+import contextvars
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+from .config import Config
+
+PATHS = ("/api/process",)
+
+_current: contextvars.ContextVar[Optional["RequestTrace"]] = contextvars.ContextVar("memtrace", default=None)
+_null = nullcontext()
+
+
+def _kb(size: int) -> float:
+    return round(size / 1024, 2)
+
+
+def top_sites(diff: List[tracemalloc.StatisticDiff], limit: int) -> List[Dict]:
+    """Linhas com maior crescimento de memória, em formato serializável."""
+    out = []
+    for stat in sorted(diff, key=lambda s: s.size_diff, reverse=True)[:limit]:
+        if stat.size_diff <= 0:
+            break
+        # O traceback vai do frame mais antigo ao mais recente (a linha que alocou)
+        frames = [f"{f.filename}:{f.lineno}" for f in reversed(stat.traceback)]
+        out.append({
+            "site": frames[0],
+            "size_kb": _kb(stat.size_diff),
+            "count": stat.count_diff,
+            "traceback": frames,
+        })
+    return out
+
+
+class Tracer:
+    """Liga o tracemalloc enquanto houver requisições amostradas ou snapshots guardados.
+
+    Se o tracemalloc já estava ativo por fora (ex.: PYTHONTRACEMALLOC), nunca é desligado aqui.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._owned = False
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(Config.MEMTRACE_FRAMES)
+                self._owned = True
+            self._users += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users == 0 and self._owned:
+                tracemalloc.stop()
+                self._owned = False
+
+
+tracer = Tracer()
+
+
+def _filtered(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+    # As alocações do próprio tracemalloc não interessam
+    return snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+class RequestTrace:
+    """Medições de memória de uma requisição amostrada.
+
+    `start` e `finish` tiram snapshots completos: o middleware os chama em
+    uma thread, fora do event loop.
+    """
+
+    def __init__(self, path: str):
+        self.id = uuid.uuid4().hex
+        self.path = path
+        self.created = time.time()
+        self.stages: List[Dict] = []
+        self._start: Optional[tracemalloc.Snapshot] = None
+        self._start_bytes = 0
+
+    def start(self) -> "RequestTrace":
+        """Liga o tracemalloc e guarda o estado inicial."""
+        tracer.acquire()
+        self._start_bytes = tracemalloc.get_traced_memory()[0]
+        self._start = _filtered(tracemalloc.take_snapshot())
+        return self
+
+    def stage(self, name: str) -> "_Stage":
+        return _Stage(self, name)
+
+    def finish(self, status: int) -> Dict:
+        """Fecha a medição: saldo retido ao fim da requisição e linhas que o seguraram."""
+        try:
+            retained = tracemalloc.get_traced_memory()[0] - self._start_bytes
+            end = _filtered(tracemalloc.take_snapshot())
+        finally:
+            tracer.release()
+        return {
+            "id": self.id,
+            "path": self.path,
+            "status": status,
+            "created": self.created,
+            "retained_kb": _kb(retained),
+            "stages": self.stages,
+            "retained_top": top_sites(end.compare_to(self._start, "traceback"), Config.MEMTRACE_TOP),
+        }
+
+
+class _Stage:
+    # Só contadores: roda no event loop, entre os awaits do handler
+    def __init__(self, trace: RequestTrace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self._bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def __exit__(self, *exc):
+        current, peak = tracemalloc.get_traced_memory()
+        self.trace.stages.append({
+            "stage": self.name,
+            "allocated_kb": _kb(current - self._bytes),
+            "peak_kb": _kb(peak - self._bytes),
+        })
+
+
+def is_tracing() -> bool:
+    return tracemalloc.is_tracing()
+
+
+def stage(name: str):
+    """Mede a etapa se a requisição atual estiver sendo rastreada (senão, não faz nada)."""
+    trace = _current.get()
+    return _null if trace is None else trace.stage(name)
+
+
+class ReportStore:
+    """Relatórios das requisições amostradas e snapshots manuais (em memória, por processo)."""
+
+    def __init__(self, max_reports: int = 50, max_snapshots: int = 5):
+        self.reports: deque = deque(maxlen=max_reports)
+        self.snapshots: "OrderedDict[str, Dict]" = OrderedDict()
+        self.max_snapshots = max_snapshots
+        self._lock = threading.Lock()
+
+    def add_report(self, report: Dict) -> None:
+        with self._lock:
+            self.reports.append(report)
+
+    def summaries(self) -> List[Dict]:
+        with self._lock:
+            reports = list(self.reports)
+        return [
+            {"id": r["id"], "path": r["path"], "status": r["status"], "created": r["created"],
+             "retained_kb": r["retained_kb"],
+             "stages": {s["stage"]: s["allocated_kb"] for s in r["stages"]}}
+            for r in reversed(reports)
+        ]
+
+    def report(self, report_id: str) -> Dict:
+        with self._lock:
+            for r in self.reports:
+                if r["id"] == report_id:
+                    return r
+        raise KeyError(report_id)
+
+    def take_snapshot(self) -> Dict:
+        """Snapshot do processo; o tracemalloc fica ligado enquanto houver snapshots."""
+        with self._lock:
+            if not self.snapshots:
+                tracer.acquire()
+            snapshot = _filtered(tracemalloc.take_snapshot())
+            snapshot_id = uuid.uuid4().hex[:12]
+            self.snapshots[snapshot_id] = {"snapshot": snapshot, "created": time.time(),
+                                           "traced_kb": _kb(tracemalloc.get_traced_memory()[0])}
+            while len(self.snapshots) > self.max_snapshots:
+                self.snapshots.popitem(last=False)
+        return {"id": snapshot_id, **self.describe(snapshot_id)}
+
+    def describe(self, snapshot_id: str) -> Dict:
+        entry = self.snapshots[snapshot_id]
+        return {"created": entry["created"], "traced_kb": entry["traced_kb"]}
+
+    def diff(self, base: str, target: str = "now", limit: int = 20) -> Dict:
+        """Linhas que mais cresceram entre dois snapshots (`target="now"`: estado atual)."""
+        with self._lock:
+            old = self.snapshots[base]["snapshot"]
+            if target == "now":
+                new = _filtered(tracemalloc.take_snapshot())
+            else:
+                new = self.snapshots[target]["snapshot"]
+        stats = new.compare_to(old, "traceback")
+        return {
+            "base": base,
+            "target": target,
+            "total_kb": _kb(sum(s.size_diff for s in stats)),
+            "top": top_sites(stats, limit),
+        }
+
+    def clear_snapshots(self) -> int:
+        with self._lock:
+            dropped = len(self.snapshots)
+            self.snapshots.clear()
+            if dropped:
+                tracer.release()
+        return dropped
+
+
+_store: Optional[ReportStore] = None
+
+
+def get_store() -> ReportStore:
+    """Retorna o repositório de relatórios, criando-o uma vez."""
+    global _store
+    if _store is None:
+        _store = ReportStore(Config.MEMTRACE_MAX_REPORTS, Config.MEMTRACE_MAX_SNAPSHOTS)
+    return _store
+
+
+class MemtraceMiddleware:
+    """Middleware ASGI: amostra requisições e rastreia suas alocações por etapa.
+
+    A requisição amostrada fica em um contextvar; `stage()` nos handlers
+    (e nas funções que eles rodam nos pools) mede só quando ele está definido.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or not Config.MEMTRACE_ENABLED or scope["path"] not in PATHS
+                or random.random() >= Config.MEMTRACE_SAMPLE_RATE):
+            await self.app(scope, receive, send)
+            return
+
+        loop = asyncio.get_running_loop()
+        # Snapshots completos em uma thread: o event loop segue atendendo as demais requisições
+        trace = await loop.run_in_executor(None, RequestTrace(scope["path"]).start)
+        token = _current.set(trace)
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            _current.reset(token)
+            get_store().add_report(await loop.run_in_executor(None, trace.finish, status))
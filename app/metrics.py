@@ -0,0 +1,247 @@
+"""Métricas em memória no formato de texto do Prometheus (`GET /metrics`).
+
+Implementação mínima, sem dependências: contadores, gauges e histogramas
+com buckets fixos. Registrar uma observação custa um `bisect` e um lock
+curto; a formatação do texto só acontece quando `/metrics` é lido.
+
+Cada processo (worker do uvicorn) tem seus próprios valores: com vários
+workers, o Prometheus vê o worker que atendeu o scrape.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from .config import Config
+
+# Buckets (segundos) dos histogramas de latência: de 0,5 ms a 30 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Contador monotônico, opcionalmente com labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Valor instantâneo; com `fn`, é lido na hora do scrape."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float] | None = None):
+        super().__init__(name, help)
+        self.fn = fn
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def value(self) -> float:
+        return self.fn() if self.fn is not None else self._value
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name} {_number(float(self.value()))}"]
+
+
+class Histogram(_Metric):
+    """Histograma com buckets fixos (contagens por bucket, soma e total)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # por label: [contagem por bucket (+Inf no fim)..., soma]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[idx] += 1
+            row[-1] += value
+
+    def count(self, **labels) -> int:
+        row = self._values.get(self._key(labels))
+        return sum(row[:-1]) if row else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = self.header()
+        for key, row in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(row[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas expostas em `/metrics`."""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.register(Histogram(
+    "email_request_seconds", "Duração das requisições da API", ["path"]))
+STAGE_SECONDS = registry.register(Histogram(
+    "email_stage_seconds", "Duração de cada etapa do processamento de um e-mail", ["stage"]))
+REQUESTS = registry.register(Counter(
+    "email_requests_total", "Requisições da API por status HTTP", ["path", "status"]))
+ERRORS = registry.register(Counter(
+    "email_errors_total", "Erros por categoria", ["kind"]))
+REPLY_SOURCE = registry.register(Counter(
+    "email_reply_source_total", "Respostas sugeridas por origem (template ou openai+template)", ["source"]))
+CLASSIFICATION_STAGE = registry.register(Counter(
+    "email_classification_stage_total", "E-mails classificados por estágio (model, rules, linear)", ["stage"]))
+CACHE = registry.register(Counter(
+    "email_cache_lookups_total", "Consultas aos caches de resultado", ["level", "result"]))
+MODEL_LOAD_SECONDS = registry.register(Gauge(
+    "email_model_load_seconds", "Tempo da última carga do scorer"))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Mede a duração do bloco no histograma `email_stage_seconds{stage=name}`."""
+    if not Config.METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=name)
+
+
+def timed(name: str, fn: Callable) -> Callable:
+    """Versão de `fn` medida como a etapa `name` (para rodar em um executor)."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with stage(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def inc(counter: Counter, **labels) -> None:
+    """Incrementa o contador se as métricas estiverem habilitadas."""
+    if Config.METRICS_ENABLED:
+        counter.inc(**labels)
+
+
+def route_label(scope) -> str:
+    """Template da rota que atendeu a requisição (ex.: `/api/jobs/{job_id}`).
+
+    O roteador do FastAPI grava a rota casada no `scope`; caminhos sem rota
+    (404) viram "other". Assim o número de séries do label `path` é limitado
+    pelas rotas da aplicação, não pelas URLs que os clientes enviam.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or "other"
+
+
+class RequestMetrics:
+    """Middleware ASGI que mede duração e status das requisições sob `prefix`.
+
+    ASGI puro (sem `BaseHTTPMiddleware`): só observa a mensagem de início da
+    resposta, sem bufferizar o corpo nem criar tarefas extras. O label `path`
+    é o template da rota (`route_label`), lido depois do roteamento.
+    """
+
+    def __init__(self, app, prefix: str = "/api/"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not Config.METRICS_ENABLED or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            path = route_label(scope)
+            REQUEST_SECONDS.observe(time.perf_counter() - start, path=path)
+            REQUESTS.inc(path=path, status=str(status))
@@ -0,0 +1,241 @@
+"""Snapshots locais dos modelos zero-shot em safetensors, carregados via mmap.
+
+Criação (uma vez, no build da imagem ou manualmente):
+
+    python -m app.models.artifacts snapshot          # ZSL_MODEL e ZSL_MODEL_FALLBACK
+    python -m app.models.artifacts verify
+
+Cada snapshot fica em `MODEL_ARTIFACTS_DIR/<modelo>` com os pesos em
+safetensors, tokenizer, config e um `manifest.json` com o SHA-256 de cada
+arquivo. Em produção `get_classifier` carrega o snapshot sem acessar o hub
+(`local_files_only`) e os pesos são mapeados em memória direto do arquivo
+(mmap copy-on-write): vários workers no mesmo host compartilham as páginas
+do page cache em vez de cada um manter uma cópia privada.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import struct
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..config import Config
+
+MANIFEST = "manifest.json"
+
+# dtypes do safetensors com equivalente no NumPy (BF16 não tem)
+_DTYPES = {
+    "F64": np.float64, "F32": np.float32, "F16": np.float16,
+    "I64": np.int64, "I32": np.int32, "I16": np.int16, "I8": np.int8,
+    "U8": np.uint8, "BOOL": np.bool_,
+}
+
+
+def snapshot_dir(base_dir: str, model_name: str) -> str:
+    """Diretório do snapshot (um subdiretório por nome de modelo)."""
+    return os.path.join(base_dir, model_name.replace("/", "__"))
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_manifest(path: str, model_name: str) -> Dict:
+    """Registra o SHA-256 de todos os arquivos do snapshot em `manifest.json`."""
+    files = {}
+    for name in sorted(os.listdir(path)):
+        full = os.path.join(path, name)
+        if name != MANIFEST and os.path.isfile(full):
+            files[name] = _sha256(full)
+    manifest = {"model": model_name, "created": time.time(), "files": files}
+    with open(os.path.join(path, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def verify(path: str) -> bool:
+    """Confere os arquivos do snapshot com os checksums do manifest."""
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return False
+    with open(manifest_path, encoding="utf-8") as f:
+        files = json.load(f).get("files", {})
+    if not files:
+        return False
+    for name, expected in files.items():
+        full = os.path.join(path, name)
+        if not os.path.exists(full) or _sha256(full) != expected:
+            print(f"Checksum inválido no snapshot {path}: {name}")
+            return False
+    return True
+
+
+def local_snapshot(model_name: str, base_dir: Optional[str] = None,
+                   check: Optional[bool] = None) -> Optional[str]:
+    """Caminho do snapshot local do modelo, ou None se não existe ou não confere."""
+    base_dir = base_dir if base_dir is not None else Config.MODEL_ARTIFACTS_DIR
+    if not base_dir:
+        return None
+    path = snapshot_dir(base_dir, model_name)
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding="utf-8") as f:
+        saved_model = json.load(f).get("model")
+    if saved_model != model_name:
+        # Diretório copiado/renomeado: servir outro modelo com o nome deste mudaria as respostas
+        print(f"Snapshot em {path} é de {saved_model}, não de {model_name}; ignorado")
+        return None
+    check = Config.MODEL_VERIFY_CHECKSUM if check is None else check
+    if check and not verify(path):
+        return None
+    return path
+
+
+def model_identity(config) -> str:
+    """Id e revisão do modelo efetivamente carregado ("nome@revisão").
+
+    Snapshot local: nome e hash dos checksums do `manifest.json`. Hub: nome e
+    commit do repositório (`_commit_hash`), quando o transformers o informa.
+    """
+    source = getattr(config, "_name_or_path", "") or "desconhecido"
+    manifest_path = os.path.join(source, MANIFEST)
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        files = json.dumps(manifest.get("files", {}), sort_keys=True).encode("utf-8")
+        return f"{manifest.get('model', source)}@{hashlib.sha256(files).hexdigest()[:12]}"
+    return f"{source}@{getattr(config, '_commit_hash', None) or 'desconhecida'}"
+
+
+def read_safetensors(path: str) -> Dict[str, np.ndarray]:
+    """Lê um arquivo safetensors como arrays NumPy mapeados em memória.
+
+    Formato: 8 bytes (little-endian) com o tamanho do cabeçalho JSON, o
+    cabeçalho (dtype, shape e offsets de cada tensor) e os dados. Os arrays
+    usam `np.memmap` em modo copy-on-write: nada é copiado para a memória do
+    processo até que um peso seja modificado.
+    """
+    with open(path, "rb") as f:
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len))
+    start = 8 + header_len
+    data = np.memmap(path, dtype=np.uint8, mode="c", offset=start) if os.path.getsize(path) > start else None
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = _DTYPES.get(info["dtype"])
+        if dtype is None:
+            raise ValueError(f"dtype {info['dtype']} não suportado via mmap ({name})")
+        begin, end = info["data_offsets"]
+        raw = data[begin:end] if data is not None else np.zeros(0, dtype=np.uint8)
+        tensors[name] = raw.view(dtype).reshape(info["shape"])
+    return tensors
+
+
+def snapshot(model_name: str, base_dir: str) -> str:
+    """Baixa o modelo do hub e salva um snapshot local em safetensors com manifest.
+
+    A escrita vai para um diretório temporário e só substitui o snapshot
+    anterior no final, então um snapshot incompleto nunca é carregado.
+    """
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    out_dir = snapshot_dir(base_dir, model_name)
+    tmp_dir = f"{out_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    # Um único arquivo de pesos: o mmap cobre o modelo inteiro
+    model.save_pretrained(tmp_dir, safe_serialization=True, max_shard_size="100GB")
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(tmp_dir)
+    write_manifest(tmp_dir, model_name)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return out_dir
+
+
+def load_model(path: str):
+    """Instancia o modelo do snapshot com os pesos mapeados em memória (sem rede).
+
+    O modelo é criado sem inicializar os pesos e os parâmetros são
+    substituídos (`assign=True`, torch>=2.1) por tensores que apontam para o
+    mmap do arquivo safetensors.
+    """
+    import inspect
+
+    import torch
+    from transformers import AutoConfig, AutoModelForSequenceClassification
+    from transformers.modeling_utils import no_init_weights
+
+    if "assign" not in inspect.signature(torch.nn.Module.load_state_dict).parameters:
+        raise RuntimeError(
+            f"torch {torch.__version__} não suporta load_state_dict(assign=True) "
+            f"(requer torch>=2.1); snapshot {path} não será usado"
+        )
+    config = AutoConfig.from_pretrained(path, local_files_only=True)
+    with no_init_weights():
+        model = AutoModelForSequenceClassification.from_config(config)
+
+    state = {}
+    for name in sorted(os.listdir(path)):
+        if name.endswith(".safetensors"):
+            state.update({k: torch.from_numpy(v) for k, v in read_safetensors(os.path.join(path, name)).items()})
+    if not state:
+        raise FileNotFoundError(f"Nenhum arquivo .safetensors em {path}")
+    _, unexpected = model.load_state_dict(state, strict=False, assign=True)
+    # Pesos compartilhados (ex.: embeddings) são salvos uma vez só e religados aqui
+    model.tie_weights()
+    # Todo parâmetro precisa apontar para o mmap; os demais ficaram sem inicializar
+    mapped = {t.data_ptr() for t in state.values()}
+    uninitialized = [n for n, p in model.named_parameters() if p.numel() and p.data_ptr() not in mapped]
+    if unexpected or uninitialized:
+        raise ValueError(
+            f"Snapshot incompatível em {path}: sem pesos {uninitialized}, sobrando {unexpected}"
+        )
+    model.eval()
+    return model
+
+
+def load_pipeline(path: str):
+    """Pipeline zero-shot a partir de um snapshot local (tokenizer e pesos offline)."""
+    from transformers import AutoTokenizer, pipeline
+
+    tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
+    return pipeline(
+        "zero-shot-classification",
+        model=load_model(path),
+        tokenizer=tokenizer,
+        device=-1,  # CPU
+    )
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Snapshots locais dos modelos zero-shot")
+    parser.add_argument("command", choices=["snapshot", "verify"])
+    parser.add_argument("models", nargs="*", help="Modelos do Hugging Face (padrão: ZSL_MODEL e ZSL_MODEL_FALLBACK)")
+    parser.add_argument("--output", default=Config.MODEL_ARTIFACTS_DIR, help="Diretório dos snapshots")
+    args = parser.parse_args(argv)
+
+    for name in args.models or [Config.ZSL_MODEL, Config.ZSL_MODEL_FALLBACK]:
+        if args.command == "snapshot":
+            print(f"Salvando snapshot de {name}...")
+            print(f"  -> {snapshot(name, args.output)}")
+        else:
+            path = snapshot_dir(args.output, name)
+            print(f"{name}: {'ok' if verify(path) else 'inválido ou ausente'} ({path})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import hashlib
+import os
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+from .nli import ranked
+
+# Recebe uma lista de textos e devolve uma matriz (n_textos, dim) de embeddings
+Embed = Callable[[List[str]], np.ndarray]
+
+
+def load_embedding_model(model_name: str, max_length: int = 256):
+    """Carrega tokenizer + encoder do Hugging Face e retorna (tokenizer, embed).
+
+    O embedding é a média dos estados ocultos ponderada pela attention mask
+    (mean pooling), como nos modelos sentence-transformers.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    def embed(texts: List[str]) -> np.ndarray:
+        batch = tokenizer(texts, padding=True, truncation=True,
+                          max_length=max_length, return_tensors="pt")
+        with torch.inference_mode():
+            hidden = model(**batch).last_hidden_state
+        mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+        return pooled.float().numpy()
+
+    return tokenizer, embed
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class EmbeddingScorer:
+    """Classificador bi-encoder: um forward por e-mail, labels pré-computados.
+
+    Os embeddings dos labels são calculados uma vez (e persistidos em disco,
+    com chave no nome do modelo e no texto dos labels); cada e-mail é
+    embutido uma única vez e comparado com todos os labels por similaridade
+    de cosseno vetorizada. O custo por requisição não cresce com o número de
+    labels. Os scores são um softmax das similaridades com temperatura, para
+    manter o mesmo formato (e faixa 0–1) do scorer NLI.
+    """
+
+    def __init__(self, tokenizer, embed: Embed, model_name: str,
+                 cache_dir: str | None = None, temperature: float = 0.05):
+        self.tokenizer = tokenizer
+        self.embed = embed
+        self.model_name = model_name
+        self.model_id = model_name
+        self.cache_dir = cache_dir
+        self.temperature = temperature
+        self._labels: Dict[str, np.ndarray] = {}
+
+    def _cache_path(self, labels: Sequence[str]) -> str | None:
+        if not self.cache_dir:
+            return None
+        key = hashlib.sha256("\n".join([self.model_name, *labels]).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key[:32]}.npy")
+
+    def precompute(self, labels: Sequence[str]) -> None:
+        """Carrega do disco (ou calcula e salva) os embeddings de um conjunto de labels."""
+        labels = list(labels)
+        path = self._cache_path(labels)
+        vectors = None
+        if path and os.path.exists(path):
+            try:
+                vectors = np.load(path)
+                if vectors.shape[0] != len(labels):
+                    vectors = None
+            except (OSError, ValueError):
+                vectors = None
+        if vectors is None:
+            vectors = _normalize(self.embed(labels)).astype(np.float32)
+            if path:
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    tmp = f"{path}.{os.getpid()}.tmp.npy"
+                    np.save(tmp, vectors)
+                    os.replace(tmp, path)
+                except OSError as e:
+                    print(f"Não foi possível salvar cache de embeddings em {path}: {e}")
+        for label, vec in zip(labels, vectors):
+            self._labels[label] = vec
+
+    def _label_matrix(self, labels: Sequence[str]) -> np.ndarray:
+        missing = [label for label in labels if label not in self._labels]
+        if missing:
+            self.precompute(missing)
+        return np.stack([self._labels[label] for label in labels])
+
+    def score(self, premises: Sequence[str],
+              groups: Dict[str, Sequence[str]]) -> List[Dict[str, Dict]]:
+        """Mesma interface do NLIScorer: grupo -> {"labels", "scores"} por texto."""
+        emails = _normalize(self.embed(list(premises)))
+        per_group = {}
+        for name, labels in groups.items():
+            sims = emails @ self._label_matrix(labels).T / self.temperature
+            sims -= sims.max(axis=1, keepdims=True)
+            exp = np.exp(sims)
+            per_group[name] = exp / exp.sum(axis=1, keepdims=True)
+        return [
+            {name: ranked(groups[name], per_group[name][i]) for name in groups}
+            for i in range(len(premises))
+        ]
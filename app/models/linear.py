@@ -0,0 +1,177 @@
+"""Classificador linear barato (TF-IDF com hashing + regressão softmax em NumPy).
+
+Primeiro estágio da cascata: responde em bem menos de 1 ms os e-mails fáceis
+e deixa para o modelo zero-shot apenas os casos com margem baixa. É treinado
+offline a partir dos e-mails rotulados e salvo como um `.npz` pequeno:
+
+    python -m app.models.linear --output artifacts/linear_model.npz
+"""
+import argparse
+import json
+import os
+import re
+import zlib
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .nli import ranked
+
+DEFAULT_FEATURES = 2 ** 16
+HEADS = ("category", "intent")
+
+_TOKEN = re.compile(r"\w+")
+
+
+def hashed_terms(text: str, n_features: int) -> Dict[int, float]:
+    """Conta unigramas e bigramas de palavras em um vetor de `n_features` posições.
+
+    O índice vem do CRC32 do termo (estável entre processos, ao contrário de
+    `hash`) e um bit do hash define o sinal, o que reduz o viés das colisões.
+    """
+    words = _TOKEN.findall((text or "").lower())
+    terms = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    counts: Dict[int, float] = {}
+    for term in terms:
+        h = zlib.crc32(term.encode("utf-8"))
+        idx = h % n_features
+        counts[idx] = counts.get(idx, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+    return counts
+
+
+class LinearClassifier:
+    """Regressão softmax sobre TF-IDF com hashing, uma cabeça por grupo de labels."""
+
+    def __init__(self, idf: np.ndarray, heads: Dict[str, Tuple[List[str], np.ndarray, np.ndarray]]):
+        self.idf = idf.astype(np.float32)
+        self.n_features = len(idf)
+        # cabeça -> (labels, pesos (n_labels, n_features), bias (n_labels,))
+        self.heads = heads
+
+    def features(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Vetor esparso (índices, valores) com TF sublinear × IDF, normalizado (L2)."""
+        counts = hashed_terms(text, self.n_features)
+        idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        raw = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        values = np.sign(raw) * np.log1p(np.abs(raw)) * self.idf[idx]
+        norm = np.linalg.norm(values)
+        return idx, values / norm if norm > 0 else values
+
+    def probabilities(self, text: str) -> Dict[str, np.ndarray]:
+        """Probabilidades de cada label (na ordem de `labels`) por cabeça."""
+        idx, values = self.features(text)
+        out = {}
+        for name, (_, weights, bias) in self.heads.items():
+            logits = weights[:, idx] @ values + bias
+            exp = np.exp(logits - logits.max())
+            out[name] = exp / exp.sum()
+        return out
+
+    def predict(self, text: str) -> Dict[str, Dict]:
+        """Scores por cabeça no formato do pipeline zero-shot ({"labels", "scores"})."""
+        probs = self.probabilities(text)
+        return {name: ranked(self.heads[name][0], probs[name]) for name in self.heads}
+
+    @classmethod
+    def train(cls, samples: Sequence[Dict], heads: Sequence[str] = HEADS,
+              n_features: int = DEFAULT_FEATURES, epochs: int = 30, lr: float = 0.5,
+              l2: float = 1e-4, seed: int = 0) -> "LinearClassifier":
+        """Treina com SGD sobre os vetores esparsos (memória proporcional aos termos, não ao vocabulário).
+
+        Args:
+            samples: dicts com "text" e um label para cada cabeça em `heads`
+        """
+        if not samples:
+            raise ValueError("Nenhum exemplo para treinar o classificador linear")
+        docs = [hashed_terms(s["text"], n_features) for s in samples]
+        df = np.zeros(n_features, dtype=np.float64)
+        for counts in docs:
+            df[list(counts)] += 1
+        idf = np.log((1 + len(docs)) / (1 + df)) + 1.0
+
+        model = cls(idf, {})
+        rows = [model.features(s["text"]) for s in samples]
+        rng = np.random.default_rng(seed)
+        for name in heads:
+            labels = sorted({s[name] for s in samples})
+            targets = [labels.index(s[name]) for s in samples]
+            weights = np.zeros((len(labels), n_features), dtype=np.float32)
+            bias = np.zeros(len(labels), dtype=np.float32)
+            for _ in range(epochs):
+                for i in rng.permutation(len(rows)):
+                    idx, values = rows[i]
+                    logits = weights[:, idx] @ values + bias
+                    grad = np.exp(logits - logits.max())
+                    grad /= grad.sum()
+                    grad[targets[i]] -= 1.0
+                    weights[:, idx] -= lr * (np.outer(grad, values) + l2 * weights[:, idx])
+                    bias -= lr * grad
+            model.heads[name] = (labels, weights, bias)
+        return model
+
+    def save(self, path: str) -> None:
+        """Salva em `.npz` comprimido (escrita atômica)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        arrays = {"idf": self.idf}
+        for name, (_, weights, bias) in self.heads.items():
+            arrays[f"{name}_weights"] = weights
+            arrays[f"{name}_bias"] = bias
+        meta = {name: labels for name, (labels, _, _) in self.heads.items()}
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(tmp, meta=np.array(json.dumps(meta, ensure_ascii=False)), **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LinearClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            heads = {
+                name: (labels, data[f"{name}_weights"], data[f"{name}_bias"])
+                for name, labels in meta.items()
+            }
+            return cls(data["idf"], heads)
+
+
+def margin(scores: Dict) -> float:
+    """Diferença entre o primeiro e o segundo score de um resultado ordenado."""
+    values = scores["scores"]
+    return values[0] - values[1] if len(values) > 1 else values[0]
+
+
+def _load_samples(paths: Sequence[str]) -> List[Dict]:
+    """Corpus embutido + arquivos JSONL opcionais ({"text", "category", "intent"} por linha)."""
+    from ..corpus import load_corpus
+
+    samples = load_corpus()
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            samples.extend(json.loads(line) for line in f if line.strip())
+    return samples
+
+
+def main(argv: List[str] | None = None) -> None:
+    from ..config import Config
+
+    parser = argparse.ArgumentParser(description="Treina o classificador linear da cascata")
+    parser.add_argument("--output", default=Config.LINEAR_MODEL_PATH)
+    parser.add_argument("--data", action="append", default=[],
+                        help="JSONL extra com e-mails rotulados (pode repetir)")
+    parser.add_argument("--features", type=int, default=DEFAULT_FEATURES)
+    parser.add_argument("--epochs", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    samples = _load_samples(args.data)
+    model = LinearClassifier.train(samples, n_features=args.features, epochs=args.epochs)
+    model.save(args.output)
+    report = {"output": args.output, "samples": len(samples),
+              "size_kb": round(os.path.getsize(args.output) / 1024, 1)}
+    for name in model.heads:
+        hits = sum(model.predict(s["text"])[name]["labels"][0] == s[name] for s in samples)
+        report[f"{name}_train_accuracy"] = round(hits / len(samples), 3)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+# Tipo de uma função de forward: recebe tensores numpy (input_ids, attention_mask...)
+# e devolve os logits NLI com shape (n_pares, n_classes_nli).
+Forward = Callable[[Dict[str, np.ndarray]], np.ndarray]
+
+DEFAULT_HYPOTHESIS_TEMPLATE = "This example is {}."
+
+
+def entailment_index(label2id: Dict[str, int]) -> int:
+    """Descobre o índice da classe 'entailment' na config do modelo MNLI."""
+    for label, idx in label2id.items():
+        if label.lower().startswith("entail"):
+            return int(idx)
+    return -1
+
+
+def torch_forward(model) -> Forward:
+    """Cria uma função de forward em PyTorch (CPU, sem gradiente)."""
+    import torch
+
+    model.eval()
+
+    def forward(inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        with torch.inference_mode():
+            out = model(**{k: torch.from_numpy(v) for k, v in inputs.items()})
+        # .float() cobre modelos em precisão reduzida (bf16 não converte para numpy)
+        return out.logits.float().numpy()
+
+    return forward
+
+
+class NLIScorer:
+    """Scorer zero-shot NLI que avalia todas as hipóteses em um único batch.
+
+    O pipeline `zero-shot-classification` do Hugging Face tokeniza o texto de
+    novo para cada hipótese e é chamado uma vez por conjunto de labels. Aqui o
+    texto é tokenizado uma única vez, as hipóteses são tokenizadas (e mantidas
+    em cache) na primeira utilização e todos os pares premissa/hipótese de
+    todos os grupos de labels seguem para o modelo em um batch com padding.
+    """
+
+    def __init__(self, tokenizer, forward: Forward, label2id: Dict[str, int],
+                 hypothesis_template: str = DEFAULT_HYPOTHESIS_TEMPLATE,
+                 max_length: int | None = None, batch_size: int = 32, model_id: str = ""):
+        self.tokenizer = tokenizer
+        self.model_id = model_id  # "nome@revisão" do modelo carregado (namespace do cache)
+        self.forward = forward
+        self.entailment_id = entailment_index(label2id)
+        self.hypothesis_template = hypothesis_template
+        model_max = getattr(tokenizer, "model_max_length", None) or 512
+        # Alguns tokenizers reportam model_max_length "infinito" (1e30)
+        self.max_length = int(min(max_length or model_max, model_max, 4096))
+        self.batch_size = max(1, int(batch_size))
+        self.input_names = list(getattr(tokenizer, "model_input_names", ["input_ids", "attention_mask"]))
+        self._hypothesis_ids: Dict[str, List[int]] = {}
+
+    def encode(self, text: str) -> List[int]:
+        """Tokeniza o texto (sem tokens especiais) uma única vez."""
+        return self.tokenizer(text, add_special_tokens=False)["input_ids"]
+
+    def _hypothesis(self, label: str) -> List[int]:
+        ids = self._hypothesis_ids.get(label)
+        if ids is None:
+            ids = self.encode(self.hypothesis_template.format(label))
+            self._hypothesis_ids[label] = ids
+        return ids
+
+    def _pair(self, premise_ids: List[int], label: str) -> Dict[str, List[int]]:
+        hyp_ids = self._hypothesis(label)
+        # Truncamento "only_first": apenas a premissa é cortada, como no pipeline
+        room = self.max_length - len(hyp_ids) - self.tokenizer.num_special_tokens_to_add(pair=True)
+        premise = premise_ids[:max(room, 0)]
+        pair = {"input_ids": self.tokenizer.build_inputs_with_special_tokens(premise, hyp_ids)}
+        if "token_type_ids" in self.input_names:
+            pair["token_type_ids"] = self.tokenizer.create_token_type_ids_from_sequences(premise, hyp_ids)
+        return pair
+
+    def _logits(self, pairs: List[Dict[str, List[int]]]) -> np.ndarray:
+        """Executa o modelo sobre os pares, em batches ordenados por tamanho."""
+        pad_id = self.tokenizer.pad_token_id or 0
+        order = sorted(range(len(pairs)), key=lambda i: len(pairs[i]["input_ids"]))
+        results: List[np.ndarray] = [None] * len(pairs)
+        for start in range(0, len(order), self.batch_size):
+            chunk = order[start:start + self.batch_size]
+            width = max(len(pairs[i]["input_ids"]) for i in chunk)
+            input_ids = np.full((len(chunk), width), pad_id, dtype=np.int64)
+            attention = np.zeros((len(chunk), width), dtype=np.int64)
+            token_types = np.zeros((len(chunk), width), dtype=np.int64)
+            for row, i in enumerate(chunk):
+                ids = pairs[i]["input_ids"]
+                input_ids[row, :len(ids)] = ids
+                attention[row, :len(ids)] = 1
+                if "token_type_ids" in pairs[i]:
+                    token_types[row, :len(ids)] = pairs[i]["token_type_ids"]
+            inputs = {"input_ids": input_ids, "attention_mask": attention}
+            if "token_type_ids" in self.input_names:
+                inputs["token_type_ids"] = token_types
+            logits = self.forward(inputs)
+            for row, i in enumerate(chunk):
+                results[i] = logits[row]
+        return np.stack(results) if results else np.zeros((0, 3), dtype=np.float32)
+
+    def score_ids(self, premises: Sequence[List[int]],
+                  groups: Dict[str, Sequence[str]]) -> List[Dict[str, np.ndarray]]:
+        """Retorna, para cada premissa já tokenizada, as probabilidades por grupo.
+
+        As probabilidades seguem a ordem dos labels de cada grupo e somam 1
+        dentro do grupo (softmax sobre o logit de entailment, como o pipeline
+        com multi_label=False).
+        """
+        pairs = []
+        for premise_ids in premises:
+            for labels in groups.values():
+                pairs.extend(self._pair(premise_ids, label) for label in labels)
+        logits = self._logits(pairs)
+
+        out = []
+        pos = 0
+        for _ in premises:
+            per_group = {}
+            for name, labels in groups.items():
+                entail = logits[pos:pos + len(labels), self.entailment_id].astype(np.float64)
+                pos += len(labels)
+                exp = np.exp(entail - entail.max())
+                per_group[name] = exp / exp.sum()
+            out.append(per_group)
+        return out
+
+    def windows(self, ids: List[int], window: int, overlap: int,
+                max_windows: int) -> List[List[int]]:
+        """Divide a premissa tokenizada em janelas sobrepostas.
+
+        A última janela sempre termina no fim do texto; acima de
+        `max_windows`, as janelas são amostradas de forma uniforme.
+        """
+        if len(ids) <= window:
+            return [ids]
+        step = max(1, window - overlap)
+        starts = list(range(0, len(ids) - window + 1, step))
+        if starts[-1] + window < len(ids):
+            starts.append(len(ids) - window)
+        if max_windows > 0 and len(starts) > max_windows:
+            picks = np.linspace(0, len(starts) - 1, max_windows).round().astype(int)
+            starts = [starts[i] for i in sorted(set(picks))]
+        return [ids[s:s + window] for s in starts]
+
+    def score_long(self, premises: Sequence[str], groups: Dict[str, Sequence[str]],
+                   window: int = 400, overlap: int = 64, aggregation: str = "max",
+                   max_windows: int = 16) -> List[Dict[str, Dict]]:
+        """Como `score`, mas cobre o texto inteiro com janelas de tokens.
+
+        Todas as janelas de todos os textos vão juntas para o modelo; os
+        scores por label são combinados entre janelas com "max" (o trecho
+        mais forte decide) ou "mean" e renormalizados dentro de cada grupo.
+        """
+        if aggregation not in ("max", "mean"):
+            raise ValueError(f"Agregação desconhecida: {aggregation}")
+        longest = max(len(self._hypothesis(label)) for labels in groups.values() for label in labels)
+        room = self.max_length - longest - self.tokenizer.num_special_tokens_to_add(pair=True)
+        window = max(1, min(window, room))
+
+        chunks: List[List[int]] = []
+        owners: List[int] = []
+        for idx, premise in enumerate(premises):
+            for chunk in self.windows(self.encode(premise), window, overlap, max_windows):
+                chunks.append(chunk)
+                owners.append(idx)
+        probs = self.score_ids(chunks, groups)
+
+        out = []
+        owners_arr = np.asarray(owners)
+        for idx in range(len(premises)):
+            rows = np.flatnonzero(owners_arr == idx)
+            per_group = {}
+            for name in groups:
+                stacked = np.stack([probs[r][name] for r in rows])
+                agg = stacked.max(axis=0) if aggregation == "max" else stacked.mean(axis=0)
+                per_group[name] = ranked(groups[name], agg / agg.sum())
+            out.append(per_group)
+        return out
+
+    def score(self, premises: Sequence[str],
+              groups: Dict[str, Sequence[str]]) -> List[Dict[str, Dict]]:
+        """Classifica vários textos contra vários grupos de labels de uma vez.
+
+        Retorna, para cada texto, um dicionário grupo -> {"labels", "scores"}
+        ordenado por score decrescente (mesmo formato do pipeline zero-shot).
+        """
+        probs = self.score_ids([self.encode(p) for p in premises], groups)
+        return [
+            {name: ranked(groups[name], p[name]) for name in groups}
+            for p in probs
+        ]
+
+
+def ranked(labels: Sequence[str], probs: np.ndarray) -> Dict:
+    """Ordena labels/scores de forma decrescente, no formato do pipeline."""
+    order = np.argsort(-np.asarray(probs), kind="stable")
+    return {
+        "labels": [labels[i] for i in order],
+        "scores": [float(probs[i]) for i in order],
+    }
+
+
+class PipelineScorer:
+    """Adapta o pipeline zero-shot do Hugging Face à interface do NLIScorer.
+
+    Mantém o comportamento original (uma chamada ao pipeline por grupo de
+    labels) para quem precisar comparar resultados com o scorer fundido.
+    """
+
+    def __init__(self, pipe, hypothesis_template: str = DEFAULT_HYPOTHESIS_TEMPLATE, model_id: str = ""):
+        self.pipe = pipe
+        self.model_id = model_id
+        self.tokenizer = pipe.tokenizer
+        self.hypothesis_template = hypothesis_template
+
+    def score(self, premises: Sequence[str],
+              groups: Dict[str, Sequence[str]]) -> List[Dict[str, Dict]]:
+        out = []
+        for premise in premises:
+            per_group = {}
+            for name, labels in groups.items():
+                res = self.pipe(premise, list(labels), multi_label=False,
+                                hypothesis_template=self.hypothesis_template)
+                per_group[name] = {"labels": list(res["labels"]),
+                                   "scores": [float(s) for s in res["scores"]]}
+            out.append(per_group)
+        return out
@@ -0,0 +1,148 @@
+"""Backend ONNX Runtime para o scorer NLI.
+
+Exportação (uma vez, no build ou manualmente):
+
+    python -m app.models.onnx_backend                # ZSL_MODEL e ZSL_MODEL_FALLBACK
+    python -m app.models.onnx_backend --output artifacts/onnx facebook/bart-large-mnli
+
+Em produção, com INFERENCE_BACKEND=onnx, o NLIScorer usa a sessão do
+onnxruntime (otimizações de grafo habilitadas) no lugar do PyTorch. Só o
+tokenizer do `transformers` é carregado; nenhum modelo PyTorch é instanciado.
+Sem o onnxruntime instalado, `app.nlp` avisa no log e usa o backend torch.
+"""
+import argparse
+import importlib.util
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from ..config import Config
+
+MODEL_FILE = "model.onnx"
+
+
+def available() -> bool:
+    """O onnxruntime está instalado? (dependência opcional)"""
+    return importlib.util.find_spec("onnxruntime") is not None
+
+
+def model_dir(base_dir: str, model_name: str) -> str:
+    """Diretório do modelo exportado (um subdiretório por nome de modelo)."""
+    return os.path.join(base_dir, model_name.replace("/", "__"))
+
+
+def export(model_name: str, base_dir: str, opset: int = 14) -> str:
+    """Exporta um modelo MNLI do Hugging Face para ONNX com eixos dinâmicos.
+
+    Salva também o tokenizer e a config (label2id) ao lado do `model.onnx`.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    out_dir = model_dir(base_dir, model_name)
+    os.makedirs(out_dir, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    if hasattr(model.config, "use_cache"):
+        model.config.use_cache = False
+    model.eval()
+
+    sample = tokenizer("Texto de exemplo.", "This example is a test.", return_tensors="pt")
+    names = [n for n in tokenizer.model_input_names if n in sample]
+
+    class _Logits(torch.nn.Module):
+        # Exporta apenas os logits, com as entradas na ordem de `names`
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *tensors):
+            return self.inner(**dict(zip(names, tensors))).logits
+
+    dynamic = {n: {0: "batch", 1: "sequence"} for n in names}
+    dynamic["logits"] = {0: "batch"}
+    with torch.inference_mode():
+        torch.onnx.export(
+            _Logits(model),
+            tuple(sample[n] for n in names),
+            os.path.join(out_dir, MODEL_FILE),
+            input_names=names,
+            output_names=["logits"],
+            dynamic_axes=dynamic,
+            opset_version=opset,
+        )
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+    return out_dir
+
+
+class SessionForward:
+    """Forward do NLIScorer sobre uma sessão do onnxruntime.
+
+    As threads intra-op são fixadas na criação da sessão: `set_threads`
+    (autotune) cria uma nova e a troca; chamadas em andamento terminam na
+    anterior.
+    """
+
+    def __init__(self, model_path: str, intra_op_threads: int = 0):
+        self.model_path = model_path
+        self.set_threads(intra_op_threads)
+
+    def set_threads(self, intra_op_threads: int) -> None:
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            opts.intra_op_num_threads = intra_op_threads
+        session = ort.InferenceSession(self.model_path, opts, providers=["CPUExecutionProvider"])
+        input_names: List[str] = [i.name for i in session.get_inputs()]
+        self.intra_op_threads = intra_op_threads
+        self._session = (session, input_names)
+
+    def __call__(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        session, input_names = self._session
+        feeds = {n: inputs[n] for n in input_names if n in inputs}
+        return session.run(["logits"], feeds)[0]
+
+
+def load(path: str, intra_op_threads: int = 0):
+    """Carrega um modelo exportado e retorna (tokenizer, forward, label2id).
+
+    Raises:
+        FileNotFoundError: se o modelo ainda não foi exportado
+        ImportError: se o onnxruntime não estiver instalado
+    """
+    model_path = os.path.join(path, MODEL_FILE)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(
+            f"Modelo ONNX não encontrado em {model_path}. Rode: python -m app.models.onnx_backend"
+        )
+    try:
+        import onnxruntime  # só confere a instalação; a sessão é criada em SessionForward
+    except ImportError as e:
+        raise ImportError("INFERENCE_BACKEND=onnx requer o pacote onnxruntime") from e
+    from transformers import AutoConfig, AutoTokenizer
+
+    forward = SessionForward(model_path, intra_op_threads)
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    label2id = AutoConfig.from_pretrained(path).label2id
+    return tokenizer, forward, label2id
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Exporta os modelos zero-shot para ONNX")
+    parser.add_argument("models", nargs="*", help="Modelos do Hugging Face (padrão: ZSL_MODEL e ZSL_MODEL_FALLBACK)")
+    parser.add_argument("--output", default=Config.ONNX_DIR, help="Diretório de saída")
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args(argv)
+
+    for name in args.models or [Config.ZSL_MODEL, Config.ZSL_MODEL_FALLBACK]:
+        print(f"Exportando {name}...")
+        print(f"  -> {export(name, args.output, opset=args.opset)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Modos de precisão reduzida para o classificador (int8 dinâmico e bf16).
+
+Verificação de concordância com fp32 no corpus embutido:
+
+    python -m app.models.precision --precision int8
+    python -m app.models.precision --precision bf16 --model typeform/distilbert-base-uncased-mnli
+"""
+import argparse
+import io
+import json
+import time
+from typing import Dict, List
+
+from ..config import Config
+
+PRECISIONS = ("fp32", "int8", "bf16")
+
+
+# Flags de CPU (Linux, /proc/cpuinfo) com instruções bf16 nativas
+BF16_CPU_FLAGS = ("avx512_bf16", "amx_bf16")
+
+
+def _cpu_flags(path: str = "/proc/cpuinfo") -> set:
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+def bf16_supported() -> bool:
+    """Indica se a CPU tem suporte nativo a bf16 (AVX512-BF16 ou AMX-BF16).
+
+    Usa as checagens do torch quando existem (`_is_amx_tile_supported` só a
+    partir do 2.2) e, no Linux, as flags de `/proc/cpuinfo`.
+    """
+    import torch
+
+    for name in ("_is_avx512_bf16_supported", "_is_amx_tile_supported"):
+        check = getattr(torch.cpu, name, None)
+        try:
+            if check is not None and check():
+                return True
+        except Exception:
+            pass
+    return any(flag in _cpu_flags() for flag in BF16_CPU_FLAGS)
+
+
+def int8_supported() -> bool:
+    """Indica se o torch tem um backend de quantização (fbgemm/x86 ou qnnpack)."""
+    import torch
+
+    engines = getattr(torch.backends.quantized, "supported_engines", [])
+    return any(engine != "none" for engine in engines)
+
+
+def apply_precision(model, precision: str):
+    """Converte o modelo para a precisão pedida e retorna o modelo resultante.
+
+    - "int8": quantização dinâmica das camadas Linear (pesos int8, ativações
+      quantizadas em tempo de execução), apenas se o torch tiver um backend de
+      quantização para a CPU; caso contrário (ou se a quantização falhar) o
+      modelo continua em fp32
+    - "bf16": pesos e ativações em bfloat16, apenas se a CPU suportar; caso
+      contrário o modelo continua em fp32
+    """
+    if precision in (None, "", "fp32"):
+        return model
+    if precision not in PRECISIONS:
+        raise ValueError(f"MODEL_PRECISION desconhecida: {precision}")
+    import torch
+
+    if precision == "int8":
+        if not int8_supported():
+            print("torch sem backend de quantização int8 nesta CPU; mantendo o modelo em fp32")
+            return model
+        try:
+            return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        except RuntimeError as e:
+            print(f"Falha na quantização int8 ({e}); mantendo o modelo em fp32")
+            return model
+    # bf16
+    if not bf16_supported():
+        print("CPU sem suporte a bf16; mantendo o modelo em fp32")
+        return model
+    return model.to(torch.bfloat16)
+
+
+def model_size_mb(model) -> float:
+    """Tamanho serializado do state_dict (inclui pesos quantizados empacotados)."""
+    import torch
+
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return buf.tell() / 1024 / 1024
+
+
+def _top_labels(scorer, texts: List[str]) -> List[Dict]:
+    from ..nlp import score_texts
+
+    out = []
+    for text in texts:
+        start = time.perf_counter()
+        res = score_texts(scorer, [text])[0]
+        out.append({
+            "category": res["category"]["labels"][0],
+            "intent": res["intent"]["labels"][0],
+            "latency_ms": (time.perf_counter() - start) * 1000,
+        })
+    return out
+
+
+def compare(precision: str, model_name: str | None = None) -> Dict:
+    """Compara a precisão reduzida com fp32 no corpus embutido.
+
+    Retorna a concordância de categoria e intenção (top-1 do modelo, antes do
+    refinamento por palavras-chave), latência média e tamanho dos pesos.
+    """
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    from ..corpus import load_corpus
+    from ..nlp import preprocess
+    from .nli import NLIScorer, torch_forward
+
+    model_name = model_name or Config.ZSL_MODEL
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    texts = [preprocess(item["text"]) for item in load_corpus()]
+
+    report = {"model": model_name, "precision": precision, "emails": len(texts)}
+    if precision == "bf16":
+        report["bf16_supported"] = bf16_supported()
+    runs = {}
+    for mode in ("fp32", precision):
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model = apply_precision(model, mode)
+        scorer = NLIScorer(tokenizer, torch_forward(model), model.config.label2id,
+                           hypothesis_template=Config.ZSL_HYPOTHESIS_TEMPLATE,
+                           batch_size=Config.NLI_BATCH_SIZE)
+        _top_labels(scorer, texts[:1])  # aquecimento
+        runs[mode] = _top_labels(scorer, texts)
+        report[f"{mode}_size_mb"] = round(model_size_mb(model), 1)
+        report[f"{mode}_latency_ms"] = round(sum(r["latency_ms"] for r in runs[mode]) / max(len(texts), 1), 1)
+        del model, scorer
+
+    base, reduced = runs["fp32"], runs[precision]
+    n = max(len(texts), 1)
+    report["category_agreement"] = sum(a["category"] == b["category"] for a, b in zip(base, reduced)) / n
+    report["intent_agreement"] = sum(a["intent"] == b["intent"] for a, b in zip(base, reduced)) / n
+    return report
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Concordância fp32 x precisão reduzida")
+    parser.add_argument("--precision", choices=PRECISIONS[1:], default="int8")
+    parser.add_argument("--model", default=None, help="Modelo (padrão: ZSL_MODEL)")
+    args = parser.parse_args(argv)
+    print(json.dumps(compare(args.precision, args.model), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
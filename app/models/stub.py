@@ -0,0 +1,35 @@
+import hashlib
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .nli import ranked
+
+
+class StubScorer:
+    """Scorer determinístico, sem modelo, com a mesma interface do NLIScorer.
+
+    O score de cada label vem do hash de (texto, label): o mesmo texto sempre
+    produz o mesmo resultado e nada é baixado ou carregado. Usado pelos
+    benchmarks (`python -m app.benchmark --engine stub`) para medir o resto
+    do caminho da requisição sem o custo e a variância do modelo.
+    """
+
+    tokenizer = None
+    model_id = "stub"
+
+    def _logit(self, premise: str, label: str) -> float:
+        digest = hashlib.sha256(f"{premise}\0{label}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "little") / 2 ** 32 * 4.0
+
+    def score(self, premises: Sequence[str],
+              groups: Dict[str, Sequence[str]]) -> List[Dict[str, Dict]]:
+        out = []
+        for premise in premises:
+            per_group = {}
+            for name, labels in groups.items():
+                logits = np.array([self._logit(premise, label) for label in labels])
+                exp = np.exp(logits - logits.max())
+                per_group[name] = ranked(labels, exp / exp.sum())
+            out.append(per_group)
+        return out
@@ -1,23 +1,47 @@
 import os
-import gc
-from typing import Dict, List
-import nltk
-from nltk.corpus import stopwords
-from transformers import pipeline
-
-# NLTK setup
-nltk.download("stopwords", quiet=True)
-STOP_PT = set(stopwords.words("portuguese"))
+import re
+import hashlib
+import threading
+import time
+from typing import Dict, List, Tuple
 
 from .config import Config
+from . import autotune, metrics, rules
+from .cache import TTLCache, content_key
+from .memory import governor
+from .persistent_cache import get_persistent_cache
+from .models import artifacts, onnx_backend
+from .models.embeddings import EmbeddingScorer, load_embedding_model
+from .models.linear import LinearClassifier, margin
+from .models.nli import NLIScorer, PipelineScorer, torch_forward
+from .models.precision import apply_precision
+from .models.stub import StubScorer
+
+
+def _load_stopwords() -> frozenset:
+    """Stopwords em português (lista do NLTK copiada em app/data/stopwords_pt.txt)."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "stopwords_pt.txt")
+    with open(path, encoding="utf-8") as f:
+        return frozenset(line.strip() for line in f if line.strip() and not line.startswith("#"))
+
+
+STOP_PT = _load_stopwords()
 
 # Lazy init (carrega uma vez)
+# Os locks evitam cargas duplicadas quando o aquecimento em segundo plano, a primeira
+# requisição e os lotes de /api/process/batch pedem o modelo ao mesmo tempo
+_classifier_lock = threading.Lock()
+_scorer_lock = threading.Lock()
+_linear_lock = threading.Lock()
 _zsl_cls = None
+_scorer = None
 _intent_cls = None
+_linear = None
+_linear_loaded = False
 
 LABELS_CATEGORY = ["Email produtivo que requer ação", "Email improdutivo sem necessidade de ação"]
 # Intenções mais específicas e convencionais para emails corporativos
-LABELS_INTENT = [
+LABELS_INTENT_PRODUTIVO = [
     # Produtivos - Requerem ação
     "Solicitação de status ou acompanhamento",
     "Pedido de informações ou esclarecimentos", 
@@ -27,7 +51,8 @@ LABELS_INTENT = [
     "Aprovação ou autorização necessária",
     "Cobrança ou follow-up de pendências",
     "Solicitação de orçamento ou proposta",
-    
+]
+LABELS_INTENT_IMPRODUTIVO = [
     # Improdutivos - Informativos ou sociais
     "Agradecimento ou felicitação",
     "Confirmação ou comunicado informativo",
@@ -36,38 +61,238 @@ LABELS_INTENT = [
     "Notificação automática do sistema",
     "Convite para evento ou treinamento"
 ]
+LABELS_INTENT = LABELS_INTENT_PRODUTIVO + LABELS_INTENT_IMPRODUTIVO
+
+# Versão do conjunto de labels (entra na chave do cache de resultados)
+LABELS_VERSION = hashlib.sha256("\n".join(LABELS_CATEGORY + LABELS_INTENT).encode("utf-8")).hexdigest()[:16]
+
+# Intenções que pertencem a cada label de categoria (usado no modo hierárquico)
+INTENTS_BY_CATEGORY = {
+    LABELS_CATEGORY[0]: LABELS_INTENT_PRODUTIVO,
+    LABELS_CATEGORY[1]: LABELS_INTENT_IMPRODUTIVO,
+}
+
+
+def _load_local_classifier(name: str):
+    """Carrega o snapshot local válido do modelo, sem rede (None se não houver)."""
+    path = artifacts.local_snapshot(name)
+    if path is None:
+        return None
+    try:
+        return artifacts.load_pipeline(path)
+    except Exception as e:
+        print(f"Erro ao carregar snapshot local {path}: {e}")
+        return None
+
+
+def _load_hub_classifier(name: str):
+    """Carrega o pipeline do modelo pelo hub do Hugging Face."""
+    if Config.MODEL_OFFLINE:
+        raise RuntimeError(
+            f"MODEL_OFFLINE=true e nenhum snapshot válido de {name} em {Config.MODEL_ARTIFACTS_DIR} "
+            f"(crie com: python -m app.models.artifacts snapshot)"
+        )
+    # Import tardio: o transformers (e o torch) só carregam na primeira classificação
+    from transformers import pipeline
+
+    return pipeline(
+        "zero-shot-classification",
+        model=name,
+        return_all_scores=True,
+        device=-1,  # CPU
+    )
+
+
+def _load_pipeline():
+    """Modelo principal (snapshot local, depois hub) e, se falhar, o fallback na mesma ordem.
+
+    Um snapshot local do fallback nunca passa na frente do modelo principal.
+    """
+    try:
+        return _load_local_classifier(Config.ZSL_MODEL) or _load_hub_classifier(Config.ZSL_MODEL)
+    except Exception as e:
+        print(f"Erro ao carregar modelo principal {Config.ZSL_MODEL}: {e}")
+        print(f"Tentando modelo fallback: {Config.ZSL_MODEL_FALLBACK}")
+    try:
+        return _load_local_classifier(Config.ZSL_MODEL_FALLBACK) or _load_hub_classifier(Config.ZSL_MODEL_FALLBACK)
+    except Exception as e2:
+        print(f"Erro ao carregar modelo fallback: {e2}")
+        raise e2
 
 
 def get_classifier():
     """Retorna o classificador zero-shot, inicializando apenas uma vez."""
     global _zsl_cls
     if _zsl_cls is None:
-        try:
-            _zsl_cls = pipeline(
-                "zero-shot-classification",
-                model=Config.ZSL_MODEL,
-                return_all_scores=True,
-                device=-1,  # CPU
-            )
-        except Exception as e:
-            print(f"Erro ao carregar modelo principal {Config.ZSL_MODEL}: {e}")
-            print(f"Tentando modelo fallback: {Config.ZSL_MODEL_FALLBACK}")
-            try:
-                _zsl_cls = pipeline(
-                    "zero-shot-classification",
-                    model=Config.ZSL_MODEL_FALLBACK,
-                    return_all_scores=True,
-                    device=-1,  # CPU
-                )
-            except Exception as e2:
-                print(f"Erro ao carregar modelo fallback: {e2}")
-                raise e2
-        finally:
-            # Limpeza de memória após carregamento
-            gc.collect()
+        with _classifier_lock:
+            if _zsl_cls is None:
+                _zsl_cls = _load_classifier()
     return _zsl_cls
 
 
+def _load_classifier():
+    """Carrega o pipeline zero-shot e aplica MODEL_PRECISION (chamado sob `_classifier_lock`)."""
+    # Snapshot local (safetensors via mmap) tem prioridade sobre o hub
+    clf = _load_pipeline()
+    precision = Config.MODEL_PRECISION
+    if precision == "bf16" and Config.CLASSIFIER_ENGINE == "pipeline":
+        # O pós-processamento do pipeline HF converte logits para numpy, o que falha em bf16
+        print("MODEL_PRECISION=bf16 requer CLASSIFIER_ENGINE=fused; mantendo fp32")
+    elif precision != "fp32":
+        clf.model = apply_precision(clf.model, precision)
+    return clf
+
+
+# Cache de resultados por conteúdo (LRU + TTL)
+result_cache = TTLCache(Config.RESULT_CACHE_SIZE, Config.RESULT_CACHE_TTL)
+governor.register_cache(result_cache)
+
+
+def cache_namespace(scorer=None) -> str:
+    """Tudo que altera o resultado além do texto: modelo, labels e modo de scoring.
+
+    O modelo é o que foi de fato carregado (id e revisão do scorer), não o
+    configurado: resultados do modelo fallback não são servidos depois como
+    se fossem do principal.
+    """
+    scorer = scorer if scorer is not None else get_scorer()
+    return "|".join([
+        getattr(scorer, "model_id", "") or type(scorer).__name__,
+        LABELS_VERSION,
+        Config.CLASSIFIER_ENGINE,
+        Config.INFERENCE_BACKEND,
+        Config.MODEL_PRECISION,
+        Config.ZSL_HYPOTHESIS_TEMPLATE,
+        f"budget={Config.INPUT_TOKEN_BUDGET}",
+        f"long={Config.LONG_TEXT_MODE}:{Config.CHUNK_TOKENS}:{Config.CHUNK_OVERLAP}:"
+        f"{Config.CHUNK_AGGREGATION}:{Config.CHUNK_MAX_WINDOWS}",
+        f"pruning={Config.INTENT_PRUNING}:{Config.INTENT_PRUNING_MARGIN}",
+        f"overrides={Config.KEYWORD_OVERRIDES}",
+        f"cascade={Config.CASCADE_ENABLED}:{Config.CASCADE_MARGIN}:{Config.LINEAR_MODEL_PATH}",
+    ])
+
+
+def _load_onnx():
+    """Carrega o modelo ONNX exportado, com o mesmo fallback de get_classifier.
+
+    Returns:
+        (tokenizer, forward, label2id, model_id), com o id do modelo que carregou,
+        ou None se o onnxruntime não estiver instalado (o chamador usa o torch)
+    """
+    if not onnx_backend.available():
+        print("INFERENCE_BACKEND=onnx, mas o onnxruntime não está instalado; usando o backend torch")
+        return None
+
+    def load(name):
+        path = onnx_backend.model_dir(Config.ONNX_DIR, name)
+        # Threads da sessão: TORCH_THREADS, autotune ou núcleos / workers do pool de CPU
+        tokenizer, forward, label2id = onnx_backend.load(path, intra_op_threads=autotune.inference_threads())
+        # Revisão: data da exportação (uma nova exportação invalida o cache)
+        exported = int(os.path.getmtime(os.path.join(path, onnx_backend.MODEL_FILE)))
+        return tokenizer, forward, label2id, f"{name}@onnx-{exported}"
+
+    try:
+        return load(Config.ZSL_MODEL)
+    except Exception as e:
+        print(f"Erro ao carregar modelo ONNX {Config.ZSL_MODEL}: {e}")
+        print(f"Tentando modelo fallback: {Config.ZSL_MODEL_FALLBACK}")
+        return load(Config.ZSL_MODEL_FALLBACK)
+
+
+def get_scorer():
+    """Retorna o scorer configurado em Config.CLASSIFIER_ENGINE, criando-o uma vez."""
+    global _scorer
+    if _scorer is None:
+        with _scorer_lock:
+            if _scorer is None:
+                start = time.perf_counter()
+                _scorer = _load_scorer(Config.CLASSIFIER_ENGINE)
+                metrics.MODEL_LOAD_SECONDS.set(time.perf_counter() - start)
+                if Config.GC_FREEZE:
+                    # O modelo vive até o fim do processo: tira seus objetos das coletas seguintes
+                    governor.freeze()
+    return _scorer
+
+
+def _load_scorer(engine: str):
+    """Cria o scorer do engine (chamado sob `_scorer_lock`)."""
+    if engine == "embedding":
+        tokenizer, embed = load_embedding_model(Config.EMBEDDING_MODEL)
+        scorer = EmbeddingScorer(
+            tokenizer,
+            embed,
+            Config.EMBEDDING_MODEL,
+            cache_dir=Config.EMBEDDING_CACHE_DIR,
+            temperature=Config.EMBEDDING_TEMPERATURE,
+        )
+        # Embeddings dos labels calculados (ou lidos do disco) na inicialização
+        scorer.precompute(LABELS_CATEGORY)
+        scorer.precompute(LABELS_INTENT)
+        return scorer
+    if engine == "stub":
+        # Determinístico e sem modelo (benchmarks e testes)
+        return StubScorer()
+    if engine == "pipeline" and Config.INFERENCE_BACKEND == "onnx" and onnx_backend.available():
+        # O backend ONNX só existe para o scorer fundido
+        print("CLASSIFIER_ENGINE=pipeline não tem backend ONNX; usando o engine fused (INFERENCE_BACKEND=onnx)")
+        engine = "fused"
+    if engine == "pipeline":
+        clf = get_classifier()
+        return PipelineScorer(clf, Config.ZSL_HYPOTHESIS_TEMPLATE,
+                              model_id=artifacts.model_identity(clf.model.config))
+    if engine == "fused":
+        onnx = _load_onnx() if Config.INFERENCE_BACKEND == "onnx" else None
+        if onnx is not None:
+            tokenizer, forward, label2id, model_id = onnx
+        else:
+            clf = get_classifier()
+            tokenizer, forward, label2id = clf.tokenizer, torch_forward(clf.model), clf.model.config.label2id
+            model_id = artifacts.model_identity(clf.model.config)
+        return NLIScorer(
+            tokenizer,
+            forward,
+            label2id,
+            hypothesis_template=Config.ZSL_HYPOTHESIS_TEMPLATE,
+            batch_size=Config.NLI_BATCH_SIZE,
+            model_id=model_id,
+        )
+    raise ValueError(f"CLASSIFIER_ENGINE desconhecido: {engine}")
+
+
+def get_linear_model():
+    """Retorna o classificador linear da cascata (ou None se o artefato não existe)."""
+    global _linear, _linear_loaded
+    if not _linear_loaded:
+        with _linear_lock:
+            if not _linear_loaded:
+                # Só marca como carregado depois de ler o artefato: se a leitura falhar,
+                # a próxima chamada tenta de novo em vez de desligar a cascata de vez
+                _linear = _load_linear()
+                _linear_loaded = True
+    return _linear
+
+
+def _load_linear():
+    """Lê o artefato do classificador linear (chamado sob `_linear_lock`)."""
+    path = Config.LINEAR_MODEL_PATH
+    if not os.path.exists(path):
+        print(f"Modelo linear não encontrado em {path}; cascata desativada "
+              f"(treine com: python -m app.models.linear)")
+        return None
+    return LinearClassifier.load(path)
+
+
+# Labels de categoria do classificador linear (os do corpus) -> labels do zero-shot
+_LINEAR_CATEGORY = {"Produtivo": LABELS_CATEGORY[0], "Improdutivo": LABELS_CATEGORY[1]}
+
+
+def _linear_scores(linear, text: str) -> Dict:
+    scores = linear.predict(text)
+    category = scores["category"]
+    category["labels"] = [_LINEAR_CATEGORY.get(label, label) for label in category["labels"]]
+    return scores
+
+
 def preprocess(text: str) -> str:
     """Pré-processa o texto removendo stopwords em português."""
     # minify
@@ -77,106 +302,303 @@ def preprocess(text: str) -> str:
     return " ".join(tokens) if tokens else text
 
 
-def classify_email(text: str) -> Dict:
-    """Classifica um e-mail em categoria e intenção usando zero-shot learning."""
+SUBJECT_PREFIXES = ("assunto:", "subject:")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+def select_input(text: str, tokenizer, budget: int) -> str:
+    """Seleciona o trecho do e-mail que cabe no orçamento de tokens do modelo.
+
+    Mantém a linha de assunto (se houver) e as primeiras frases até `budget`
+    tokens do tokenizer do modelo, descartando o resto antes do preprocess.
+    Como o texto é repetido para cada hipótese, isso limita o custo por
+    e-mail independentemente do tamanho da mensagem.
+    """
+    text = (text or "").strip()
+    # Cada token cobre ao menos um byte UTF-8 (no BPE byte-level do BART, um caractere
+    # acentuado ou emoji pode virar vários tokens): textos com até `budget` bytes cabem
+    # sem tokenizar
+    if budget <= 0 or tokenizer is None or len(text.encode("utf-8")) <= budget:
+        return text
+
+    def count(chunk: str) -> int:
+        return len(tokenizer(chunk, add_special_tokens=False)["input_ids"])
+
+    parts = []
+    used = 0
+    body = text
+    first_line = text.split("\n", 1)
+    if first_line[0].strip().lower().startswith(SUBJECT_PREFIXES):
+        parts.append(first_line[0].strip())
+        used = count(parts[0])
+        body = first_line[1] if len(first_line) > 1 else ""
+
+    for sentence in _SENTENCE_SPLIT.split(body):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        n = count(sentence)
+        if used + n > budget:
+            if not parts:
+                # Primeira frase já estoura o orçamento: corte proporcional, repetido
+                # enquanto a tokenização não for uniforme o bastante para caber
+                cut = sentence[:max(1, len(sentence) * budget // n)]
+                while len(cut) > 1 and count(cut) > budget:
+                    cut = cut[:max(1, min(len(cut) - 1, len(cut) * budget // count(cut)))]
+                parts.append(cut)
+            break
+        parts.append(sentence)
+        used += n
+    return "\n".join(parts)
+
+
+def long_text_mode(scorer) -> bool:
+    """Modo de documento longo ativo (e suportado pelo scorer)?"""
+    return Config.LONG_TEXT_MODE == "chunk" and hasattr(scorer, "score_long")
+
+
+def _score(scorer, texts: List[str], groups: Dict[str, List[str]]) -> List[Dict]:
+    # Uma etapa por passada do modelo: "model_category_intent" ou, no modo hierárquico,
+    # "model_category" seguida de "model_intent"
+    with metrics.stage("model_" + "_".join(groups)):
+        if long_text_mode(scorer):
+            return scorer.score_long(
+                texts,
+                groups,
+                window=Config.CHUNK_TOKENS,
+                overlap=Config.CHUNK_OVERLAP,
+                aggregation=Config.CHUNK_AGGREGATION,
+                max_windows=Config.CHUNK_MAX_WINDOWS,
+            )
+        return scorer.score(texts, groups)
+
+
+def score_texts(scorer, texts: List[str]) -> List[Dict]:
+    """Pontua categoria e intenção para textos já pré-processados.
+
+    No modo padrão as 2 + 14 hipóteses vão juntas para o scorer. Com
+    Config.INTENT_PRUNING, a categoria é pontuada primeiro e, quando a margem
+    entre as duas categorias é suficiente, só as intenções daquela categoria
+    são avaliadas; caso contrário, todas as 14 são avaliadas.
+    """
+    if not Config.INTENT_PRUNING:
+        return _score(scorer, texts, {"category": LABELS_CATEGORY, "intent": LABELS_INTENT})
+
+    results = _score(scorer, texts, {"category": LABELS_CATEGORY})
+    by_labels: Dict[tuple, List[int]] = {}
+    for i, res in enumerate(results):
+        cat = res["category"]
+        labels = LABELS_INTENT
+        if cat["scores"][0] - cat["scores"][1] >= Config.INTENT_PRUNING_MARGIN:
+            labels = INTENTS_BY_CATEGORY[cat["labels"][0]]
+        by_labels.setdefault(tuple(labels), []).append(i)
+
+    for labels, idxs in by_labels.items():
+        intents = _score(scorer, [texts[i] for i in idxs], {"intent": list(labels)})
+        for i, res in zip(idxs, intents):
+            results[i]["intent"] = res["intent"]
+    return results
+
+
+def _refine(text: str, category: str, top_intent: str) -> Tuple[str, str]:
+    """Ajusta categoria e intenção do modelo com regras de palavras-chave."""
+    # Uma única passada sobre o texto conta as ocorrências de todos os grupos
+    with metrics.stage("rules"):
+        return rules.refine(rules.EMAIL_RULES.count(text), category, top_intent)
+
+
+def _error_result() -> Dict:
+    metrics.inc(metrics.ERRORS, kind="classification")
+    return {
+        "category": "Erro",
+        "intent": "Erro no processamento",
+        "category_score": 0.0,
+        "intent_score": 0.0,
+        "processed": "",
+    }
+
+
+def _build_result(text: str, processed: str, scores: Dict, stage: str = "model") -> Dict:
+    """Monta o resultado de um e-mail a partir dos scores de um estágio (modelo ou linear)."""
+    # Categoria (binária)
+    cat = scores["category"]
+    category_raw = cat["labels"][0]
+    # Mapear para labels simples
+    category = "Produtivo" if "produtivo que requer" in category_raw else "Improdutivo"
+    cat_score = float(cat["scores"][0])
+
+    # Intenção (top‑1)
+    intent = scores["intent"]
+    top_intent = intent["labels"][0]
+    intent_score = float(intent["scores"][0])
+
+    if Config.KEYWORD_OVERRIDES:
+        category, top_intent = _refine(text, category, top_intent)
+
+    metrics.inc(metrics.CLASSIFICATION_STAGE, stage=stage)
+    return {
+        "category": category,
+        "category_score": cat_score,
+        "intent": top_intent,
+        "intent_score": intent_score,
+        "processed": processed,
+        "stage": stage,
+    }
+
+
+def _rules_result(text: str, category: str, intent: str, confidence: float) -> Dict:
+    """Resultado decidido só pelas regras de palavras-chave, sem o modelo."""
+    metrics.inc(metrics.CLASSIFICATION_STAGE, stage="rules")
+    return {
+        "category": category,
+        "category_score": confidence,
+        "intent": intent,
+        "intent_score": confidence,
+        "processed": preprocess(text),
+        "stage": "rules",
+    }
+
+
+def _remember(key: str | None, result: Dict, persistent) -> None:
+    """Guarda o resultado nos caches em memória e persistente (quando habilitados)."""
+    if key is None:
+        return
+    if Config.RESULT_CACHE_ENABLED:
+        result_cache.set(key, dict(result))
+    if persistent is not None:
+        persistent.set_classification(key, result)
+
+
+def cached_result(text: str) -> Dict | None:
+    """Resultado do cache em memória para o texto, sem passar pelo micro-batching.
+
+    Um acerto responde na hora, sem a janela do batcher nem o salto para o
+    pool de CPU; um miss segue para `classify_emails` (que consulta de novo,
+    incluindo o cache persistente, e contabiliza o miss).
+    """
+    # Sem modelo carregado ainda não há o que servir (e a carga não roda no event loop)
+    if not Config.RESULT_CACHE_ENABLED or _scorer is None:
+        return None
+    cached = result_cache.get_hit(content_key(text, cache_namespace(_scorer)))
+    if cached is None:
+        return None
+    metrics.inc(metrics.CACHE, level="memory", result="hit")
+    return dict(cached)
+
+
+def classify_emails(texts: List[str]) -> List[Dict]:
+    """Classifica vários e-mails com uma única chamada ao scorer.
+
+    Resultados já vistos (mesmo texto normalizado, modelo e labels) vêm do
+    cache sem passar pelo modelo. Com `RULES_FIRST`, e-mails em que uma regra
+    decisiva (spam, agradecimento) dispara também não passam pelo modelo; com
+    `CASCADE_ENABLED`, o classificador linear responde os e-mails em que tem
+    margem suficiente. Se o lote falhar, cada e-mail é reclassificado
+    isoladamente para que um item problemático não derrube os demais.
+    """
+    results: List[Dict | None] = [None] * len(texts)
+    keys: List[str | None] = [None] * len(texts)
+    persistent = get_persistent_cache()
+    namespace = None
+    if Config.RESULT_CACHE_ENABLED or persistent is not None:
+        try:
+            namespace = cache_namespace()
+        except Exception as e:
+            # Sem modelo não há namespace: segue sem cache (a classificação reporta o erro)
+            print(f"Cache de resultados indisponível: {e}")
+    if namespace is not None:
+        for i, text in enumerate(texts):
+            keys[i] = content_key(text, namespace)
+            cached = None
+            if Config.RESULT_CACHE_ENABLED:
+                cached = result_cache.get(keys[i])
+                metrics.inc(metrics.CACHE, level="memory", result="miss" if cached is None else "hit")
+            if cached is None and persistent is not None:
+                # Segundo nível: compartilhado entre workers e entre deploys
+                cached = persistent.get_classification(keys[i])
+                metrics.inc(metrics.CACHE, level="persistent", result="miss" if cached is None else "hit")
+                if cached is not None and Config.RESULT_CACHE_ENABLED:
+                    result_cache.set(keys[i], cached)
+            if cached is not None:
+                results[i] = dict(cached)
+
+    pending = [i for i, res in enumerate(results) if res is None]
+    if Config.RULES_FIRST and Config.KEYWORD_OVERRIDES:
+        # Regras antes do modelo: o override substituiria a resposta dele de qualquer forma.
+        # Não vai para o cache: refazer a contagem custa menos que ocupar uma entrada.
+        with metrics.stage("rules_first"):
+            for i in pending:
+                decided = rules.decide(rules.EMAIL_RULES.count(texts[i]))
+                if decided is not None:
+                    results[i] = _rules_result(texts[i], *decided)
+        pending = [i for i in pending if results[i] is None]
+    if Config.CASCADE_ENABLED and pending:
+        try:
+            linear = get_linear_model()
+            # Primeiro estágio barato: só escala para o modelo quando a margem é baixa
+            for i in (pending if linear is not None else []):
+                with metrics.stage("linear"):
+                    scores = _linear_scores(linear, texts[i])
+                if min(margin(sc) for sc in scores.values()) >= Config.CASCADE_MARGIN:
+                    results[i] = _build_result(texts[i], preprocess(texts[i]), scores, stage="linear")
+                    _remember(keys[i], results[i], persistent)
+        except Exception as e:
+            # Artefato corrompido ou incompatível: os e-mails restantes seguem para o modelo
+            metrics.inc(metrics.ERRORS, kind="cascade")
+            print(f"Erro na cascata linear: {e}")
+        pending = [i for i in pending if results[i] is None]
+    if not pending:
+        return results
+
     try:
-        clf = get_classifier()
-        processed = preprocess(text)
-
-        # Categoria (binária)
-        cat = clf(processed, LABELS_CATEGORY, multi_label=False)
-        category_raw = cat["labels"][0]
-        # Mapear para labels simples
-        category = "Produtivo" if "produtivo que requer" in category_raw else "Improdutivo"
-        cat_score = float(cat["scores"][0])
-
-        # Intenção (top‑1)
-        intent = clf(processed, LABELS_INTENT, multi_label=False)
-        top_intent = intent["labels"][0]
-        intent_score = float(intent["scores"][0])
-        
-        # Refinamento inteligente baseado em palavras-chave específicas
-        text_lower = text.lower()
-        
-        # Detecção de intenções produtivas específicas
-        if any(word in text_lower for word in ["status", "andamento", "situação", "acompanhamento", "posição"]):
-            top_intent = "Solicitação de status ou acompanhamento"
-            category = "Produtivo"
-        elif any(word in text_lower for word in ["reunião", "meeting", "agendar", "marcar", "disponibilidade", "horário"]):
-            top_intent = "Agendamento de reunião ou compromisso"
-            category = "Produtivo"
-        elif any(word in text_lower for word in ["aprovar", "aprovação", "autorizar", "autorização", "validar", "confirmar aprovação"]):
-            top_intent = "Aprovação ou autorização necessária"
-            category = "Produtivo"
-        elif any(word in text_lower for word in ["orçamento", "proposta", "cotação", "preço", "valor", "custo"]):
-            top_intent = "Solicitação de orçamento ou proposta"
-            category = "Produtivo"
-        elif any(word in text_lower for word in ["cobrança", "pendência", "follow-up", "followup", "prazo", "vencimento"]):
-            top_intent = "Cobrança ou follow-up de pendências"
-            category = "Produtivo"
-        elif any(word in text_lower for word in ["convite", "evento", "treinamento", "curso", "workshop", "palestra"]):
-            top_intent = "Convite para evento ou treinamento"
-            category = "Improdutivo"
-        elif any(word in text_lower for word in ["notificação", "automático", "sistema", "noreply", "no-reply"]):
-            top_intent = "Notificação automática do sistema"
-            category = "Improdutivo"
-        
-        # Ajuste: emails de agradecimento/felicitação devem ser improdutivos
-        if "agradecimento" in top_intent.lower() or "felicitação" in top_intent.lower():
-            category = "Improdutivo"
-        
-        # Detecção adicional de agradecimentos baseada no conteúdo do texto
-        gratitude_keywords = ["obrigado", "obrigada", "agradeço", "agradecemos", "grato", "grata", 
-                             "muito obrigado", "muito obrigada", "excelente", "perfeito", "perfeitamente",
-                             "parabéns", "felicitações", "sucesso", "ótimo trabalho", "bom trabalho"]
-        
-        # Palavras que indicam conclusão/resolução (não solicitação)
-        resolution_keywords = ["resolvido", "solucionado", "concluído", "finalizado", "problema foi", 
-                              "tudo certo", "está ok", "funcionando"]
-        
-        text_lower = text.lower()
-        gratitude_count = sum(1 for keyword in gratitude_keywords if keyword in text_lower)
-        resolution_count = sum(1 for keyword in resolution_keywords if keyword in text_lower)
-        
-        # Se contém múltiplas palavras de agradecimento OU agradecimento + resolução
-        if gratitude_count >= 2 or (gratitude_count >= 1 and resolution_count >= 1):
-            category = "Improdutivo"
-            top_intent = "Agradecimento ou felicitação"
-        
-        # Override: Se o texto contém palavras típicas de spam/marketing, forçar como improdutivo
-        spam_keywords = ["oferta", "desconto", "promoção", "clique aqui", "não perca", "limitada", 
-                         "imperdível", "apenas hoje", "corra", "vagas limitadas", "grátis", 
-                         "ganhe", "prêmio", "sorteio", "urgente", "levando", "só hoje", "so hoje",
-                         "computadores por", "aproveite", "última chance", "oferta especial",
-                         "liquidação", "mega promoção", "super oferta", "imperdível"]
-        text_lower = text.lower()
-        spam_count = sum(1 for keyword in spam_keywords if keyword in text_lower)
-        
-        # Detecção mais rigorosa: se contém 2 ou mais palavras de spam OU padrões específicos
-        promotional_patterns = ["por 1", "x 1", "computadores por", "levando so", "levando só"]
-        has_promotional_pattern = any(pattern in text_lower for pattern in promotional_patterns)
-        
-        if spam_count >= 2 or has_promotional_pattern:  # Threshold reduzido para 2 palavras
-            category = "Improdutivo"
-            top_intent = "Spam ou marketing"
-
-        return {
-            "category": category,
-            "category_score": cat_score,
-            "intent": top_intent,
-            "intent_score": intent_score,
-            "processed": processed,
-        }
-    
+        scorer = get_scorer()
+        batch = [texts[i] for i in pending]
+        with metrics.stage("preprocess"):
+            if long_text_mode(scorer):
+                # Documento inteiro, dividido em janelas pelo scorer
+                processed = [preprocess(t) for t in batch]
+            else:
+                tokenizer = getattr(scorer, "tokenizer", None)
+                processed = [preprocess(select_input(t, tokenizer, Config.INPUT_TOKEN_BUDGET)) for t in batch]
+
+        # Categoria e intenção (um único batch no engine "fused", salvo no modo hierárquico)
+        scores = score_texts(scorer, processed)
+        for i, text, proc, sc in zip(pending, batch, processed, scores):
+            results[i] = _build_result(text, proc, sc)
+            _remember(keys[i], results[i], persistent)
+        return results
+
     except Exception as e:
+        if len(pending) > 1:
+            for i in pending:
+                results[i] = classify_email(texts[i])
+            return results
         print(f"Erro na classificação: {e}")
-        return {
-            "category": "Erro",
-            "intent": "Erro no processamento",
-            "category_score": 0.0,
-            "intent_score": 0.0,
-            "processed": "",
-        }
-    finally:
-        # Limpeza de memória após classificação
-        gc.collect()
\ No newline at end of file
+        results[pending[0]] = _error_result()
+        return results
+
+
+# Textos curtos usados só para aquecer o modelo (não passam pelo cache)
+WARMUP_TEXTS = [
+    "Olá, poderiam informar o status do chamado 123?",
+    "Muito obrigado pelo retorno, tudo resolvido!",
+]
+
+
+def warmup(rounds: int = 2) -> None:
+    """Carrega o scorer (e o classificador linear, se em uso) e roda inferências de teste.
+
+    As primeiras chamadas pagam alocação de buffers e inicialização de
+    kernels; depois disso a latência da primeira requisição real é a normal.
+    """
+    scorer = get_scorer()
+    if Config.CASCADE_ENABLED:
+        get_linear_model()
+    texts = [preprocess(t) for t in WARMUP_TEXTS]
+    for _ in range(max(1, rounds)):
+        score_texts(scorer, texts)
+
+
+def classify_email(text: str) -> Dict:
+    """Classifica um e-mail em categoria e intenção usando zero-shot learning."""
+    return classify_emails([text])[0]
@@ -0,0 +1,177 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .config import Config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS classification (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS extracted_text (
+    key TEXT PRIMARY KEY, text TEXT NOT NULL, mime TEXT NOT NULL, created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS classification_created ON classification (created);
+CREATE INDEX IF NOT EXISTS extracted_text_created ON extracted_text (created);
+"""
+
+_TABLES = ("classification", "extracted_text")
+
+
+class SQLiteCache:
+    """Cache persistente em SQLite (modo WAL), compartilhado entre workers.
+
+    Guarda resultados de classificação e texto extraído de arquivos, com
+    chave no hash do conteúdo (a chave das classificações já inclui o
+    modelo, os labels e o modo de scoring, então versões diferentes do
+    serviço convivem no mesmo arquivo durante um deploy). Sobrevive a
+    reinícios e deploys; o modo WAL permite leituras concorrentes de vários
+    processos enquanto um escreve. A cada `purge_interval` segundos uma
+    escrita remove as entradas expiradas e as mais antigas além de
+    `max_rows` por tabela. Falhas de I/O nunca interrompem a requisição: o
+    cache apenas deixa de responder.
+    """
+
+    def __init__(self, path: str, ttl: float = 0.0, max_rows: int = 0, purge_interval: float = 300.0):
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._purge_lock = threading.Lock()
+        self._last_purge = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        self.purge()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Uma conexão por thread (sqlite3 não compartilha conexões entre threads)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _fresh(self, created: float) -> bool:
+        return self.ttl <= 0 or created + self.ttl >= time.time()
+
+    def purge(self) -> int:
+        """Remove as entradas expiradas e as mais antigas além de `max_rows` por tabela.
+
+        As páginas liberadas são reaproveitadas pelas próximas escritas, então
+        o arquivo para de crescer (sem VACUUM ele não diminui).
+
+        Returns:
+            Número de linhas removidas
+        """
+        self._last_purge = time.time()
+        removed = 0
+        try:
+            conn = self._conn()
+            for table in _TABLES:
+                if self.ttl > 0:
+                    removed += conn.execute(
+                        f"DELETE FROM {table} WHERE created < ?", (time.time() - self.ttl,)
+                    ).rowcount
+                if self.max_rows > 0:
+                    removed += conn.execute(
+                        f"DELETE FROM {table} WHERE key IN "
+                        f"(SELECT key FROM {table} ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                        (self.max_rows,),
+                    ).rowcount
+        except sqlite3.Error as e:
+            print(f"Erro ao limpar o cache persistente: {e}")
+        return removed
+
+    def _maybe_purge(self) -> None:
+        # Uma thread por processo faz a limpeza; as demais seguem sem esperar
+        if time.time() - self._last_purge < self.purge_interval or not self._purge_lock.acquire(blocking=False):
+            return
+        try:
+            self.purge()
+        finally:
+            self._purge_lock.release()
+
+    def get_classification(self, key: str) -> Optional[Dict]:
+        try:
+            row = self._conn().execute(
+                "SELECT value, created FROM classification WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or not self._fresh(row[1]):
+            return None
+        return json.loads(row[0])
+
+    def set_classification(self, key: str, value: Dict) -> None:
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO classification (key, value, created) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time()),
+            )
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar no cache persistente: {e}")
+        self._maybe_purge()
+
+    def get_text(self, key: str) -> Optional[Tuple[str, str]]:
+        try:
+            row = self._conn().execute(
+                "SELECT text, mime, created FROM extracted_text WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or not self._fresh(row[2]):
+            return None
+        return row[0], row[1]
+
+    def set_text(self, key: str, text: str, mime: str) -> None:
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO extracted_text (key, text, mime, created) VALUES (?, ?, ?, ?)",
+                (key, text, mime, time.time()),
+            )
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar no cache persistente: {e}")
+        self._maybe_purge()
+
+    def stats(self) -> Dict:
+        try:
+            conn = self._conn()
+            return {
+                "path": self.path,
+                "classification": conn.execute("SELECT COUNT(*) FROM classification").fetchone()[0],
+                "extracted_text": conn.execute("SELECT COUNT(*) FROM extracted_text").fetchone()[0],
+            }
+        except sqlite3.Error as e:
+            return {"path": self.path, "error": str(e)}
+
+
+_persistent = None
+_persistent_lock = threading.Lock()
+
+
+def get_persistent_cache() -> Optional[SQLiteCache]:
+    """Retorna o cache persistente (ou None se desabilitado), criando-o uma vez."""
+    global _persistent
+    if not Config.PERSISTENT_CACHE_ENABLED:
+        return None
+    if _persistent is None:
+        with _persistent_lock:
+            if _persistent is None:
+                try:
+                    _persistent = SQLiteCache(
+                        Config.PERSISTENT_CACHE_PATH,
+                        Config.PERSISTENT_CACHE_TTL,
+                        max_rows=Config.PERSISTENT_CACHE_MAX_ROWS,
+                        purge_interval=Config.PERSISTENT_CACHE_PURGE_INTERVAL,
+                    )
+                except (sqlite3.Error, OSError) as e:
+                    print(f"Não foi possível abrir o cache persistente: {e}")
+                    return None
+    return _persistent
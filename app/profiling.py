@@ -0,0 +1,252 @@
+"""Profiling sob demanda de uma requisição (`PROFILING_ENABLED=true` + header `X-Profile`).
+
+    curl -H "X-Profile: 1" -F file=@email.pdf http://localhost:8000/api/process
+    # resposta traz X-Profile-Id: <id>
+    curl http://localhost:8000/debug/profiles/<id>                     # stacks colapsados
+    curl http://localhost:8000/debug/profiles/<id>?format=speedscope   # https://www.speedscope.app
+
+Um amostrador em thread lê as pilhas de todas as threads do processo
+(`sys._current_frames`) a cada `PROFILE_INTERVAL_MS` enquanto a requisição
+roda: cobre o parsing do upload no event loop e o trabalho nos pools de CPU
+e I/O (`read_text_from_file`, `classify_email`, `suggest_reply`). Pilhas de
+threads ociosas (esperando em lock, fila ou select) são descartadas;
+requisições concorrentes aparecem no mesmo perfil.
+
+Os perfis ficam em `PROFILE_DIR` (formato colapsado, um arquivo por id,
+mantidos os `PROFILE_MAX_STORED` mais recentes), visíveis para todos os
+workers. Requisições sem o header não passam pelo amostrador.
+"""
+import json
+import os
+import re
+import sys
+import sysconfig
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from .config import Config
+
+HEADER = b"x-profile"
+ID_HEADER = b"x-profile-id"
+PROFILED_PATHS = ("/api/process",)
+
+# Pilhas cuja função do topo está nestes módulos são de threads ociosas
+# (thread.py: worker de ThreadPoolExecutor parado na fila de tarefas)
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "thread.py")
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+# Prefixos removidos dos caminhos dos frames (repositório, site-packages, stdlib)
+_ROOTS = sorted({
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep,
+    sysconfig.get_paths()["purelib"] + os.sep,
+    sysconfig.get_paths()["stdlib"] + os.sep,
+}, key=len, reverse=True)
+
+
+def _frame_name(code) -> str:
+    path = code.co_filename
+    for root in _ROOTS:
+        if path.startswith(root):
+            path = path[len(root):]
+            break
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class Sampler:
+    """Amostrador de pilhas de todas as threads, rodando em uma thread própria."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.counts: Dict[Tuple[str, ...], int] = {}
+        self.samples = 0
+        self.idle = 0
+        self.started = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self) -> None:
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                self.idle += 1
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            key = tuple(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def collapsed(self) -> str:
+        """Pilhas no formato colapsado (`thread;f1;f2 contagem`), aceito por flamegraph.pl e speedscope."""
+        lines = [";".join(stack) + f" {n}" for stack, n in sorted(self.counts.items())]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+
+def parse_collapsed(text: str) -> List[Tuple[List[str], int]]:
+    stacks = []
+    for line in text.splitlines():
+        if line.strip():
+            stack, _, count = line.rpartition(" ")
+            stacks.append((stack.split(";"), int(count)))
+    return stacks
+
+
+def speedscope(text: str, name: str, interval: float) -> Dict:
+    """Converte stacks colapsados em um perfil "sampled" do speedscope."""
+    frames: Dict[str, int] = {}
+    samples, weights = [], []
+    for stack, count in parse_collapsed(text):
+        samples.append([frames.setdefault(f, len(frames)) for f in stack])
+        weights.append(count * interval)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": [{"name": f} for f in frames]},
+        "profiles": [{
+            "type": "sampled", "name": name, "unit": "seconds",
+            "startValue": 0, "endValue": sum(weights),
+            "samples": samples, "weights": weights,
+        }],
+        "name": name,
+        "exporter": "app.profiling",
+    }
+
+
+class ProfileStore:
+    """Perfis em disco (um `.collapsed` e um `.json` de metadados por id)."""
+
+    def __init__(self, directory: str, max_stored: int = 50):
+        self.directory = directory
+        self.max_stored = max_stored
+
+    def _path(self, profile_id: str, ext: str) -> str:
+        if not _ID_RE.match(profile_id):
+            raise KeyError(profile_id)
+        return os.path.join(self.directory, f"{profile_id}.{ext}")
+
+    def save(self, profile_id: str, sampler: Sampler, meta: Dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(profile_id, "collapsed"), "w", encoding="utf-8") as f:
+            f.write(sampler.collapsed())
+        meta = dict(meta, id=profile_id, samples=sampler.samples, idle_samples=sampler.idle,
+                    duration_ms=round(sampler.duration * 1000, 2),
+                    interval_ms=sampler.interval * 1000, created=time.time())
+        with open(self._path(profile_id, "json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        self._prune()
+
+    def _prune(self) -> None:
+        metas = sorted(
+            (os.path.join(self.directory, n) for n in os.listdir(self.directory) if n.endswith(".json")),
+            key=os.path.getmtime,
+        )
+        for path in metas[:max(0, len(metas) - self.max_stored)]:
+            base = path[:-len(".json")]
+            for ext in (".json", ".collapsed"):
+                try:
+                    os.remove(base + ext)
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> List[Dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        out = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    out.append(json.load(f))
+        return sorted(out, key=lambda m: m["created"], reverse=True)
+
+    def meta(self, profile_id: str) -> Dict:
+        try:
+            with open(self._path(profile_id, "json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(profile_id)
+
+    def collapsed(self, profile_id: str) -> str:
+        try:
+            with open(self._path(profile_id, "collapsed"), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise KeyError(profile_id)
+
+
+_store: Optional[ProfileStore] = None
+
+
+def get_store() -> ProfileStore:
+    """Retorna o repositório de perfis configurado, criando-o uma vez."""
+    global _store
+    if _store is None:
+        _store = ProfileStore(Config.PROFILE_DIR, Config.PROFILE_MAX_STORED)
+    return _store
+
+
+def _requested(scope) -> bool:
+    for name, value in scope.get("headers", ()):
+        if name == HEADER:
+            return value.strip().lower() not in (b"", b"0", b"false")
+    return False
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI: roda o amostrador nas requisições com `X-Profile` (se habilitado).
+
+    O perfil cobre a requisição inteira (parsing do upload, extração,
+    classificação e resposta) e o id volta no header `X-Profile-Id`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or not Config.PROFILING_ENABLED
+                or scope["path"] not in PROFILED_PATHS or not _requested(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        sampler = Sampler(Config.PROFILE_INTERVAL_MS / 1000)
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = dict(message, headers=list(message.get("headers", [])) + [(ID_HEADER, profile_id.encode())])
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            try:
+                get_store().save(profile_id, sampler, {"path": scope["path"], "status": status})
+            except OSError as e:
+                print(f"Erro ao salvar perfil {profile_id}: {e}")
@@ -2,7 +2,7 @@ import os
 from typing import Dict
 from datetime import datetime
 
-from openai import OpenAI
+from . import metrics
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
@@ -135,24 +135,29 @@ def suggest_reply(category: str, intent: str, context: Dict) -> Dict:
         )
         base = base.replace("{intent}", intent)
 
-    filled = _fill(base, context or {})
+    with metrics.stage("reply_template"):
+        filled = _fill(base, context or {})
 
     # Se houver OpenAI, refinamos o tom
     if OPENAI_API_KEY:
+        # Import tardio: o SDK da OpenAI só carrega quando há chave configurada
+        from openai import OpenAI
+
         client = OpenAI()
         prompt = (
             "Revise e melhore a mensagem abaixo com tom profissional e claro, mantendo o conteúdo.\n\n"
             f"Mensagem:\n{filled}\n\nSaída final apenas com o texto revisado."
         )
         try:
-            resp = client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-            )
+            with metrics.stage("openai_refine"):
+                resp = client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.3,
+                )
             improved = resp.choices[0].message.content.strip()
             return {"reply": improved, "source": "openai+template"}
         except Exception:
-            pass
+            metrics.inc(metrics.ERRORS, kind="openai")
 
     return {"reply": filled, "source": "template"}
\ No newline at end of file
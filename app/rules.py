@@ -0,0 +1,214 @@
+"""Regras de palavras-chave compiladas em um único matcher.
+
+As listas de palavras-chave ficam em tabelas declarativas e são compiladas
+na importação em um único matcher multi-padrão (Aho-Corasick ou uma regex em
+forma de trie). Uma passada sobre o texto retorna a contagem de
+palavras-chave encontradas por grupo.
+
+Este módulo não depende do restante do app (nem de modelos), para poder ser
+usado também pelo handler do AWS Lambda em `deploy/handler.py`.
+"""
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import ahocorasick
+except ImportError:  # Opcional: sem o pacote, usa a regex compilada
+    ahocorasick = None
+
+
+def _trie_regex(words: Sequence[str]) -> str:
+    """Monta uma regex em forma de trie: em cada posição casa a palavra mais longa."""
+    root: Dict = {}
+    for word in words:
+        node = root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = "|".join(alts)
+        if "" in node:
+            return f"(?:{body})?"
+        return alts[0] if len(alts) == 1 else f"(?:{body})"
+
+    return build(root)
+
+
+class RuleSet:
+    """Matcher multi-padrão para grupos de palavras-chave.
+
+    Semântica idêntica a `sum(1 for kw in grupo if kw in texto.lower())`:
+    cada palavra-chave conta uma vez por ocorrência na lista do grupo
+    (repetições na lista contam de novo), esteja onde estiver no texto,
+    inclusive sobreposta a outra palavra-chave.
+
+    Usa um autômato Aho-Corasick (pacote opcional `pyahocorasick`) quando
+    disponível; caso contrário, uma única regex em forma de trie.
+    """
+
+    def __init__(self, groups: Dict[str, Sequence[str]]):
+        self.groups = {name: [kw.lower() for kw in kws] for name, kws in groups.items()}
+        # palavra-chave -> {grupo: multiplicidade}
+        self._owners: Dict[str, Dict[str, int]] = {}
+        for name, kws in self.groups.items():
+            for kw in kws:
+                owners = self._owners.setdefault(kw, {})
+                owners[name] = owners.get(name, 0) + 1
+        keywords = sorted(self._owners)
+
+        self._automaton = None
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for kw in keywords:
+                self._automaton.add_word(kw, kw)
+            self._automaton.make_automaton()
+            return
+
+        # Fallback com regex: findall encontra matches sem sobreposição. As
+        # palavras-chave contidas em um match ficam implícitas; as que começam
+        # dentro de um match e terminam depois dele são conferidas à parte.
+        self._pattern = re.compile(_trie_regex(keywords))
+        self._contained = {kw: frozenset(o for o in keywords if o in kw) for kw in keywords}
+        self._overlapping = {
+            kw: frozenset(
+                o for o in keywords
+                if o not in kw and any(kw.endswith(o[:i]) for i in range(1, len(o)))
+            )
+            for kw in keywords
+        }
+
+    def matches(self, text: str) -> set:
+        """Conjunto de palavras-chave presentes no texto."""
+        text = (text or "").lower()
+        if self._automaton is not None:
+            return {kw for _, kw in self._automaton.iter(text)}
+
+        hits = set(self._pattern.findall(text))
+        found = set()
+        candidates = set()
+        for kw in hits:
+            found |= self._contained[kw]
+            candidates |= self._overlapping[kw]
+        for kw in candidates - found:
+            if kw in text:
+                found |= self._contained[kw]
+        return found
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Número de palavras-chave encontradas por grupo."""
+        counts = {name: 0 for name in self.groups}
+        for kw in self.matches(text):
+            for name, weight in self._owners[kw].items():
+                counts[name] += weight
+        return counts
+
+
+# === Regras do classificador (app/nlp.py) ===
+EMAIL_RULE_GROUPS = {
+    # Intenções produtivas/improdutivas específicas (avaliadas em ordem, ver INTENT_RULES)
+    "status": ["status", "andamento", "situação", "acompanhamento", "posição"],
+    "reuniao": ["reunião", "meeting", "agendar", "marcar", "disponibilidade", "horário"],
+    "aprovacao": ["aprovar", "aprovação", "autorizar", "autorização", "validar", "confirmar aprovação"],
+    "orcamento": ["orçamento", "proposta", "cotação", "preço", "valor", "custo"],
+    "cobranca": ["cobrança", "pendência", "follow-up", "followup", "prazo", "vencimento"],
+    "convite": ["convite", "evento", "treinamento", "curso", "workshop", "palestra"],
+    "notificacao": ["notificação", "automático", "sistema", "noreply", "no-reply"],
+    # Agradecimentos
+    "gratitude": ["obrigado", "obrigada", "agradeço", "agradecemos", "grato", "grata",
+                  "muito obrigado", "muito obrigada", "excelente", "perfeito", "perfeitamente",
+                  "parabéns", "felicitações", "sucesso", "ótimo trabalho", "bom trabalho"],
+    # Palavras que indicam conclusão/resolução (não solicitação)
+    "resolution": ["resolvido", "solucionado", "concluído", "finalizado", "problema foi",
+                   "tudo certo", "está ok", "funcionando"],
+    # Spam/marketing ("imperdível" aparece duas vezes de propósito: conta em dobro)
+    "spam": ["oferta", "desconto", "promoção", "clique aqui", "não perca", "limitada",
+             "imperdível", "apenas hoje", "corra", "vagas limitadas", "grátis",
+             "ganhe", "prêmio", "sorteio", "urgente", "levando", "só hoje", "so hoje",
+             "computadores por", "aproveite", "última chance", "oferta especial",
+             "liquidação", "mega promoção", "super oferta", "imperdível"],
+    "promotional": ["por 1", "x 1", "computadores por", "levando so", "levando só"],
+}
+
+# (grupo, categoria, intenção) — o primeiro grupo com ocorrência define a intenção
+INTENT_RULES: List[Tuple[str, str, str]] = [
+    ("status", "Produtivo", "Solicitação de status ou acompanhamento"),
+    ("reuniao", "Produtivo", "Agendamento de reunião ou compromisso"),
+    ("aprovacao", "Produtivo", "Aprovação ou autorização necessária"),
+    ("orcamento", "Produtivo", "Solicitação de orçamento ou proposta"),
+    ("cobranca", "Produtivo", "Cobrança ou follow-up de pendências"),
+    ("convite", "Improdutivo", "Convite para evento ou treinamento"),
+    ("notificacao", "Improdutivo", "Notificação automática do sistema"),
+]
+
+SPAM_THRESHOLD = 2
+GRATITUDE_THRESHOLD = 2
+
+# Confiança das decisões tomadas só pelas regras: cresce com o número de
+# palavras-chave encontradas, sem chegar a 1.0
+RULE_BASE_CONFIDENCE = 0.6
+RULE_CONFIDENCE_STEP = 0.1
+RULE_MAX_CONFIDENCE = 0.99
+
+EMAIL_RULES = RuleSet(EMAIL_RULE_GROUPS)
+
+
+def decide(counts: Dict[str, int]) -> Optional[Tuple[str, str, float]]:
+    """Decisão das regras que dispensa o modelo (spam e agradecimento).
+
+    Returns:
+        (categoria, intenção, confiança) ou None se nenhuma regra decisiva disparou
+    """
+    if counts["spam"] >= SPAM_THRESHOLD or counts["promotional"] > 0:
+        decided = ("Improdutivo", "Spam ou marketing")
+        evidence = counts["spam"] + counts["promotional"]
+    else:
+        gratitude = counts["gratitude"]
+        if not (gratitude >= GRATITUDE_THRESHOLD or (gratitude >= 1 and counts["resolution"] >= 1)):
+            return None
+        decided = ("Improdutivo", "Agradecimento ou felicitação")
+        evidence = gratitude + counts["resolution"]
+    confidence = min(RULE_MAX_CONFIDENCE, RULE_BASE_CONFIDENCE + RULE_CONFIDENCE_STEP * evidence)
+    return decided[0], decided[1], confidence
+
+
+def override(counts: Dict[str, int]) -> Optional[Tuple[str, str]]:
+    """Overrides que substituem qualquer resposta do modelo (spam e agradecimento).
+
+    Returns:
+        (categoria, intenção) ou None se nenhuma regra decisiva disparou
+    """
+    decided = decide(counts)
+    return None if decided is None else decided[:2]
+
+
+def refine(counts: Dict[str, int], category: str, intent: str) -> Tuple[str, str]:
+    """Ajusta categoria e intenção do modelo com as contagens das regras."""
+    for group, rule_category, rule_intent in INTENT_RULES:
+        if counts[group]:
+            category, intent = rule_category, rule_intent
+            break
+
+    # Emails de agradecimento/felicitação devem ser improdutivos
+    if "agradecimento" in intent.lower() or "felicitação" in intent.lower():
+        category = "Improdutivo"
+
+    decided = override(counts)
+    if decided is not None:
+        category, intent = decided
+    return category, intent
+
+
+# === Regras do handler do AWS Lambda (deploy/handler.py) ===
+LAMBDA_RULE_GROUPS = {
+    "reuniao": ["reunião", "meeting", "encontro", "agenda", "convite"],
+    "aprovacao": ["aprovação", "aprovar", "autorização", "autorizar", "permissão"],
+    "orcamento": ["orçamento", "proposta", "cotação", "valor", "preço", "comercial"],
+    "status": ["status", "andamento", "progresso", "atualização", "relatório"],
+    "spam": ["spam", "promoção", "oferta", "desconto", "grátis", "ganhe"],
+}
+
+LAMBDA_RULES = RuleSet(LAMBDA_RULE_GROUPS)
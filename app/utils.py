@@ -1,8 +1,9 @@
 import io
-import gc
+import hashlib
 from typing import Tuple
 from pdfminer.high_level import extract_text
 from .config import Config
+from .persistent_cache import get_persistent_cache
 
 ALLOWED_EXTS = {".txt", ".pdf"}
 
@@ -24,42 +25,46 @@ def read_text_from_file(filename: str, content: bytes) -> Tuple[str, str]:
     lower = name.lower()
     text = ""
     
-    try:
-        if lower.endswith(".txt"):
-            # Verificar se o conteúdo não é muito grande
-            if len(content) > Config.MAX_PDF_SIZE:
-                raise ValueError(f"Arquivo TXT muito grande. Máximo: {Config.MAX_PDF_SIZE // (1024*1024)}MB")
-            
-            text = content.decode("utf-8", errors="ignore")
-            return text, "text/plain"
-            
-        elif lower.endswith(".pdf"):
-            # Verificar tamanho do PDF
-            if len(content) > Config.MAX_PDF_SIZE:
-                raise ValueError(f"Arquivo PDF muito grande. Máximo: {Config.MAX_PDF_SIZE // (1024*1024)}MB")
+    if lower.endswith(".txt"):
+        # Verificar se o conteúdo não é muito grande
+        if len(content) > Config.MAX_PDF_SIZE:
+            raise ValueError(f"Arquivo TXT muito grande. Máximo: {Config.MAX_PDF_SIZE // (1024*1024)}MB")
+        
+        text = content.decode("utf-8", errors="ignore")
+        return text, "text/plain"
+        
+    elif lower.endswith(".pdf"):
+        # Verificar tamanho do PDF
+        if len(content) > Config.MAX_PDF_SIZE:
+            raise ValueError(f"Arquivo PDF muito grande. Máximo: {Config.MAX_PDF_SIZE // (1024*1024)}MB")
+        
+        # PDFs repetidos: reaproveita o texto já extraído (cache persistente)
+        persistent = get_persistent_cache()
+        key = None
+        if persistent is not None:
+            key = hashlib.sha256(content).hexdigest()
+            cached = persistent.get_text(key)
+            if cached is not None:
+                return cached
+        
+        # Processar PDF com limpeza de memória
+        pdf_buf = None
+        try:
+            pdf_buf = io.BytesIO(content)
+            text = extract_text(pdf_buf) or ""
             
-            # Processar PDF com limpeza de memória
-            pdf_buf = None
-            try:
-                pdf_buf = io.BytesIO(content)
-                text = extract_text(pdf_buf) or ""
+            # Limitar tamanho do texto extraído
+            if len(text) > 50000:  # 50k caracteres máximo
+                text = text[:50000]
                 
-                # Limitar tamanho do texto extraído
-                if len(text) > 50000:  # 50k caracteres máximo
-                    text = text[:50000]
-                    
-            finally:
-                if pdf_buf:
-                    pdf_buf.close()
-                pdf_buf = None
-                gc.collect()
-                
-            return text, "application/pdf"
-            
-        else:
-            raise ValueError("Formato de arquivo não suportado. Use .txt ou .pdf.")
-            
-    except Exception as e:
-        # Limpeza em caso de erro
-        gc.collect()
-        raise e
\ No newline at end of file
+        finally:
+            if pdf_buf:
+                pdf_buf.close()
+            pdf_buf = None
+        
+        if key is not None:
+            persistent.set_text(key, text, "application/pdf")
+        return text, "application/pdf"
+        
+    else:
+        raise ValueError("Formato de arquivo não suportado. Use .txt ou .pdf.")
@@ -0,0 +1,45 @@
+import time
+from typing import Callable, Dict, Optional
+
+
+class ModelWarmup:
+    """Carrega e aquece o modelo em segundo plano, expondo o estado para `/ready`.
+
+    Estados: "pending" (ainda não começou), "warming", "ready" e "failed".
+    Enquanto não estiver "ready", o endpoint de prontidão responde 503 e o
+    balanceador não manda tráfego para a instância; `/health` continua
+    respondendo apenas se o processo está vivo.
+    """
+
+    def __init__(self, warm_fn: Callable[[], None]):
+        self.warm_fn = warm_fn
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def mark_ready(self) -> None:
+        """Sem warmup (WARMUP_ENABLED=false) a instância é considerada pronta de imediato."""
+        self.status = "ready"
+
+    async def run(self, executor) -> None:
+        """Executa `warm_fn` no pool de CPU, sem bloquear o event loop."""
+        self.status = "warming"
+        start = time.perf_counter()
+        try:
+            await executor.run(self.warm_fn)
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            print(f"Erro no aquecimento do modelo: {e}")
+        else:
+            self.status = "ready"
+            print(f"Modelo aquecido em {time.perf_counter() - start:.1f}s")
+        finally:
+            self.seconds = round(time.perf_counter() - start, 3)
+
+    def stats(self) -> Dict:
+        return {"status": self.status, "seconds": self.seconds, "error": self.error}
@@ -7,6 +7,17 @@ import re
 # Add the parent directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+from app.rules import LAMBDA_RULES
+
+# (grupo de regras, classificação, confiança, mensagem) — o primeiro grupo com ocorrência vence
+LAMBDA_RESPONSES = [
+    ("reuniao", "produtivo", 0.85, "Email classificado como reunião/encontro"),
+    ("aprovacao", "produtivo", 0.80, "Email classificado como solicitação de aprovação"),
+    ("orcamento", "produtivo", 0.75, "Email classificado como orçamento/proposta"),
+    ("status", "produtivo", 0.70, "Email classificado como atualização de status"),
+    ("spam", "improdutivo", 0.90, "Email classificado como spam/promoção"),
+]
+
 def lambda_handler(event, context):
     """
     AWS Lambda handler function - Direct API Gateway integration
@@ -715,33 +726,11 @@ def lambda_handler(event, context):
                 }
             
             # Enhanced rule-based classification matching local logic
-            text_lower = text.lower()
-            
-            if any(word in text_lower for word in ['reunião', 'meeting', 'encontro', 'agenda', 'convite']):
-                classification = "produtivo"
-                category = "reuniao"
-                confidence = 0.85
-                message = "Email classificado como reunião/encontro"
-            elif any(word in text_lower for word in ['aprovação', 'aprovar', 'autorização', 'autorizar', 'permissão']):
-                classification = "produtivo"
-                category = "aprovacao"
-                confidence = 0.80
-                message = "Email classificado como solicitação de aprovação"
-            elif any(word in text_lower for word in ['orçamento', 'proposta', 'cotação', 'valor', 'preço', 'comercial']):
-                classification = "produtivo"
-                category = "orcamento"
-                confidence = 0.75
-                message = "Email classificado como orçamento/proposta"
-            elif any(word in text_lower for word in ['status', 'andamento', 'progresso', 'atualização', 'relatório']):
-                classification = "produtivo"
-                category = "status"
-                confidence = 0.70
-                message = "Email classificado como atualização de status"
-            elif any(word in text_lower for word in ['spam', 'promoção', 'oferta', 'desconto', 'grátis', 'ganhe']):
-                classification = "improdutivo"
-                category = "spam"
-                confidence = 0.90
-                message = "Email classificado como spam/promoção"
+            # (uma única passada do matcher compilado em app/rules.py)
+            counts = LAMBDA_RULES.count(text)
+            for category, classification, confidence, message in LAMBDA_RESPONSES:
+                if counts[category]:
+                    break
             else:
                 classification = "produtivo"
                 category = "geral"
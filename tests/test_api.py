@@ -77,4 +77,48 @@ def test_classification_categories():
         # mas verificamos que retorna uma categoria válida
         assert data["category"] in ("Produtivo", "Improdutivo")
         assert data["category_score"] > 0
-        assert data["intent_score"] > 0
\ No newline at end of file
+        assert data["intent_score"] > 0
+
+def test_cache_hit_skips_batcher(monkeypatch):
+    """Com micro-batching, um texto já em cache responde sem entrar na fila do batcher."""
+    import app.main as main
+    import app.nlp as nlp
+    from app.config import Config
+    from app.models.stub import StubScorer
+
+    monkeypatch.setattr(Config, "BATCHING_ENABLED", True)
+    monkeypatch.setattr(Config, "RESULT_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "PERSISTENT_CACHE_ENABLED", False)
+    monkeypatch.setattr(nlp, "_scorer", StubScorer())
+    submitted = []
+    original = main.batcher.submit
+
+    async def counting_submit(item):
+        submitted.append(item)
+        return await original(item)
+
+    monkeypatch.setattr(main.batcher, "submit", counting_submit)
+    payload = {"text": "Bom dia, qual o status da fatura 4411?"}
+
+    first = client.post('/api/process', data=payload)
+    second = client.post('/api/process', data=payload)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert submitted == [payload["text"]]
+
+
+def test_full_cpu_queue_returns_503(monkeypatch):
+    """Fila do pool de CPU cheia: /api/process responde 503 em vez de acumular trabalho."""
+    import app.main as main
+    from app.config import Config
+    from app.executors import QueueFullError
+
+    def full(fn, *args, **kwargs):
+        raise QueueFullError("Fila do pool cpu cheia (64 tarefas)")
+
+    monkeypatch.setattr(Config, "BATCHING_ENABLED", False)
+    monkeypatch.setattr(main.cpu_executor, "submit", full)
+    r = client.post('/api/process', data={"text": "Qual o status do pedido 77?"})
+    assert r.status_code == 503
+    assert "Servidor ocupado" in r.json()["detail"]
@@ -0,0 +1,111 @@
+import json
+import struct
+
+import numpy as np
+
+from app.models import artifacts
+
+_NAMES = {np.dtype(np.float32): "F32", np.dtype(np.int64): "I64"}
+
+
+def write_safetensors(path, tensors):
+    """Grava no formato safetensors (cabeçalho JSON + dados) sem depender do pacote."""
+    header, blobs, offset = {}, [], 0
+    for name, arr in tensors.items():
+        data = np.ascontiguousarray(arr).tobytes()
+        header[name] = {"dtype": _NAMES[arr.dtype], "shape": list(arr.shape),
+                        "data_offsets": [offset, offset + len(data)]}
+        blobs.append(data)
+        offset += len(data)
+    raw = json.dumps(header).encode()
+    raw += b" " * (-len(raw) % 8)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(raw)) + raw + b"".join(blobs))
+
+
+def make_snapshot(tmp_path, name="org/modelo"):
+    path = tmp_path / name.replace("/", "__")
+    path.mkdir(parents=True)
+    weights = {"w": np.arange(6, dtype=np.float32).reshape(2, 3), "ids": np.array([1, 2], dtype=np.int64)}
+    write_safetensors(path / "model.safetensors", weights)
+    (path / "config.json").write_text('{"label2id": {"entailment": 2}}')
+    artifacts.write_manifest(str(path), name)
+    return path, weights
+
+
+def test_read_safetensors_is_memory_mapped(tmp_path):
+    """Os pesos vêm do arquivo via mmap copy-on-write, sem alterar o arquivo."""
+    path, weights = make_snapshot(tmp_path)
+    tensors = artifacts.read_safetensors(str(path / "model.safetensors"))
+    assert set(tensors) == {"w", "ids"}
+    for name, arr in weights.items():
+        np.testing.assert_array_equal(tensors[name], arr)
+        assert isinstance(tensors[name].base, np.memmap)
+
+    tensors["w"][0, 0] = 99  # copy-on-write: o arquivo continua igual
+    again = artifacts.read_safetensors(str(path / "model.safetensors"))
+    assert again["w"][0, 0] == 0
+
+
+def test_manifest_detects_corruption(tmp_path):
+    """O snapshot só é usado se os checksums conferem."""
+    path, _ = make_snapshot(tmp_path)
+    assert artifacts.verify(str(path))
+    assert artifacts.local_snapshot("org/modelo", str(tmp_path), check=True) == str(path)
+
+    with open(path / "model.safetensors", "r+b") as f:
+        f.seek(-1, 2)
+        f.write(b"\x01")
+    assert not artifacts.verify(str(path))
+    assert artifacts.local_snapshot("org/modelo", str(tmp_path), check=True) is None
+    # Sem verificação (MODEL_VERIFY_CHECKSUM=false) o snapshot é aceito
+    assert artifacts.local_snapshot("org/modelo", str(tmp_path), check=False) == str(path)
+
+
+def test_missing_snapshot(tmp_path):
+    assert artifacts.local_snapshot("org/outro", str(tmp_path)) is None
+    assert artifacts.local_snapshot("org/outro", "") is None
+
+
+def test_snapshot_of_another_model_is_ignored(tmp_path):
+    """Um diretório cujo manifest é de outro modelo não é servido com o nome deste."""
+    path, _ = make_snapshot(tmp_path, "org/modelo")
+    (tmp_path / "org__principal").mkdir()
+    for f in path.iterdir():
+        (tmp_path / "org__principal" / f.name).write_bytes(f.read_bytes())
+    assert artifacts.local_snapshot("org/principal", str(tmp_path), check=False) is None
+    assert artifacts.local_snapshot("org/modelo", str(tmp_path), check=False) == str(path)
+
+
+def test_fallback_snapshot_does_not_replace_primary_model(monkeypatch):
+    """Com snapshot só do fallback, o modelo principal ainda vem do hub."""
+    import app.nlp as nlp
+    from app.config import Config
+
+    monkeypatch.setattr(Config, "ZSL_MODEL", "org/principal")
+    monkeypatch.setattr(Config, "ZSL_MODEL_FALLBACK", "org/fallback")
+    monkeypatch.setattr(Config, "MODEL_OFFLINE", False)
+    monkeypatch.setattr(artifacts, "local_snapshot", lambda name: "snap" if name == "org/fallback" else None)
+    monkeypatch.setattr(artifacts, "load_pipeline", lambda path: ("local", path))
+    monkeypatch.setattr(nlp, "_load_hub_classifier", lambda name: ("hub", name))
+    assert nlp._load_pipeline() == ("hub", "org/principal")
+
+    # Offline (ou com o hub fora do ar), o snapshot do fallback é usado
+    def offline(name):
+        raise RuntimeError("offline")
+
+    monkeypatch.setattr(nlp, "_load_hub_classifier", offline)
+    assert nlp._load_pipeline() == ("local", "snap")
+
+
+def test_model_identity_from_snapshot_and_hub(tmp_path):
+    """O id inclui o modelo do manifest (snapshot) ou o commit do hub."""
+    from types import SimpleNamespace
+
+    path, _ = make_snapshot(tmp_path)
+    local = artifacts.model_identity(SimpleNamespace(_name_or_path=str(path)))
+    assert local.startswith("org/modelo@")
+
+    hub = SimpleNamespace(_name_or_path="org/modelo", _commit_hash="abc123")
+    assert artifacts.model_identity(hub) == "org/modelo@abc123"
+    assert artifacts.model_identity(SimpleNamespace(_name_or_path="org/outro")) == "org/outro@desconhecida"
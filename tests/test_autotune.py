@@ -0,0 +1,127 @@
+import time
+
+import app.autotune as autotune
+from app.config import Config
+
+
+def test_candidates_cover_all_cores():
+    """Cada candidato divide os núcleos inteiros entre workers e threads."""
+    assert autotune.candidates(4) == [(1, 4), (2, 2), (4, 1)]
+    assert autotune.candidates(1) == [(1, 1)]
+    assert all(w * t == 6 for w, t in autotune.candidates(6))
+
+
+def test_tune_picks_best_throughput_per_core():
+    """Simula um modelo que escala mal com threads: vence o maior número de workers."""
+    current = {"threads": 1}
+
+    def set_threads(n):
+        current["threads"] = n
+
+    def infer(batch):
+        # Mais threads ajudam pouco; concorrência entre workers não custa nada (sleep)
+        time.sleep(0.004 / current["threads"] ** 0.3)
+
+    tuned = autotune.tune(infer, [["a"]] * 8, cores=4, set_threads=set_threads)
+
+    assert tuned["source"] == "autotune"
+    assert (tuned["cpu_workers"], tuned["torch_threads"]) == (4, 1)
+    assert len(tuned["candidates"]) == 3
+
+
+def test_config_override_skips_tuning(monkeypatch):
+    """TORCH_THREADS > 0 aplica o valor direto, sem calibrar."""
+    applied = []
+    monkeypatch.setattr(Config, "TORCH_THREADS", 3)
+    monkeypatch.setattr(Config, "AUTOTUNE_ENABLED", True)
+    monkeypatch.setattr(autotune, "_sample_infer", lambda cores: (_ for _ in ()).throw(AssertionError))
+
+    result = autotune.configure(set_threads=applied.append)
+
+    assert applied == [3]
+    assert result["source"] == "config"
+    assert autotune.result["torch_threads"] == 3
+
+
+def test_calibration_uses_production_batch_size(monkeypatch):
+    """Com micro-batching, cada chamada medida recebe um lote de BATCH_MAX_SIZE textos."""
+    monkeypatch.setattr(Config, "BATCHING_ENABLED", True)
+    monkeypatch.setattr(Config, "BATCH_MAX_SIZE", 4)
+    assert autotune.batch_size() == 4
+    batches = autotune.make_batches(["a", "b", "c"], autotune.batch_size(), 3)
+    assert batches == [["a", "b", "c", "a"], ["b", "c", "a", "b"], ["c", "a", "b", "c"]]
+
+    sizes = []
+    tuned = autotune.tune(lambda batch: sizes.append(len(batch)), batches, cores=2, set_threads=lambda n: None)
+    assert set(sizes) == {4}
+    assert tuned["batch_size"] == 4
+
+    monkeypatch.setattr(Config, "BATCHING_ENABLED", False)
+    assert autotune.batch_size() == 1
+
+
+def test_tuned_workers_resize_pool(monkeypatch):
+    """O número de workers escolhido recria o pool de CPU."""
+    from app.executors import BoundedExecutor
+
+    pool = BoundedExecutor("teste", 1)
+    tuned = {"source": "autotune", "cpu_workers": 3, "torch_threads": 1}
+    monkeypatch.setattr(autotune, "cpu_executor", pool)
+    monkeypatch.setattr(Config, "TORCH_THREADS", 0)
+    monkeypatch.setattr(Config, "AUTOTUNE_ENABLED", True)
+    monkeypatch.setattr(autotune, "_sample_infer", lambda cores: (None, []))
+    monkeypatch.setattr(autotune, "tune", lambda *args: tuned)
+
+    autotune.configure(set_threads=lambda n: None)
+
+    assert pool.workers == 3
+    assert pool.stats()["workers"] == 3
+    pool.shutdown()
+
+
+def test_onnx_threads_default_to_cores_per_worker(monkeypatch):
+    """Sem TORCH_THREADS nem calibração, cada sessão ONNX fica com núcleos / workers."""
+    from app.executors import BoundedExecutor
+
+    pool = BoundedExecutor("teste", 2)
+    monkeypatch.setattr(autotune, "cpu_executor", pool)
+    monkeypatch.setattr(autotune, "available_cores", lambda: 8)
+    monkeypatch.setattr(autotune, "result", {"source": "default"})
+    monkeypatch.setattr(Config, "TORCH_THREADS", 0)
+    assert autotune.inference_threads() == 4
+
+    monkeypatch.setattr(autotune, "result", {"source": "autotune", "torch_threads": 2, "cpu_workers": 4})
+    assert autotune.inference_threads() == 2
+    monkeypatch.setattr(Config, "TORCH_THREADS", 3)
+    assert autotune.inference_threads() == 3
+    pool.shutdown()
+
+
+def test_set_threads_reaches_onnx_session(monkeypatch):
+    """Com o scorer ONNX carregado, a calibração recria a sessão com as threads medidas."""
+    from types import SimpleNamespace
+
+    import app.nlp as nlp
+
+    applied = []
+    forward = SimpleNamespace(set_threads=applied.append)
+    monkeypatch.setattr(nlp, "_scorer", SimpleNamespace(forward=forward))
+    autotune.set_inference_threads(2)
+    assert applied == [2]
+
+
+def test_threads_configured_without_warmup(monkeypatch):
+    """WARMUP_ENABLED=false não ignora TORCH_THREADS/autotune: roda na inicialização."""
+    import threading
+
+    from fastapi.testclient import TestClient
+
+    import app.main as main
+
+    called = threading.Event()
+    monkeypatch.setattr(Config, "WARMUP_ENABLED", False)
+    monkeypatch.setattr(Config, "TORCH_THREADS", 2)
+    monkeypatch.setattr(main.autotune, "configure", called.set)
+    with TestClient(main.app) as client:
+        assert client.get("/ready").status_code == 200
+        assert called.wait(5)
@@ -0,0 +1,131 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+import app.nlp as nlp
+from app.config import Config
+from app.main import app
+from app.models.stub import StubScorer
+
+client = TestClient(app)
+
+
+class CountingScorer(StubScorer):
+    """Stub que registra quantos textos chegam em cada chamada."""
+
+    def __init__(self):
+        self.calls = []
+
+    def score(self, premises, groups):
+        self.calls.append([len(p) for p in premises])
+        return super().score(premises, groups)
+
+
+def test_batch_keeps_order_and_reports_item_errors(monkeypatch):
+    """Os resultados voltam na ordem enviada; itens vazios trazem erro sem afetar os demais."""
+    monkeypatch.setattr(Config, "RESULT_CACHE_ENABLED", False)
+    monkeypatch.setattr(nlp, "_scorer", StubScorer())
+    emails = [
+        {"id": "a", "text": "Qual o status do chamado 123?"},
+        {"id": 7, "text": "   "},
+        {"id": "c", "text": "Segue em anexo o relatório mensal solicitado."},
+    ]
+
+    r = client.post("/api/process/batch", json=emails)
+    assert r.status_code == 200
+    results = r.json()["results"]
+
+    assert [item["id"] for item in results] == ["a", 7, "c"]
+    assert results[1] == {"id": 7, "error": "Conteúdo vazio."}
+    for item in (results[0], results[2]):
+        assert item["category"] in ("Produtivo", "Improdutivo")
+        assert item["suggested_reply"]
+        assert "error" not in item
+
+
+def test_batch_sorted_by_length_in_chunks(monkeypatch):
+    """Os e-mails são classificados em lotes de BATCH_CHUNK_SIZE, ordenados por tamanho."""
+    monkeypatch.setattr(Config, "RESULT_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "BATCH_CHUNK_SIZE", 2)
+    scorer = CountingScorer()
+    monkeypatch.setattr(nlp, "_scorer", scorer)
+    texts = ["relatório " * n for n in (5, 1, 4, 2, 3)]
+
+    r = client.post("/api/process/batch", json=[{"id": i, "text": t} for i, t in enumerate(texts)])
+    assert r.status_code == 200
+    assert len(r.json()["results"]) == 5
+
+    assert sorted(len(call) for call in scorer.calls) == [1, 2, 2]
+    # Cada chamada recebe textos vizinhos na ordem de tamanho
+    lengths = sorted(length for call in scorer.calls for length in call)
+    for call in scorer.calls:
+        positions = sorted(lengths.index(length) for length in call)
+        assert positions == list(range(positions[0], positions[0] + len(call)))
+
+
+def test_batch_classification_failure_is_per_item(monkeypatch):
+    """Se a classificação falha, os itens afetados trazem o erro e a requisição responde 200."""
+    def broken(texts):
+        raise RuntimeError("modelo indisponível")
+
+    monkeypatch.setattr(main, "classify_emails", broken)
+    r = client.post("/api/process/batch", json=[{"id": "x", "text": "Olá"}])
+    assert r.status_code == 200
+    assert r.json()["results"][0]["error"].startswith("Erro na classificação")
+
+
+def test_batch_max_items(monkeypatch):
+    """Lotes acima de BATCH_MAX_ITEMS são recusados com 413."""
+    monkeypatch.setattr(Config, "BATCH_MAX_ITEMS", 2)
+    r = client.post("/api/process/batch", json=[{"id": i, "text": "Olá"} for i in range(3)])
+    assert r.status_code == 413
+
+
+def test_batch_serves_cache_hits_without_cpu_pool(monkeypatch):
+    """E-mails já classificados respondem do cache; só os misses vão para o classificador."""
+    monkeypatch.setattr(Config, "RESULT_CACHE_ENABLED", True)
+    monkeypatch.setattr(nlp, "_scorer", StubScorer())
+    nlp.result_cache.clear()
+    seen = []
+    original = main.classify_emails
+    monkeypatch.setattr(main, "classify_emails", lambda texts: seen.append(list(texts)) or original(texts))
+
+    repetido = "Qual o status do chamado 456?"
+    client.post("/api/process/batch", json=[{"id": 0, "text": repetido}])
+    seen.clear()
+
+    novo = "Segue o relatório trimestral para revisão."
+    r = client.post("/api/process/batch", json=[{"id": 0, "text": repetido}, {"id": 1, "text": novo}])
+    assert r.status_code == 200
+    assert all("error" not in item for item in r.json()["results"])
+    assert seen == [[novo]]
+
+
+def test_batch_limits_inflight_chunks(monkeypatch):
+    """No máximo BATCH_MAX_INFLIGHT_CHUNKS lotes da requisição ocupam o pool de CPU ao mesmo tempo."""
+    monkeypatch.setattr(Config, "RESULT_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "BATCH_CHUNK_SIZE", 1)
+    monkeypatch.setattr(Config, "BATCH_MAX_INFLIGHT_CHUNKS", 1)
+    monkeypatch.setattr(nlp, "_scorer", StubScorer())
+    lock = threading.Lock()
+    running, peak = [0], [0]
+    original = main.classify_emails
+
+    def tracked(texts):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.01)
+        try:
+            return original(texts)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    monkeypatch.setattr(main, "classify_emails", tracked)
+    r = client.post("/api/process/batch", json=[{"id": i, "text": f"Pedido {i} " * (i + 1)} for i in range(6)])
+    assert r.status_code == 200
+    assert all("error" not in item for item in r.json()["results"])
+    assert peak[0] == 1
@@ -0,0 +1,171 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.batching import MicroBatcher, QueueFullError
+
+
+def test_concurrent_requests_share_a_batch():
+    """Requisições concorrentes dentro da janela viram um único lote."""
+    calls = []
+
+    def batch_fn(items):
+        calls.append(list(items))
+        return [item.upper() for item in items]
+
+    async def run():
+        batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=50)
+        return await asyncio.gather(*(batcher.submit(t) for t in ["a", "b", "c"]))
+
+    assert asyncio.run(run()) == ["A", "B", "C"]
+    assert calls == [["a", "b", "c"]]
+
+
+def test_batch_size_limit():
+    """Lotes respeitam max_batch_size."""
+    calls = []
+
+    def batch_fn(items):
+        calls.append(len(items))
+        return items
+
+    async def run():
+        batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=20)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(run()) == [0, 1, 2, 3, 4]
+    assert max(calls) <= 2
+    assert sum(calls) == 5
+
+
+def test_errors_propagate_to_each_request():
+    """Uma exceção no lote é repassada a todas as requisições do lote."""
+    def batch_fn(items):
+        raise RuntimeError("falhou")
+
+    async def run():
+        batcher = MicroBatcher(batch_fn, max_wait_ms=1)
+        await batcher.submit("x")
+
+    with pytest.raises(RuntimeError, match="falhou"):
+        asyncio.run(run())
+
+
+def test_queue_full():
+    """Com a fila cheia, submit levanta QueueFullError."""
+    async def run():
+        batcher = MicroBatcher(lambda items: items, max_queue=1, max_wait_ms=1000)
+        first = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(batcher.submit(2))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            await asyncio.gather(*(batcher.submit(i) for i in range(3, 6)))
+        first.cancel()
+        second.cancel()
+
+    asyncio.run(run())
+
+
+def test_batches_run_concurrently_up_to_limit():
+    """Com max_concurrency=2, dois lotes ficam no executor ao mesmo tempo."""
+    barrier = threading.Barrier(2, timeout=5)
+    calls = []
+
+    def batch_fn(items):
+        calls.append(list(items))
+        barrier.wait()  # só libera quando os dois lotes estiverem rodando juntos
+        return items
+
+    async def run():
+        batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=1,
+                               executor=pool, max_concurrency=2)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(4)))
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert asyncio.run(run()) == [0, 1, 2, 3]
+    assert sorted(len(c) for c in calls) == [2, 2]
+
+
+def test_concurrency_follows_executor_workers():
+    """Sem max_concurrency, o limite acompanha os workers do executor (ajustados pelo autotune)."""
+    from app.executors import BoundedExecutor
+
+    pool = BoundedExecutor("teste", 1)
+    batcher = MicroBatcher(lambda items: items, executor=pool)
+    assert batcher.concurrency == 1
+    pool.resize(3)
+    assert batcher.concurrency == 3
+    assert MicroBatcher(lambda items: items).concurrency == 1
+    pool.shutdown()
+
+
+def test_lone_request_skips_window():
+    """Sem lote em execução, uma requisição isolada não espera a janela."""
+    import time
+
+    async def run():
+        batcher = MicroBatcher(lambda items: items, max_wait_ms=500)
+        start = time.perf_counter()
+        result = await batcher.submit("x")
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(run())
+    assert result == "x"
+    assert elapsed < 0.25
+
+
+def test_window_applies_while_a_batch_is_running():
+    """Com um lote no executor, as próximas requisições esperam a janela e vão juntas."""
+    release = threading.Event()
+    calls = []
+
+    def batch_fn(items):
+        calls.append(list(items))
+        if items == ["primeiro"]:
+            release.wait(5)
+        return items
+
+    async def run():
+        batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=100,
+                               executor=pool, max_concurrency=2)
+        first = asyncio.ensure_future(batcher.submit("primeiro"))
+        await asyncio.sleep(0.02)  # o primeiro lote já está no executor
+        a = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0.02)  # ainda dentro da janela de "a"
+        results = await asyncio.gather(a, batcher.submit("b"))
+        release.set()
+        return [await first] + results
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert asyncio.run(run()) == ["primeiro", "a", "b"]
+    assert calls == [["primeiro"], ["a", "b"]]
+
+
+def test_batch_runs_through_executor_with_request_context():
+    """Com BoundedExecutor, o lote passa por run(): contextvars da requisição chegam à thread."""
+    import contextvars
+
+    from app.executors import BoundedExecutor
+
+    request_id = contextvars.ContextVar("request_id", default=None)
+    seen = []
+
+    def batch_fn(items):
+        seen.append((threading.current_thread().name, request_id.get()))
+        return items
+
+    async def run():
+        request_id.set("req-1")
+        return await batcher.submit("x")
+
+    pool = BoundedExecutor("teste", 1)
+    batcher = MicroBatcher(batch_fn, executor=pool)
+    assert asyncio.run(run()) == "x"
+    name, rid = seen[0]
+    assert name.startswith("autou-teste")
+    assert rid == "req-1"
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
@@ -0,0 +1,68 @@
+import io
+
+from pdfminer.high_level import extract_text
+
+from app import benchmark, nlp
+from app.config import Config
+from app.models.stub import StubScorer
+
+
+def test_stub_scorer_is_deterministic():
+    """O stub devolve sempre os mesmos scores para o mesmo texto, no formato do pipeline."""
+    groups = {"category": ["Produtivo", "Improdutivo"], "intent": ["a", "b", "c"]}
+    first = StubScorer().score(["texto um", "texto dois"], groups)
+    second = StubScorer().score(["texto um", "texto dois"], groups)
+
+    assert first == second
+    assert first[0] != first[1]
+    for per_group in first:
+        assert abs(sum(per_group["intent"]["scores"]) - 1.0) < 1e-9
+        assert per_group["intent"]["scores"] == sorted(per_group["intent"]["scores"], reverse=True)
+
+
+def test_make_pdf_roundtrip():
+    """O PDF gerado é lido pelo pdfminer, inclusive acentos, parênteses e várias páginas."""
+    text = "Olá (teste) de extração\n" + "\n".join(f"linha {i}" for i in range(120))
+    extracted = extract_text(io.BytesIO(benchmark.make_pdf(text, lines_per_page=50)))
+    assert "Olá (teste) de extração" in extracted
+    assert "linha 119" in extracted
+
+
+def test_run_reports_percentiles_and_restores_config():
+    """Execução curta com o stub: percentis e alocações por caso, configuração restaurada."""
+    engine, scorer = Config.CLASSIFIER_ENGINE, nlp._scorer
+    report = benchmark.run("stub", iterations=3, alloc_iterations=2,
+                           only=["preprocess", "rules", "classify_email", "api_process"])
+
+    assert report["meta"]["engine"] == "stub"
+    assert set(report["results"]) == {"preprocess", "rules", "classify_email", "api_process"}
+    for case in report["results"].values():
+        assert case["p50"] <= case["p95"] <= case["p99"] <= case["max"]
+        assert case["n"] == 3
+        assert "alloc_peak_kb" in case
+    assert Config.CLASSIFIER_ENGINE == engine
+    assert nlp._scorer is scorer
+
+
+def test_compare_delta():
+    """A comparação mostra a variação percentual do p50 dos casos em comum."""
+    old = {"results": {"a": {"p50": 2.0}, "b": {"p50": 1.0}}}
+    new = {"results": {"a": {"p50": 1.0}, "c": {"p50": 5.0}}}
+    assert benchmark.compare(old, new) == [{"case": "a", "old": 2.0, "new": 1.0, "delta_pct": -50.0}]
+
+
+def test_api_process_bypasses_batcher():
+    """`api_process` mede o caminho sem o MicroBatcher; `api_process_batched` passa por ele."""
+    from app.main import batcher
+
+    batching = Config.BATCHING_ENABLED
+    with benchmark.isolated("stub"):
+        assert Config.BATCHING_ENABLED is False
+        cases = benchmark.build_cases()
+        before = batcher.batches
+        cases["api_process"]()
+        assert batcher.batches == before
+        cases["api_process_batched"]()
+        assert batcher.batches == before + 1
+        assert Config.BATCHING_ENABLED is False
+    assert Config.BATCHING_ENABLED == batching
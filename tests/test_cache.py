@@ -0,0 +1,57 @@
+import app.cache as cache_module
+from app.cache import TTLCache, content_key
+
+
+def test_content_key_normalization():
+    """Diferenças de espaços nas pontas e CRLF não mudam a chave."""
+    assert content_key("  Olá\r\nmundo ", "m") == content_key("Olá\nmundo", "m")
+    assert content_key("Olá", "modelo-a") != content_key("Olá", "modelo-b")
+
+
+def test_lru_eviction():
+    """O item menos usado recentemente é removido ao exceder o tamanho."""
+    cache = TTLCache(max_size=2, ttl=0)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiration(monkeypatch):
+    """Entradas expiram após o TTL."""
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLCache(max_size=10, ttl=5)
+    cache.set("a", 1)
+    now[0] += 4
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_shrink_drops_oldest():
+    """shrink remove a fração menos usada recentemente."""
+    cache = TTLCache(max_size=10, ttl=0)
+    for key in "abcd":
+        cache.set(key, key)
+    cache.get("a")
+    assert cache.shrink(0.5) == 2
+    assert cache.get("b") is None and cache.get("c") is None
+    assert cache.get("a") == "a" and cache.get("d") == "d"
+
+
+def test_get_hit_counts_only_hits():
+    """get_hit não contabiliza o miss (o caminho normal consulta de novo)."""
+    cache = TTLCache(max_size=10, ttl=0)
+    assert cache.get_hit("a") is None
+    cache.set("a", 1)
+    assert cache.get_hit("a") == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 0)
@@ -0,0 +1,16 @@
+from app.corpus import load_corpus, CORPUS_LABELS
+
+
+def test_load_corpus():
+    """Testa o carregamento do corpus rotulado embutido."""
+    corpus = load_corpus()
+    assert len(corpus) == len(CORPUS_LABELS)
+    for item in corpus:
+        assert item["text"]
+        assert item["category"] in ("Produtivo", "Improdutivo")
+
+
+def test_load_corpus_utf16():
+    """Arquivos salvos em UTF-16 (com BOM) devem ser decodificados."""
+    item = next(i for i in load_corpus() if i["id"].endswith("test_status.txt"))
+    assert item["text"].startswith("Preciso do status")
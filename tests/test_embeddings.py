@@ -0,0 +1,43 @@
+import numpy as np
+
+from app.models.embeddings import EmbeddingScorer
+
+VOCAB = ["status", "reunião", "obrigado", "oferta"]
+
+
+def fake_embed(calls):
+    def embed(texts):
+        calls.append(list(texts))
+        return np.array([[float(w in t.lower()) + 0.01 for w in VOCAB] for t in texts])
+    return embed
+
+
+def test_embedding_scorer_ranks_by_similarity(tmp_path):
+    """O label mais parecido com o e-mail deve ficar em primeiro."""
+    calls = []
+    scorer = EmbeddingScorer(None, fake_embed(calls), "fake-model", cache_dir=str(tmp_path))
+    labels = ["Pedido de status", "Agendar reunião", "Obrigado"]
+    scorer.precompute(labels)
+    result = scorer.score(["Qual o status do chamado?"], {"intent": labels})[0]
+
+    assert result["intent"]["labels"][0] == "Pedido de status"
+    assert abs(sum(result["intent"]["scores"]) - 1.0) < 1e-6
+
+
+def test_label_embeddings_cached_on_disk(tmp_path):
+    """Um novo scorer com o mesmo modelo e labels não recalcula os labels."""
+    labels = ["Pedido de status", "Obrigado"]
+    first = []
+    EmbeddingScorer(None, fake_embed(first), "fake-model", cache_dir=str(tmp_path)).precompute(labels)
+    assert first == [labels]
+
+    second = []
+    scorer = EmbeddingScorer(None, fake_embed(second), "fake-model", cache_dir=str(tmp_path))
+    scorer.precompute(labels)
+    scorer.score(["obrigado!"], {"intent": labels})
+    assert second == [["obrigado!"]]
+
+    # Outro modelo usa outra chave de cache
+    third = []
+    EmbeddingScorer(None, fake_embed(third), "outro-modelo", cache_dir=str(tmp_path)).precompute(labels)
+    assert third == [labels]
@@ -0,0 +1,81 @@
+import numpy as np
+
+import app.nlp as nlp
+from app import evaluation
+from app.config import Config
+from app.models.stub import StubScorer
+
+
+def test_confusion_matrix():
+    """A matriz de confusão conta os pares (esperado, previsto)."""
+    matrix = evaluation.confusion(["a", "a", "b"], ["a", "b", "b"])
+    assert matrix == {"a": {"a": 1, "b": 1}, "b": {"b": 1}}
+
+
+def test_pareto_front():
+    """Variantes dominadas em acurácia e latência ficam fora da fronteira."""
+    def result(name, cat, intent, mean):
+        return {"name": name, "category_accuracy": cat, "intent_accuracy": intent,
+                "latency_ms": {"mean": mean}}
+
+    results = [
+        result("rapida", 0.7, 0.5, 10.0),
+        result("precisa", 0.9, 0.8, 100.0),
+        result("dominada", 0.7, 0.5, 50.0),
+        {"name": "quebrada", "error": "sem modelo"},
+    ]
+    assert evaluation.pareto(results) == ["rapida", "precisa"]
+
+
+def test_variants_cover_all_combinations():
+    """Cada engine NLI combina modelos, orçamentos e regras; o stub não tem modelo."""
+    variants = evaluation.variants(["fused", "stub"], ["m1", "org/m2"], [128, 0], [True, False])
+    assert len(variants) == 2 * 2 * 2 + 2 * 2
+    assert variants[0]["name"] == "fused/m1/budget=128/rules=on"
+    assert {v["model"] for v in variants if v["engine"] == "stub"} == {"stub"}
+
+
+def test_run_with_stub_restores_state():
+    """Avaliação com o stub: métricas por variante, marcação de Pareto e configuração restaurada."""
+    scorer, engine = nlp._scorer, Config.CLASSIFIER_ENGINE
+    samples = evaluation.load_dataset()[:4]
+    report = evaluation.run(evaluation.variants(["stub"], [], [0], [True, False]), samples)
+
+    assert len(report["results"]) == 2
+    for r in report["results"]:
+        assert r["emails"] == 4
+        assert 0.0 <= r["intent_accuracy"] <= 1.0
+        assert sum(sum(row.values()) for row in r["confusion"]["category"].values()) == 4
+        assert r["peak_rss_mb"] > 0
+    assert any(r["pareto"] for r in report["results"])
+    assert "| Configuração |" in evaluation.markdown(report)
+    assert nlp._scorer is scorer
+    assert Config.CLASSIFIER_ENGINE == engine
+
+
+
+def test_peak_rss_is_measured_per_variant(monkeypatch):
+    """O modelo da variante anterior é liberado: o pico de RSS de cada variante é independente.
+
+    O scorer "grande" guarda ~200 MB em um ciclo de referências (como os módulos
+    do torch); mesmo com GC_FREEZE ligado, a variante seguinte não o carrega junto.
+    """
+    ballast_mb = 200
+
+    def load(engine):
+        scorer = StubScorer()
+        if Config.ZSL_MODEL == "grande":
+            scorer.ballast = np.ones(ballast_mb * 1024 * 1024, dtype=np.uint8)
+            scorer.cycle = scorer
+        return scorer
+
+    monkeypatch.setattr(nlp, "_load_scorer", load)
+    monkeypatch.setattr(Config, "GC_FREEZE", True)
+    variant_list = [
+        {"name": name, "engine": "fused", "model": name, "budget": 0, "overrides": True}
+        for name in ("grande", "pequeno")
+    ]
+    report = evaluation.run(variant_list, evaluation.load_dataset()[:2])
+
+    grande, pequeno = report["results"]
+    assert grande["peak_rss_mb"] - pequeno["peak_rss_mb"] > ballast_mb / 2
@@ -0,0 +1,101 @@
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from app.executors import BoundedExecutor
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def test_run_off_event_loop_with_context():
+    """A função roda em outra thread e enxerga os contextvars da requisição."""
+    pool = BoundedExecutor("teste", 1)
+
+    def work():
+        return threading.current_thread().name, request_id.get()
+
+    async def run():
+        request_id.set("abc")
+        return await pool.run(work)
+
+    name, rid = asyncio.run(run())
+    assert name.startswith("autou-teste")
+    assert rid == "abc"
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
+
+
+def test_stats_report_saturation():
+    """Tarefas em execução e na fila aparecem nas estatísticas."""
+    pool = BoundedExecutor("teste", 1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    first = pool.submit(block)
+    second = pool.submit(block)
+    started.wait(5)
+    stats = pool.stats()
+    assert stats["active"] == 1
+    assert stats["queued"] == 1
+    assert stats["saturation"] == 1.0
+    release.set()
+    first.result(5)
+    second.result(5)
+    assert pool.stats()["completed"] == 2
+    pool.shutdown()
+
+
+def test_resize_rebuilds_pool():
+    """resize troca o pool: tarefas antigas terminam e as novas usam o novo limite."""
+    pool = BoundedExecutor("teste", 1)
+    release = threading.Event()
+    running = threading.Event()
+
+    def block():
+        running.set()
+        release.wait(5)
+        return threading.current_thread().name
+
+    first = pool.submit(block)
+    running.wait(5)
+    pool.resize(2)
+    # Duas tarefas simultâneas no novo pool, enquanto a antiga segue bloqueada
+    started = threading.Barrier(3, timeout=5)
+    second = [pool.submit(started.wait) for _ in range(2)]
+    started.wait()
+    release.set()
+    assert first.result(5).startswith("autou-teste")
+    assert all(f.result(5) is not None for f in second)
+    assert pool.stats()["workers"] == 2
+    pool.shutdown()
+
+
+def test_full_queue_rejects_work():
+    """Com max_queue, tarefas além da fila são recusadas em vez de acumular."""
+    from app.executors import QueueFullError
+
+    pool = BoundedExecutor("teste", 1, max_queue=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    running = pool.submit(block)
+    started.wait(5)
+    waiting = pool.submit(block)
+    with pytest.raises(QueueFullError):
+        pool.submit(block)
+    assert pool.stats()["rejected"] == 1
+    release.set()
+    running.result(5)
+    waiting.result(5)
+    pool.submit(block).result(5)  # com a fila livre, volta a aceitar
+    pool.shutdown()
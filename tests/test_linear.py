@@ -0,0 +1,45 @@
+import numpy as np
+
+from app.models.linear import LinearClassifier, hashed_terms, margin
+
+SAMPLES = [
+    {"text": "Qual o status do chamado 123?", "category": "Produtivo",
+     "intent": "Solicitação de status ou acompanhamento"},
+    {"text": "Poderia informar o andamento do pedido?", "category": "Produtivo",
+     "intent": "Solicitação de status ou acompanhamento"},
+    {"text": "Muito obrigado pelo ótimo trabalho!", "category": "Improdutivo",
+     "intent": "Agradecimento ou felicitação"},
+    {"text": "Parabéns pela entrega, obrigado a todos", "category": "Improdutivo",
+     "intent": "Agradecimento ou felicitação"},
+]
+
+
+def test_hashed_terms_deterministic():
+    """O hashing é estável (CRC32) e inclui bigramas."""
+    a = hashed_terms("Status do chamado", 1024)
+    assert a == hashed_terms("status do CHAMADO", 1024)
+    assert len(a) <= 5  # 3 unigramas + 2 bigramas (colisões podem juntar)
+    assert all(0 <= idx < 1024 for idx in a)
+
+
+def test_train_and_predict():
+    """O modelo aprende o corpus de treino e devolve scores ordenados."""
+    model = LinearClassifier.train(SAMPLES, n_features=2048, epochs=50)
+    for sample in SAMPLES:
+        pred = model.predict(sample["text"])
+        assert pred["category"]["labels"][0] == sample["category"]
+        assert pred["intent"]["labels"][0] == sample["intent"]
+        assert abs(sum(pred["intent"]["scores"]) - 1.0) < 1e-5
+        assert margin(pred["category"]) > 0
+
+
+def test_save_load_roundtrip(tmp_path):
+    """O artefato salvo em .npz reproduz as mesmas probabilidades."""
+    model = LinearClassifier.train(SAMPLES, n_features=2048, epochs=5)
+    path = str(tmp_path / "linear.npz")
+    model.save(path)
+    loaded = LinearClassifier.load(path)
+    text = "status do pedido, obrigado"
+    for name, probs in model.probabilities(text).items():
+        assert np.allclose(probs, loaded.probabilities(text)[name])
+    assert loaded.heads["category"][0] == model.heads["category"][0]
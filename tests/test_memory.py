@@ -0,0 +1,96 @@
+import gc
+
+import app.memory as memory_module
+from app.cache import TTLCache
+from app.memory import MemoryGovernor, parse_thresholds
+
+
+class FakeRSS:
+    """memory_info falso com RSS controlado pelo teste."""
+
+    def __init__(self, rss):
+        self.rss = rss
+
+    def __call__(self):
+        return {"rss": self.rss}
+
+
+def make_governor(rss, monkeypatch, **kwargs):
+    monkeypatch.setattr(memory_module.gc, "collect", lambda *a: 0)
+    governor = MemoryGovernor(1000, 800, check_interval=1, memory_info=rss, **kwargs)
+    governor._malloc_trim = None
+    return governor
+
+
+def test_parse_thresholds():
+    assert parse_thresholds("50000, 20,20") == (50000, 20, 20)
+    assert parse_thresholds("") == ()
+
+
+def test_no_action_below_high_watermark(monkeypatch):
+    """Abaixo da marca alta o governor só lê o RSS."""
+    governor = make_governor(FakeRSS(900), monkeypatch)
+    assert governor.check() is False
+    assert governor.stats()["collections"] == 0
+    assert governor.stats()["checks"] == 1
+
+
+def test_check_interval(monkeypatch):
+    """O RSS só é lido a cada `check_interval` operações."""
+    governor = make_governor(FakeRSS(500), monkeypatch)
+    governor.check_interval = 3
+    for _ in range(5):
+        governor.check()
+    assert governor.stats()["checks"] == 1
+
+
+def test_collect_then_evict_caches(monkeypatch):
+    """Acima da marca alta coleta; se não bastar, esvazia metade do cache."""
+    rss = FakeRSS(1200)
+    governor = make_governor(rss, monkeypatch)
+    cache = TTLCache(max_size=10, ttl=0)
+    for i in range(10):
+        cache.set(str(i), i)
+    governor.register_cache(cache)
+
+    assert governor.check() is True
+    stats = governor.stats()
+    assert stats["collections"] == 2
+    assert stats["evictions"] == 1
+    assert len(cache) == 5
+    assert cache.get("0") is None and cache.get("9") == 9
+
+
+def test_backoff_when_memory_is_the_model(monkeypatch):
+    """Se o RSS não desce (é o próprio modelo), não coleta a cada verificação."""
+    rss = FakeRSS(1200)
+    governor = make_governor(rss, monkeypatch)
+    governor.check()
+    collections = governor.stats()["collections"]
+    governor.check()
+    assert governor.stats()["collections"] == collections
+
+    rss.rss = 1500  # cresceu mais um intervalo entre as marcas
+    assert governor.check() is True
+
+    rss.rss = 700  # abaixo da marca baixa: volta ao normal
+    governor.check()
+    rss.rss = 1100
+    assert governor.check() is True
+
+
+def test_disabled(monkeypatch):
+    governor = make_governor(FakeRSS(5000), monkeypatch, enabled=False)
+    assert governor.check() is False
+    assert governor.stats()["checks"] == 0
+
+
+def test_freeze_counts():
+    """gc.freeze move os objetos atuais para a geração permanente."""
+    governor = MemoryGovernor(0, 0)
+    try:
+        governor.freeze()
+        assert governor.stats()["freezes"] == 1
+        assert governor.stats()["frozen_objects"] > 0
+    finally:
+        gc.unfreeze()
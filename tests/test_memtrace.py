@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import tracemalloc
+
+from fastapi.testclient import TestClient
+
+import app.nlp as nlp
+from app import memtrace
+from app.benchmark import make_pdf
+from app.config import Config
+from app.main import app
+from app.models.stub import StubScorer
+
+client = TestClient(app)
+
+
+def test_stage_is_noop_without_trace():
+    """Fora de uma requisição amostrada, stage() não liga o tracemalloc."""
+    with memtrace.stage("extract"):
+        assert not tracemalloc.is_tracing()
+
+
+def test_request_trace_reports_stage_allocations():
+    """Cada etapa registra bytes alocados e pico; o retido e as linhas que o seguraram aparecem no fim."""
+    trace = memtrace.RequestTrace("/api/process").start()
+    kept = []
+    with trace.stage("aloca"):
+        kept.append(bytearray(512 * 1024))
+    with trace.stage("temporario"):
+        bytearray(256 * 1024)
+    report = trace.finish(200)
+
+    assert not tracemalloc.is_tracing()
+    aloca, temporario = report["stages"]
+    assert aloca["allocated_kb"] >= 512
+    assert temporario["allocated_kb"] < 64
+    assert temporario["peak_kb"] >= 256
+    assert report["retained_kb"] >= 512
+    assert "test_memtrace.py" in report["retained_top"][0]["site"]
+
+
+def test_stages_take_no_snapshots(monkeypatch):
+    """As etapas rodam no event loop: nenhuma delas tira snapshot do tracemalloc."""
+    trace = memtrace.RequestTrace("/api/process").start()
+    snapshots = []
+    original = tracemalloc.take_snapshot
+    monkeypatch.setattr(tracemalloc, "take_snapshot", lambda: snapshots.append(1) or original())
+    try:
+        with trace.stage("classify"):
+            bytearray(64 * 1024)
+        assert snapshots == []
+    finally:
+        trace.finish(200)
+    assert snapshots == [1]
+
+
+def test_request_snapshots_run_off_event_loop(monkeypatch):
+    """Os snapshots de início e fim da requisição amostrada rodam fora da thread do event loop."""
+    threads = []
+    original = tracemalloc.take_snapshot
+
+    def recording():
+        threads.append(threading.current_thread())
+        return original()
+
+    async def app(scope, receive, send):
+        with memtrace.stage("classify"):
+            bytearray(1024)
+
+    async def run():
+        middleware = memtrace.MemtraceMiddleware(app)
+        await middleware({"type": "http", "path": "/api/process"}, None, None)
+        return threading.current_thread()
+
+    monkeypatch.setattr(Config, "MEMTRACE_ENABLED", True)
+    monkeypatch.setattr(Config, "MEMTRACE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(memtrace, "_store", memtrace.ReportStore())
+    monkeypatch.setattr(tracemalloc, "take_snapshot", recording)
+    loop_thread = asyncio.run(run())
+
+    assert len(threads) == 2
+    assert loop_thread not in threads
+    assert "classify" in memtrace.get_store().summaries()[0]["stages"]
+
+
+def test_snapshot_diff_and_clear():
+    """O diff entre snapshots mostra o que cresceu; o DELETE desliga o tracemalloc."""
+    store = memtrace.ReportStore()
+    base = store.take_snapshot()["id"]
+    grown = [bytearray(300 * 1024)]
+    diff = store.diff(base)
+
+    assert diff["total_kb"] >= 300
+    assert any(s["size_kb"] >= 300 for s in diff["top"])
+    assert store.clear_snapshots() == 1
+    assert not tracemalloc.is_tracing()
+    del grown
+
+
+def test_sampled_request_endpoints(monkeypatch):
+    """Com amostragem de 100%, um upload gera relatório com as etapas e aparece em /debug/memory."""
+    monkeypatch.setattr(Config, "MEMTRACE_ENABLED", True)
+    monkeypatch.setattr(Config, "MEMTRACE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(Config, "RESULT_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "PERSISTENT_CACHE_ENABLED", False)
+    monkeypatch.setattr(nlp, "_scorer", StubScorer())
+    monkeypatch.setattr(memtrace, "_store", memtrace.ReportStore())
+
+    pdf = make_pdf("Qual o status do pedido 42?")
+    r = client.post("/api/process", files={"file": ("email.pdf", pdf, "application/pdf")})
+    assert r.status_code == 200
+    assert not tracemalloc.is_tracing()
+
+    summary = client.get("/debug/memory").json()
+    assert len(summary["reports"]) == 1
+    assert set(summary["reports"][0]["stages"]) == {"upload_read", "extract", "classify", "reply"}
+    report_id = summary["reports"][0]["id"]
+    report = client.get(f"/debug/memory/reports/{report_id}").json()
+    assert report["status"] == 200
+
+    snap = client.post("/debug/memory/snapshots").json()
+    assert client.get("/debug/memory/diff", params={"base": snap["id"]}).status_code == 200
+    assert client.get("/debug/memory/diff", params={"base": "nenhum"}).status_code == 404
+    assert client.delete("/debug/memory/snapshots").json() == {"dropped": 1}
+
+
+def test_endpoints_disabled_by_default():
+    """Sem MEMTRACE_ENABLED os endpoints de depuração não existem."""
+    assert client.get("/debug/memory").status_code == 404
@@ -0,0 +1,88 @@
+from fastapi.testclient import TestClient
+
+import app.nlp as nlp
+from app import metrics
+from app.config import Config
+from app.main import app
+from app.models.stub import StubScorer
+
+client = TestClient(app)
+
+
+def test_histogram_render_is_cumulative():
+    """Os buckets do histograma são cumulativos e terminam em +Inf com o total."""
+    hist = metrics.Histogram("h_seconds", "teste", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        hist.observe(value, stage="a")
+
+    lines = hist.render()
+    assert 'h_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'h_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'h_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'h_seconds_count{stage="a"} 3' in lines
+    assert hist.count(stage="a") == 3
+
+
+def test_counter_escapes_labels():
+    """Valores de label com aspas e quebras de linha são escapados."""
+    counter = metrics.Counter("c_total", "teste", ["kind"])
+    counter.inc(kind='a"b\nc')
+    counter.inc(2, kind='a"b\nc')
+    assert counter.render()[-1] == 'c_total{kind="a\\"b\\nc"} 3'
+
+
+def test_stage_disabled_records_nothing(monkeypatch):
+    """Com METRICS_ENABLED=false, stage() não registra nada."""
+    monkeypatch.setattr(Config, "METRICS_ENABLED", False)
+    before = metrics.STAGE_SECONDS.count(stage="teste_desligado")
+    with metrics.stage("teste_desligado"):
+        pass
+    assert metrics.STAGE_SECONDS.count(stage="teste_desligado") == before
+
+
+def test_metrics_endpoint_after_process(monkeypatch):
+    """Depois de um /api/process, /metrics expõe etapas, origem da resposta e status."""
+    monkeypatch.setattr(Config, "RESULT_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "BATCHING_ENABLED", False)
+    monkeypatch.setattr(nlp, "_scorer", StubScorer())
+    before = metrics.STAGE_SECONDS.count(stage="model_category_intent")
+
+    r = client.post("/api/process", data={"text": "Qual o status do meu pedido 42?"})
+    assert r.status_code == 200
+    assert metrics.STAGE_SECONDS.count(stage="model_category_intent") == before + 1
+
+    body = client.get("/metrics").text
+    assert "# TYPE email_stage_seconds histogram" in body
+    for stage in ("preprocess", "rules", "reply_template"):
+        assert f'email_stage_seconds_count{{stage="{stage}"}}' in body
+    assert 'email_reply_source_total{source="template"}' in body
+    assert 'email_requests_total{path="/api/process",status="200"}' in body
+    assert "process_resident_memory_bytes" in body
+
+
+def test_unknown_paths_collapse_into_other(monkeypatch):
+    """Só rotas existentes viram séries; URLs arbitrárias caem em path="other"."""
+    monkeypatch.setattr(Config, "METRICS_ENABLED", True)
+    before = metrics.REQUESTS.value(path="other", status="404")
+    for i in range(3):
+        assert client.get(f"/api/nao-existe-{i}").status_code == 404
+    assert metrics.REQUESTS.value(path="other", status="404") == before + 3
+
+    body = client.get("/metrics").text
+    assert "nao-existe" not in body
+
+
+def test_executor_gauges_on_metrics():
+    """Fila e saturação dos pools de CPU e I/O aparecem em /metrics."""
+    body = client.get("/metrics").text
+    for pool in ("cpu", "io"):
+        for field in ("queued", "active", "workers", "saturation"):
+            assert f"email_executor_{pool}_{field} " in body
+
+
+def test_route_label_uses_template():
+    from types import SimpleNamespace
+
+    scope = {"path": "/api/jobs/123", "route": SimpleNamespace(path="/api/jobs/{job_id}")}
+    assert metrics.route_label(scope) == "/api/jobs/{job_id}"
+    assert metrics.route_label({"path": "/api/jobs/123"}) == "other"
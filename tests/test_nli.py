@@ -0,0 +1,107 @@
+import numpy as np
+
+from app.models.nli import NLIScorer, entailment_index
+
+
+class FakeTokenizer:
+    """Tokenizer mínimo (split por espaço) com a API usada pelo NLIScorer."""
+
+    model_max_length = 16
+    pad_token_id = 0
+    model_input_names = ["input_ids", "attention_mask"]
+
+    def __init__(self):
+        self.vocab = {}
+
+    def __call__(self, text, add_special_tokens=False):
+        ids = [self.vocab.setdefault(tok, len(self.vocab) + 3) for tok in text.split()]
+        return {"input_ids": ids}
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 3 if pair else 2
+
+    def build_inputs_with_special_tokens(self, a, b):
+        return [1] + a + [2] + b + [2]
+
+
+def make_scorer(calls):
+    tok = FakeTokenizer()
+    boost = tok("alvo", add_special_tokens=False)["input_ids"][0]
+
+    def forward(inputs):
+        calls.append(inputs["input_ids"].shape)
+        ids = inputs["input_ids"]
+        # Entailment alto quando a hipótese contém o token "alvo"
+        entail = (ids == boost).sum(axis=1).astype(np.float32) * 5.0
+        return np.stack([np.zeros_like(entail), np.zeros_like(entail), entail], axis=1)
+
+    label2id = {"contradiction": 0, "neutral": 1, "entailment": 2}
+    return NLIScorer(tok, forward, label2id, hypothesis_template="{}", batch_size=64)
+
+
+def test_entailment_index():
+    """Testa a descoberta do índice de entailment na config do modelo."""
+    assert entailment_index({"CONTRADICTION": 0, "ENTAILMENT": 2}) == 2
+    assert entailment_index({"a": 0}) == -1
+
+
+def test_score_single_forward_for_all_groups():
+    """Todas as hipóteses de todos os grupos devem ir em um único forward."""
+    calls = []
+    scorer = make_scorer(calls)
+    groups = {"category": ["x", "y"], "intent": ["a", "alvo b", "c"]}
+    result = scorer.score(["texto do email"], groups)[0]
+
+    assert len(calls) == 1
+    assert calls[0][0] == 5
+    assert result["intent"]["labels"][0] == "alvo b"
+    assert abs(sum(result["intent"]["scores"]) - 1.0) < 1e-6
+    assert abs(sum(result["category"]["scores"]) - 1.0) < 1e-6
+    assert result["intent"]["scores"] == sorted(result["intent"]["scores"], reverse=True)
+
+
+def test_score_truncates_premise_only():
+    """A premissa é truncada para caber no max_length junto da hipótese."""
+    calls = []
+    scorer = make_scorer(calls)
+    long_text = " ".join(f"w{i}" for i in range(100))
+    scorer.score([long_text], {"g": ["alvo"]})
+    assert calls[0][1] == scorer.max_length
+
+
+def test_windows_cover_whole_text():
+    """As janelas se sobrepõem e a última termina no fim do texto."""
+    scorer = make_scorer([])
+    ids = list(range(25))
+    windows = scorer.windows(ids, window=10, overlap=3, max_windows=0)
+    assert windows[0] == ids[:10]
+    assert windows[-1] == ids[-10:]
+    assert all(len(w) == 10 for w in windows)
+    assert len(scorer.windows(ids, window=10, overlap=3, max_windows=2)) == 2
+
+
+def test_score_long_sees_text_past_the_cutoff():
+    """Evidência no fim de um texto longo influencia o resultado."""
+    calls = []
+    scorer = make_scorer(calls)
+    boost = scorer.encode("alvo")[0]
+
+    def forward(inputs):
+        calls.append(inputs["input_ids"].shape)
+        # Entailment só quando premissa e hipótese mencionam "alvo"
+        entail = ((inputs["input_ids"] == boost).sum(axis=1) >= 2).astype(np.float32) * 5.0
+        return np.stack([np.zeros_like(entail), np.zeros_like(entail), entail], axis=1)
+
+    scorer.forward = forward
+    text = " ".join(f"w{i}" for i in range(40)) + " alvo"
+    groups = {"g": ["alvo", "outro"]}
+
+    truncated = scorer.score([text], groups)[0]["g"]
+    chunked = scorer.score_long([text], groups, window=8, overlap=2, aggregation="max")[0]["g"]
+
+    assert len(calls) == 2
+    assert calls[1][0] > 2  # várias janelas no mesmo forward
+    assert truncated["scores"][0] == 0.5
+    assert chunked["labels"][0] == "alvo"
+    assert chunked["scores"][0] > truncated["scores"][0]
+    assert abs(sum(chunked["scores"]) - 1.0) < 1e-6
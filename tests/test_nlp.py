@@ -1,5 +1,32 @@
 import pytest
-from app.nlp import classify_email, preprocess
+import app.nlp as nlp
+from app.config import Config
+from app.nlp import (
+    classify_email, classify_emails, preprocess, score_texts, select_input,
+    LABELS_CATEGORY, LABELS_INTENT, LABELS_INTENT_PRODUTIVO,
+)
+
+
+class RecordingScorer:
+    """Scorer falso que registra os labels avaliados e favorece o primeiro."""
+
+    def __init__(self, cat_scores):
+        self.cat_scores = cat_scores
+        self.calls = []
+
+    def score(self, premises, groups):
+        self.calls.append({name: list(labels) for name, labels in groups.items()})
+        out = []
+        for _ in premises:
+            res = {}
+            for name, labels in groups.items():
+                if name == "category":
+                    scores = self.cat_scores
+                else:
+                    scores = [1.0 / len(labels)] * len(labels)
+                res[name] = {"labels": list(labels), "scores": list(scores)}
+            out.append(res)
+        return out
 
 
 def test_preprocess_text():
@@ -93,4 +120,234 @@ def test_classify_long_text():
     
     assert "category" in result
     assert "intent" in result
-    assert result["category"] in ["Produtivo", "Improdutivo"]
\ No newline at end of file
+    assert result["category"] in ["Produtivo", "Improdutivo"]
+
+def test_score_texts_pruning_confident(monkeypatch):
+    """Com margem suficiente, só as intenções da categoria são pontuadas."""
+    monkeypatch.setattr(Config, "INTENT_PRUNING", True)
+    monkeypatch.setattr(Config, "INTENT_PRUNING_MARGIN", 0.3)
+    scorer = RecordingScorer([0.9, 0.1])
+    result = score_texts(scorer, ["status chamado"])[0]
+
+    assert scorer.calls[0] == {"category": LABELS_CATEGORY}
+    assert scorer.calls[1] == {"intent": LABELS_INTENT_PRODUTIVO}
+    assert result["intent"]["labels"] == LABELS_INTENT_PRODUTIVO
+
+
+def test_score_texts_pruning_fallback(monkeypatch):
+    """Com categoria incerta, todas as intenções são pontuadas."""
+    monkeypatch.setattr(Config, "INTENT_PRUNING", True)
+    monkeypatch.setattr(Config, "INTENT_PRUNING_MARGIN", 0.3)
+    scorer = RecordingScorer([0.55, 0.45])
+    score_texts(scorer, ["texto ambíguo"])
+    assert scorer.calls[1] == {"intent": LABELS_INTENT}
+
+
+def test_classify_emails_cache_skips_model(monkeypatch):
+    """Um texto repetido é respondido pelo cache, sem chamar o scorer."""
+    monkeypatch.setattr(Config, "RESULT_CACHE_ENABLED", True)
+    scorer = RecordingScorer([0.8, 0.2])
+    monkeypatch.setattr(nlp, "_scorer", scorer)
+    nlp.result_cache.clear()
+
+    first = classify_emails(["Segue o relatório do projeto X"])[0]
+    calls = len(scorer.calls)
+    second = classify_emails(["Segue o relatório do projeto X  "])[0]
+
+    assert len(scorer.calls) == calls
+    assert second == first
+    nlp.result_cache.clear()
+
+
+def test_rules_first_skips_model(monkeypatch):
+    """Com RULES_FIRST, spam óbvio é decidido pelas regras e só o resto vai ao modelo."""
+    monkeypatch.setattr(Config, "RESULT_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "RULES_FIRST", True)
+    scorer = RecordingScorer([0.8, 0.2])
+    monkeypatch.setattr(nlp, "_scorer", scorer)
+
+    spam, normal = classify_emails([
+        "Oferta imperdível! Desconto só hoje, clique aqui",
+        "Segue o relatório do projeto X",
+    ])
+
+    assert spam["stage"] == "rules"
+    assert spam["intent"] == "Spam ou marketing"
+    assert 0.6 < spam["category_score"] <= 0.99
+    assert normal["stage"] == "model"
+    assert len(scorer.calls) == 1
+
+
+
+def test_keyword_overrides_disabled_keeps_model_answer(monkeypatch):
+    """Com KEYWORD_OVERRIDES=false, nem o ajuste nem o RULES_FIRST alteram a resposta do modelo."""
+    monkeypatch.setattr(Config, "RESULT_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "RULES_FIRST", True)
+    scorer = RecordingScorer([0.8, 0.2])
+    monkeypatch.setattr(nlp, "_scorer", scorer)
+    spam = "Oferta imperdível! Desconto só hoje, clique aqui"
+
+    assert classify_emails([spam])[0]["intent"] == "Spam ou marketing"
+    monkeypatch.setattr(Config, "KEYWORD_OVERRIDES", False)
+    result = classify_emails([spam])[0]
+
+    assert result["stage"] == "model"
+    assert result["category"] == "Produtivo"
+    assert result["intent"] == LABELS_INTENT[0]
+
+def test_cascade_escalates_only_uncertain(monkeypatch):
+    """Na cascata, só os e-mails com margem baixa no classificador linear vão ao modelo."""
+    from app.models.linear import LinearClassifier
+
+    linear = LinearClassifier.train([
+        {"text": "qual o status do chamado", "category": "Produtivo",
+         "intent": "Solicitação de status ou acompanhamento"},
+        {"text": "convite para o workshop de python", "category": "Improdutivo",
+         "intent": "Convite para evento ou treinamento"},
+    ], n_features=1024, epochs=50)
+    monkeypatch.setattr(Config, "RESULT_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "CASCADE_ENABLED", True)
+    monkeypatch.setattr(Config, "CASCADE_MARGIN", 0.5)
+    monkeypatch.setattr(nlp, "_linear", linear)
+    monkeypatch.setattr(nlp, "_linear_loaded", True)
+    scorer = RecordingScorer([0.8, 0.2])
+    monkeypatch.setattr(nlp, "_scorer", scorer)
+
+    easy, hard = classify_emails(["qual o status do chamado", "texto sem nenhuma pista"])
+
+    assert easy["stage"] == "linear"
+    assert easy["category"] == "Produtivo"
+    assert hard["stage"] == "model"
+    assert len(scorer.calls) == 1
+
+
+def test_cascade_failure_falls_back_to_model(monkeypatch, tmp_path):
+    """Artefato linear corrompido: o e-mail vai para o modelo e a carga é tentada de novo depois."""
+    path = tmp_path / "linear_model.npz"
+    path.write_bytes(b"corrompido")
+    monkeypatch.setattr(Config, "RESULT_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "CASCADE_ENABLED", True)
+    monkeypatch.setattr(Config, "LINEAR_MODEL_PATH", str(path))
+    monkeypatch.setattr(nlp, "_linear", None)
+    monkeypatch.setattr(nlp, "_linear_loaded", False)
+    scorer = RecordingScorer([0.8, 0.2])
+    monkeypatch.setattr(nlp, "_scorer", scorer)
+
+    result = classify_emails(["qual o status do chamado"])[0]
+    assert result["stage"] == "model"
+    assert len(scorer.calls) == 1
+    assert nlp._linear_loaded is False  # falhou: não desliga a cascata de vez
+
+
+def test_linear_model_loads_once_across_threads(monkeypatch):
+    """Enquanto a primeira thread carrega, as demais esperam em vez de receber None."""
+    import threading
+    import time
+
+    loads = []
+
+    def slow_load():
+        loads.append(1)
+        time.sleep(0.05)
+        return "linear"
+
+    monkeypatch.setattr(nlp, "_linear", None)
+    monkeypatch.setattr(nlp, "_linear_loaded", False)
+    monkeypatch.setattr(nlp, "_load_linear", slow_load)
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(nlp.get_linear_model())) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert seen == ["linear"] * 4
+    assert len(loads) == 1
+
+
+def whitespace_tokenizer(text, add_special_tokens=False):
+    return {"input_ids": text.split()}
+
+
+def test_select_input_keeps_subject_and_first_sentences():
+    """Mantém assunto e primeiras frases dentro do orçamento de tokens."""
+    text = (
+        "Assunto: Status do chamado\n"
+        "Olá equipe. Preciso do status do chamado 123. "
+        + "Histórico antigo da conversa encaminhada. " * 50
+    )
+    selected = select_input(text, whitespace_tokenizer, 12)
+    assert selected.startswith("Assunto: Status do chamado")
+    assert "Preciso do status do chamado 123." in selected
+    assert "Histórico" not in selected
+    assert len(selected.split()) <= 12
+
+
+def test_select_input_short_text_unchanged():
+    """Textos que já cabem no orçamento não são alterados."""
+    assert select_input("Preciso do status.", whitespace_tokenizer, 100) == "Preciso do status."
+    assert select_input("a " * 500, whitespace_tokenizer, 0) == ("a " * 500).strip()
+
+
+def byte_tokenizer(text, add_special_tokens=False):
+    """Um token por byte UTF-8, como o pior caso do BPE byte-level (acentos, emoji)."""
+    return {"input_ids": list(text.encode("utf-8"))}
+
+
+def test_select_input_counts_multibyte_characters():
+    """Texto com menos caracteres que o orçamento ainda é cortado se passar em tokens."""
+    text = "Ação já! 😀😀😀 Solicitação urgente. Informações adicionais."
+    budget = len(text) + 5
+    assert len(byte_tokenizer(text)["input_ids"]) > budget
+
+    selected = select_input(text, byte_tokenizer, budget)
+    assert len(byte_tokenizer(selected)["input_ids"]) <= budget
+    assert selected.startswith("Ação já!")
+
+    # Uma única frase longa, sem pontuação: o corte proporcional também respeita o orçamento
+    emoji = "😀" * 40
+    cut = select_input(emoji, byte_tokenizer, 30)
+    assert 0 < len(byte_tokenizer(cut)["input_ids"]) <= 30
+
+
+def test_get_scorer_loads_once_across_threads(monkeypatch):
+    """Aquecimento e requisições concorrentes compartilham uma única carga do modelo."""
+    import threading
+    import time
+
+    loads = []
+
+    def slow_load(engine):
+        loads.append(engine)
+        time.sleep(0.05)  # janela para as outras threads chegarem durante a carga
+        return RecordingScorer([0.5, 0.5])
+
+    monkeypatch.setattr(nlp, "_scorer", None)
+    monkeypatch.setattr(nlp, "_load_scorer", slow_load)
+    monkeypatch.setattr(Config, "GC_FREEZE", False)
+    start = threading.Barrier(8)
+    scorers = []
+
+    def worker():
+        start.wait(5)
+        scorers.append(nlp.get_scorer())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert len(loads) == 1
+    assert len(scorers) == 8
+    assert all(s is scorers[0] for s in scorers)
+
+
+def test_cache_namespace_follows_loaded_model(monkeypatch):
+    """Com o fallback carregado, os resultados não ficam no namespace do modelo principal."""
+    principal, fallback = RecordingScorer([0.5, 0.5]), RecordingScorer([0.5, 0.5])
+    principal.model_id = "facebook/bart-large-mnli@abc"
+    fallback.model_id = "typeform/distilbert-base-uncased-mnli@def"
+
+    assert nlp.cache_namespace(principal) != nlp.cache_namespace(fallback)
+    monkeypatch.setattr(nlp, "_scorer", fallback)
+    assert nlp.cache_namespace().startswith("typeform/distilbert-base-uncased-mnli@def|")
@@ -0,0 +1,173 @@
+import sys
+import types
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.config import Config
+from app.models import onnx_backend
+from tests.test_nli import FakeTokenizer
+
+
+def test_model_dir_per_model(tmp_path):
+    assert onnx_backend.model_dir(str(tmp_path), "org/modelo") == str(tmp_path / "org__modelo")
+
+
+def test_missing_export_raises(tmp_path):
+    """Sem `model.onnx` o erro diz como exportar (antes de importar o onnxruntime)."""
+    with pytest.raises(FileNotFoundError, match="python -m app.models.onnx_backend"):
+        onnx_backend.load(str(tmp_path))
+
+
+def test_missing_onnxruntime_raises(tmp_path, monkeypatch):
+    (tmp_path / onnx_backend.MODEL_FILE).write_bytes(b"")
+    monkeypatch.setitem(sys.modules, "onnxruntime", None)  # import falha com ImportError
+    with pytest.raises(ImportError, match="requer o pacote onnxruntime"):
+        onnx_backend.load(str(tmp_path))
+    assert not onnx_backend.available()
+
+
+def fake_runtime(monkeypatch, created):
+    """Instala módulos falsos de onnxruntime e transformers (só a API usada por `load`)."""
+    ort = types.ModuleType("onnxruntime")
+
+    class SessionOptions:
+        intra_op_num_threads = 0
+        graph_optimization_level = None
+
+    class InferenceSession:
+        def __init__(self, path, opts, providers):
+            created.update(path=path, opts=opts, providers=providers, feeds=[])
+
+        def get_inputs(self):
+            return [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+
+        def run(self, outputs, feeds):
+            created["feeds"].append((outputs, sorted(feeds)))
+            return [np.zeros((len(feeds["input_ids"]), 3), dtype=np.float32)]
+
+    ort.SessionOptions = SessionOptions
+    ort.GraphOptimizationLevel = SimpleNamespace(ORT_ENABLE_ALL="all")
+    ort.InferenceSession = InferenceSession
+
+    transformers = types.ModuleType("transformers")
+    transformers.AutoTokenizer = SimpleNamespace(from_pretrained=lambda path: FakeTokenizer())
+    transformers.AutoConfig = SimpleNamespace(
+        from_pretrained=lambda path: SimpleNamespace(label2id={"entailment": 2})
+    )
+    monkeypatch.setitem(sys.modules, "onnxruntime", ort)
+    monkeypatch.setitem(sys.modules, "transformers", transformers)
+
+
+def test_session_path(tmp_path, monkeypatch):
+    """A sessão usa o provider de CPU, grafo otimizado e só as entradas do modelo exportado."""
+    created = {}
+    fake_runtime(monkeypatch, created)
+    (tmp_path / onnx_backend.MODEL_FILE).write_bytes(b"")
+
+    tokenizer, forward, label2id = onnx_backend.load(str(tmp_path), intra_op_threads=2)
+    assert isinstance(tokenizer, FakeTokenizer)
+    assert label2id == {"entailment": 2}
+    assert created["providers"] == ["CPUExecutionProvider"]
+    assert created["opts"].graph_optimization_level == "all"
+    assert created["opts"].intra_op_num_threads == 2
+
+    ids = np.ones((4, 5), dtype=np.int64)
+    logits = forward({"input_ids": ids, "attention_mask": ids, "token_type_ids": ids})
+    assert logits.shape == (4, 3)
+    # token_type_ids não é entrada do grafo e não vai para a sessão
+    assert created["feeds"] == [(["logits"], ["attention_mask", "input_ids"])]
+
+    # Autotune: as threads só mudam criando uma sessão nova
+    forward.set_threads(4)
+    assert created["opts"].intra_op_num_threads == 4
+    assert forward.intra_op_threads == 4
+    forward({"input_ids": ids, "attention_mask": ids})
+    assert created["feeds"] == [(["logits"], ["attention_mask", "input_ids"])]
+
+
+def test_without_onnxruntime_scorer_uses_torch(monkeypatch):
+    """INFERENCE_BACKEND=onnx sem o onnxruntime instalado: avisa e usa o backend torch."""
+    import app.nlp as nlp
+
+    def fail(path):
+        raise AssertionError("não deveria tentar carregar o ONNX")
+
+    config = SimpleNamespace(label2id={"entailment": 2}, _name_or_path="org/modelo", _commit_hash="abc")
+    clf = SimpleNamespace(tokenizer=FakeTokenizer(), model=SimpleNamespace(config=config))
+    monkeypatch.setattr(Config, "INFERENCE_BACKEND", "onnx")
+    monkeypatch.setattr(onnx_backend, "available", lambda: False)
+    monkeypatch.setattr(onnx_backend, "load", fail)
+    monkeypatch.setattr(nlp, "get_classifier", lambda: clf)
+    monkeypatch.setattr(nlp, "torch_forward", lambda model: "torch")
+
+    scorer = nlp._load_scorer("fused")
+    assert scorer.model_id == "org/modelo@abc"
+
+
+def test_onnx_falls_back_to_fallback_model(tmp_path, monkeypatch):
+    """Sem exportação do modelo principal, usa a do fallback (mesma ordem do get_classifier)."""
+    import app.nlp as nlp
+
+    monkeypatch.setattr(Config, "ONNX_DIR", str(tmp_path))
+    monkeypatch.setattr(Config, "ZSL_MODEL", "org/principal")
+    monkeypatch.setattr(Config, "ZSL_MODEL_FALLBACK", "org/fallback")
+    fallback = tmp_path / "org__fallback"
+    fallback.mkdir()
+    (fallback / onnx_backend.MODEL_FILE).write_bytes(b"")
+    monkeypatch.setattr(onnx_backend, "available", lambda: True)
+    created = {}
+    fake_runtime(monkeypatch, created)
+
+    monkeypatch.setattr(nlp.autotune, "inference_threads", lambda: 3)
+
+    tokenizer, forward, label2id, model_id = nlp._load_onnx()
+    assert created["path"] == str(fallback / onnx_backend.MODEL_FILE)
+    assert created["opts"].intra_op_num_threads == 3
+    assert model_id.startswith("org/fallback@onnx-")
+
+
+def test_export_roundtrip(tmp_path):
+    """Exporta um BERT minúsculo e compara os logits do ONNX com os do PyTorch."""
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    pytest.importorskip("onnxruntime")
+
+    src = tmp_path / "tiny"
+    src.mkdir()
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "texto", "de", "exemplo", "this", "is", "a", "test", "."]
+    (src / "vocab.txt").write_text("\n".join(vocab))
+    transformers.BertTokenizer(str(src / "vocab.txt")).save_pretrained(str(src))
+    config = transformers.BertConfig(
+        vocab_size=len(vocab), hidden_size=16, num_hidden_layers=1, num_attention_heads=2,
+        intermediate_size=32, num_labels=3,
+        label2id={"contradiction": 0, "neutral": 1, "entailment": 2},
+        id2label={0: "contradiction", 1: "neutral", 2: "entailment"},
+    )
+    model = transformers.BertForSequenceClassification(config).eval()
+    model.save_pretrained(str(src))
+
+    out_dir = onnx_backend.export(str(src), str(tmp_path / "onnx"))
+    tokenizer, forward, label2id = onnx_backend.load(out_dir)
+    assert label2id["entailment"] == 2
+
+    inputs = tokenizer(["texto de exemplo .", "texto"], ["this is a test .", "test"],
+                       padding=True, return_tensors="np")
+    with torch.inference_mode():
+        expected = model(**{k: torch.from_numpy(v) for k, v in inputs.items()}).logits.numpy()
+    np.testing.assert_allclose(forward(dict(inputs)), expected, atol=1e-4)
+
+
+def test_pipeline_engine_with_onnx_logs_substitution(monkeypatch, capsys):
+    """CLASSIFIER_ENGINE=pipeline + ONNX: a troca para o engine fused aparece no log."""
+    import app.nlp as nlp
+
+    monkeypatch.setattr(Config, "INFERENCE_BACKEND", "onnx")
+    monkeypatch.setattr(onnx_backend, "available", lambda: True)
+    monkeypatch.setattr(nlp, "_load_onnx", lambda: (FakeTokenizer(), None, {"entailment": 2}, "org/modelo@onnx-1"))
+
+    scorer = nlp._load_scorer("pipeline")
+    assert type(scorer).__name__ == "NLIScorer"
+    assert scorer.model_id == "org/modelo@onnx-1"
+    assert "usando o engine fused" in capsys.readouterr().out
@@ -0,0 +1,73 @@
+import time
+
+from app.cache import content_key
+from app.persistent_cache import SQLiteCache
+
+
+def test_classification_roundtrip_across_instances(tmp_path):
+    """Entradas gravadas por um processo são lidas por outro (mesmo arquivo)."""
+    path = str(tmp_path / "cache.sqlite3")
+    first = SQLiteCache(path)
+    first.set_classification("k1", {"category": "Produtivo", "category_score": 0.9})
+
+    second = SQLiteCache(path)
+    assert second.get_classification("k1") == {"category": "Produtivo", "category_score": 0.9}
+
+
+def test_workers_of_different_versions_share_the_file(tmp_path):
+    """Durante um deploy, workers com modelos diferentes não apagam as entradas uns dos outros."""
+    path = str(tmp_path / "cache.sqlite3")
+    old, new = SQLiteCache(path), SQLiteCache(path)
+    old_key = content_key("Status do pedido 42?", "modelo-a")
+    new_key = content_key("Status do pedido 42?", "modelo-b")
+    old.set_classification(old_key, {"category": "Produtivo"})
+    new.set_classification(new_key, {"category": "Improdutivo"})
+
+    restarted = SQLiteCache(path)
+    assert restarted.get_classification(old_key) == {"category": "Produtivo"}
+    assert restarted.get_classification(new_key) == {"category": "Improdutivo"}
+
+
+def test_purge_removes_expired_rows(tmp_path):
+    """Entradas expiradas saem do arquivo, não só deixam de ser lidas."""
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    cache.set_classification("velha", {"category": "Produtivo"})
+    cache.set_text("pdf", "texto", "application/pdf")
+    cache.set_classification("nova", {"category": "Produtivo"})
+    conn = cache._conn()
+    conn.execute("UPDATE classification SET created = ? WHERE key = 'velha'", (time.time() - 120,))
+    conn.execute("UPDATE extracted_text SET created = ?", (time.time() - 120,))
+
+    assert cache.purge() == 2
+    assert cache.stats()["classification"] == 1
+    assert cache.stats()["extracted_text"] == 0
+    assert cache.get_classification("nova") is not None
+
+
+def test_row_cap_keeps_newest_entries(tmp_path):
+    """Acima de max_rows, as entradas mais antigas são removidas a cada purge_interval."""
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_rows=3, purge_interval=0)
+    for i in range(6):
+        cache.set_classification(f"k{i}", {"i": i})
+        cache._conn().execute("UPDATE classification SET created = ? WHERE key = ?", (1000.0 + i, f"k{i}"))
+
+    assert cache.stats()["classification"] == 3
+    assert [cache.get_classification(f"k{i}") for i in (3, 4, 5)] == [{"i": 3}, {"i": 4}, {"i": 5}]
+    assert cache.get_classification("k0") is None
+
+
+def test_purge_runs_at_most_once_per_interval(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_rows=1, purge_interval=3600)
+    for i in range(3):
+        cache.set_classification(f"k{i}", {"i": i})
+    # A limpeza da abertura já passou; a próxima só depois de purge_interval
+    assert cache.stats()["classification"] == 3
+    cache.purge()
+    assert cache.stats()["classification"] == 1
+
+
+def test_wal_mode(tmp_path):
+    """O banco é aberto em modo WAL."""
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    mode = cache._conn().execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode.lower() == "wal"
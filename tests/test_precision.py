@@ -0,0 +1,127 @@
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import Config
+from app.models import precision
+
+
+class FakeModel:
+    """Modelo mínimo: registra as conversões de dtype."""
+
+    def __init__(self):
+        self.dtype = "float32"
+
+    def to(self, dtype):
+        self.dtype = dtype
+        return self
+
+
+def fake_torch(monkeypatch, engines=("x86", "none"), bf16=True, quantize=None):
+    """Instala um módulo torch falso com só o que `apply_precision` usa."""
+    torch = types.ModuleType("torch")
+    torch.bfloat16 = "bfloat16"
+    torch.qint8 = "qint8"
+    torch.nn = SimpleNamespace(Linear="Linear")
+    torch.backends = SimpleNamespace(quantized=SimpleNamespace(supported_engines=list(engines)))
+    torch.cpu = SimpleNamespace(_is_avx512_bf16_supported=lambda: bf16)
+    torch.quantization = SimpleNamespace(
+        quantize_dynamic=quantize or (lambda model, layers, dtype: ("quantizado", model, dtype))
+    )
+    monkeypatch.setitem(sys.modules, "torch", torch)
+    return torch
+
+
+def test_fp32_returns_model_unchanged():
+    model = FakeModel()
+    for value in (None, "", "fp32"):
+        assert precision.apply_precision(model, value) is model
+    assert model.dtype == "float32"
+
+
+def test_unknown_precision_raises():
+    with pytest.raises(ValueError, match="MODEL_PRECISION desconhecida"):
+        precision.apply_precision(FakeModel(), "fp8")
+
+
+def test_int8_and_bf16_when_supported(monkeypatch):
+    fake_torch(monkeypatch)
+    model = FakeModel()
+    assert precision.apply_precision(model, "int8") == ("quantizado", model, "qint8")
+    assert precision.apply_precision(model, "bf16").dtype == "bfloat16"
+
+
+def test_int8_falls_back_without_quantized_engine(monkeypatch):
+    """Sem backend de quantização (ex.: build do torch sem fbgemm/qnnpack), fica em fp32."""
+    def fail(*args, **kwargs):
+        raise AssertionError("não deveria quantizar")
+
+    fake_torch(monkeypatch, engines=("none",), quantize=fail)
+    model = FakeModel()
+    assert precision.apply_precision(model, "int8") is model
+
+
+def test_int8_falls_back_when_quantization_fails(monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("Didn't find engine for operation quantized::linear_prepack")
+
+    fake_torch(monkeypatch, quantize=fail)
+    model = FakeModel()
+    assert precision.apply_precision(model, "int8") is model
+
+
+def test_bf16_falls_back_without_cpu_support(monkeypatch):
+    fake_torch(monkeypatch, bf16=False)
+    monkeypatch.setattr(precision, "_cpu_flags", lambda: set())
+    model = FakeModel()
+    assert precision.apply_precision(model, "bf16") is model
+    assert model.dtype == "float32"
+
+
+def test_bf16_detects_amx(monkeypatch, tmp_path):
+    """CPUs só com AMX-BF16 (sem AVX512-BF16) também usam bf16."""
+    read_flags = precision._cpu_flags
+    torch = fake_torch(monkeypatch, bf16=False)
+    monkeypatch.setattr(precision, "_cpu_flags", lambda: set())
+    torch.cpu._is_amx_tile_supported = lambda: True
+    assert precision.bf16_supported()
+
+    del torch.cpu._is_amx_tile_supported  # torch 2.1: só as flags do /proc/cpuinfo
+    cpuinfo = tmp_path / "cpuinfo"
+    cpuinfo.write_text("processor\t: 0\nflags\t\t: fpu sse2 avx512f amx_tile amx_bf16\n")
+    monkeypatch.setattr(precision, "_cpu_flags", lambda: read_flags(str(cpuinfo)))
+    assert precision.bf16_supported()
+
+
+def test_classifier_precision_from_config(monkeypatch):
+    """`MODEL_PRECISION` escolhe a conversão aplicada ao carregar o classificador."""
+    import app.nlp as nlp
+
+    applied = []
+    monkeypatch.setattr(nlp, "_load_pipeline", lambda: SimpleNamespace(model=FakeModel()))
+    monkeypatch.setattr(nlp, "apply_precision", lambda model, value: applied.append(value) or model)
+    monkeypatch.setattr(Config, "CLASSIFIER_ENGINE", "fused")
+
+    for value in ("fp32", "int8", "bf16"):
+        monkeypatch.setattr(Config, "MODEL_PRECISION", value)
+        nlp._load_classifier()
+    assert applied == ["int8", "bf16"]
+
+    # O pipeline HF não pós-processa logits em bf16: mantém fp32
+    monkeypatch.setattr(Config, "CLASSIFIER_ENGINE", "pipeline")
+    nlp._load_classifier()
+    assert applied == ["int8", "bf16"]
+
+
+def test_int8_quantizes_linear_layers():
+    """Com o torch instalado, int8 troca as camadas Linear pelas quantizadas."""
+    torch = pytest.importorskip("torch")
+    if not precision.int8_supported():
+        pytest.skip("torch sem backend de quantização nesta CPU")
+    model = torch.nn.Sequential(torch.nn.Linear(8, 4))
+    quantized = precision.apply_precision(model, "int8")
+    assert type(quantized[0]).__name__ == "Linear" and type(quantized[0]) is not torch.nn.Linear
+    x = torch.randn(2, 8)
+    assert torch.allclose(quantized(x), model(x), atol=0.1)
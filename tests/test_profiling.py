@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.nlp as nlp
+from app import profiling
+from app.config import Config
+from app.main import app
+from app.models.stub import StubScorer
+
+client = TestClient(app)
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_captures_busy_thread():
+    """O amostrador registra a pilha de uma thread ocupada, com o nome da thread na raiz."""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="ocupada")
+    worker.start()
+    sampler = profiling.Sampler(interval=0.001)
+    sampler.start()
+    time.sleep(0.05)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    stacks = profiling.parse_collapsed(sampler.collapsed())
+    assert any(stack[0] == "ocupada" and any(f.startswith("busy_loop ") for f in stack)
+               for stack, _ in stacks)
+    assert sum(n for _, n in stacks) == sampler.samples
+
+
+def test_speedscope_conversion():
+    """Stacks colapsados viram um perfil "sampled" do speedscope com frames compartilhados."""
+    profile = profiling.speedscope("t;a;b 3\nt;a 1\n", "teste", 0.005)
+    assert [f["name"] for f in profile["shared"]["frames"]] == ["t", "a", "b"]
+    sampled = profile["profiles"][0]
+    assert sampled["samples"] == [[0, 1, 2], [0, 1]]
+    assert sampled["weights"] == [0.015, 0.005]
+
+
+def test_store_prunes_and_rejects_bad_ids(tmp_path):
+    """O repositório mantém só os perfis mais recentes e não aceita ids fora do formato."""
+    store = profiling.ProfileStore(str(tmp_path), max_stored=2)
+    ids = []
+    for i in range(3):
+        ids.append(f"{i:032x}")
+        store.save(ids[-1], profiling.Sampler(), {"path": "/api/process", "status": 200})
+        time.sleep(0.01)
+
+    assert {m["id"] for m in store.list()} == set(ids[1:])
+    for bad in (ids[0], "../config", "abc"):
+        with pytest.raises(KeyError):
+            store.collapsed(bad)
+
+
+def test_profile_only_with_flag_and_header(monkeypatch, tmp_path):
+    """Só requisições com PROFILING_ENABLED e X-Profile são perfiladas; o id volta no header."""
+    monkeypatch.setattr(Config, "RESULT_CACHE_ENABLED", False)
+    monkeypatch.setattr(nlp, "_scorer", StubScorer())
+    monkeypatch.setattr(profiling, "_store", profiling.ProfileStore(str(tmp_path)))
+    payload = {"text": "Qual o status do meu pedido 42?"}
+
+    monkeypatch.setattr(Config, "PROFILING_ENABLED", False)
+    r = client.post("/api/process", data=payload, headers={"X-Profile": "1"})
+    assert "x-profile-id" not in r.headers
+    assert client.get("/debug/profiles").status_code == 404
+
+    monkeypatch.setattr(Config, "PROFILING_ENABLED", True)
+    r = client.post("/api/process", data=payload)
+    assert "x-profile-id" not in r.headers
+    r = client.post("/api/process", data=payload, headers={"X-Profile": "1"})
+    assert r.status_code == 200
+    profile_id = r.headers["x-profile-id"]
+
+    listed = client.get("/debug/profiles").json()["profiles"]
+    assert [p["id"] for p in listed] == [profile_id]
+    assert listed[0]["status"] == 200
+    assert client.get(f"/debug/profiles/{profile_id}").status_code == 200
+    assert client.get(f"/debug/profiles/{profile_id}?format=speedscope").json()["profiles"][0]["type"] == "sampled"
+    assert client.get(f"/debug/profiles/{'0' * 32}").status_code == 404
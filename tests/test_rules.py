@@ -0,0 +1,68 @@
+import pytest
+
+import app.rules as rules_module
+from app.rules import EMAIL_RULE_GROUPS, EMAIL_RULES, RuleSet, override, refine
+
+
+def brute_force(groups, text):
+    """Contagem de referência: uma varredura `in` por palavra-chave."""
+    lower = text.lower()
+    return {name: sum(1 for kw in kws if kw in lower) for name, kws in groups.items()}
+
+
+TEXTS = [
+    "",
+    "Olá, qual o status do chamado?",
+    "Muito obrigado, problema foi resolvido!",
+    "Levando so hoje: 10 computadores por 1 real",
+    "IMPERDÍVEL! Oferta especial, clique aqui",
+    "muitoobrigadoperfeitamente",
+    "Convite para o workshop de sistema no-reply",
+]
+
+
+@pytest.fixture(params=["ahocorasick", "regex"])
+def engine(request, monkeypatch):
+    """Roda cada teste com o autômato (se instalado) e com a regex de fallback."""
+    if request.param == "ahocorasick" and rules_module.ahocorasick is None:
+        pytest.skip("pyahocorasick não instalado")
+    if request.param == "regex":
+        monkeypatch.setattr(rules_module, "ahocorasick", None)
+    return request.param
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_count_matches_brute_force(engine, text):
+    """Uma passada do matcher equivale às varreduras `in` por palavra-chave."""
+    assert RuleSet(EMAIL_RULE_GROUPS).count(text) == brute_force(EMAIL_RULE_GROUPS, text)
+
+
+def test_overlapping_keywords(engine):
+    """Palavras-chave sobrepostas ou contidas em outras também são contadas."""
+    groups = {"a": ["levando so", "so hoje"], "b": ["obrigado", "muito obrigado"], "c": ["x", "x"]}
+    counts = RuleSet(groups).count("Levando so hoje, muito obrigado! x")
+    assert counts == {"a": 2, "b": 2, "c": 2}
+
+
+def test_override_spam_before_gratitude():
+    """Spam tem prioridade sobre agradecimento."""
+    counts = EMAIL_RULES.count("Obrigado! Oferta imperdível")
+    assert override(counts) == ("Improdutivo", "Spam ou marketing")
+
+
+def test_refine_intent_rules_in_order():
+    """A primeira regra de intenção com ocorrência define categoria e intenção."""
+    counts = EMAIL_RULES.count("Podemos agendar uma reunião sobre o orçamento?")
+    assert refine(counts, "Improdutivo", "Outro") == ("Produtivo", "Agendamento de reunião ou compromisso")
+    assert refine(EMAIL_RULES.count("bom dia"), "Produtivo", "Outro") == ("Produtivo", "Outro")
+
+
+def test_decide_confidence_grows_with_evidence():
+    """A confiança da decisão por regras cresce com as ocorrências, limitada a 0.99."""
+    assert rules_module.decide(EMAIL_RULES.count("bom dia")) is None
+    weak = rules_module.decide(EMAIL_RULES.count("Obrigado, perfeito"))
+    strong = rules_module.decide(EMAIL_RULES.count(
+        "Oferta imperdível! Desconto, promoção, grátis, clique aqui, aproveite, ganhe, sorteio"))
+    assert weak[:2] == ("Improdutivo", "Agradecimento ou felicitação")
+    assert strong[:2] == ("Improdutivo", "Spam ou marketing")
+    assert weak[2] < strong[2] == rules_module.RULE_MAX_CONFIDENCE
@@ -0,0 +1,41 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+ROOT = __file__.rsplit("/tests/", 1)[0]
+
+HEAVY_MODULES = ["transformers", "torch", "nltk", "onnxruntime", "openai"]
+
+
+def measure_import(module):
+    """Importa o módulo em um interpretador limpo e mede o tempo de import."""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True,
+                         text=True, timeout=120, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("module,budget", [("app.nlp", 1.0), ("app.main", 3.0)])
+def test_import_is_lazy_and_fast(module, budget):
+    """Importar o app não carrega transformers/torch/nltk e não acessa a rede."""
+    result = measure_import(module)
+    print(f"import {module}: {result['seconds']:.3f}s")
+    assert result["loaded"] == []
+    assert result["seconds"] < budget
+
+
+def test_vendored_stopwords():
+    """A lista de stopwords vem do arquivo do pacote (sem nltk.download)."""
+    from app.nlp import STOP_PT, preprocess
+
+    assert len(STOP_PT) == 207
+    assert {"de", "que", "não", "é"} <= STOP_PT
+    assert preprocess("Qual é o status do pedido") == "status pedido"
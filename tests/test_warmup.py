@@ -0,0 +1,52 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.executors import BoundedExecutor
+from app.warmup import ModelWarmup
+
+
+def test_warmup_runs_in_background_pool():
+    """O aquecimento roda no pool e marca a instância como pronta."""
+    calls = []
+    pool = BoundedExecutor("teste", 1)
+    warm = ModelWarmup(lambda: calls.append(1))
+    assert not warm.ready
+
+    asyncio.run(warm.run(pool))
+
+    assert warm.ready
+    assert calls == [1]
+    assert warm.stats()["seconds"] is not None
+    pool.shutdown()
+
+
+def test_warmup_failure_keeps_not_ready():
+    """Se o modelo não carregar, a instância continua fora do balanceador."""
+    pool = BoundedExecutor("teste", 1)
+
+    def broken():
+        raise RuntimeError("modelo indisponível")
+
+    warm = ModelWarmup(broken)
+    asyncio.run(warm.run(pool))
+
+    assert warm.status == "failed"
+    assert "indisponível" in warm.stats()["error"]
+    pool.shutdown()
+
+
+def test_ready_endpoint_gated_on_warmup(monkeypatch):
+    """/ready responde 503 até o aquecimento terminar; /health sempre 200."""
+    warm = ModelWarmup(lambda: None)
+    monkeypatch.setattr(main, "model_warmup", warm)
+    client = TestClient(main.app)
+
+    assert client.get("/ready").status_code == 503
+    assert client.get("/health").status_code == 200
+
+    warm.mark_ready()
+    r = client.get("/ready")
+    assert r.status_code == 200
+    assert r.json()["ready"] is True